@@ -1,28 +1,14 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # renderização sem janela, também nos processos do pool
 import matplotlib.pyplot as plt
 import numpy as np
 import os
-
-# --- 1. Carregamento e Preparação dos Dados ---
-print("Carregando e preparando os dados...")
-CSV_FILE = 'top_1000_github_repos.csv'
-df = pd.read_csv(CSV_FILE)
-
-# Converte colunas de data
-df['createdAt'] = pd.to_datetime(df['createdAt'])
-df['pushedAt'] = pd.to_datetime(df['pushedAt'])
-
-# Calcula métricas derivadas
-df['repositoryAge'] = (pd.to_datetime('now', utc=True) - df['createdAt']).dt.days / 365.25
-df['daysSinceLastPush'] = (pd.to_datetime('now', utc=True) - df['pushedAt']).dt.days
-df['closedIssuesPercentage'] = (df['closedIssues'] / df['totalIssues'] * 100).fillna(100)
-
-print("Dados carregados e preparados!")
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ingest import load_dataframe
 
 # Cria um diretório para salvar os gráficos (usando o mesmo nome 'graficos')
 OUTPUT_DIR = 'graficos'
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
 
 # --- Função para salvar tabelas como imagem ---
 def save_df_as_image(df, title, filepath):
@@ -30,7 +16,7 @@ def save_df_as_image(df, title, filepath):
     fig, ax = plt.subplots(figsize=(8, max(2, len(df) * 0.5))) # Ajusta o tamanho dinamicamente
     ax.axis('off')
     ax.axis('tight')
-    
+
     # Formata os números no DataFrame para melhor leitura
     df_display = df.copy()
     for col in df_display.select_dtypes(include=np.number).columns:
@@ -40,97 +26,118 @@ def save_df_as_image(df, title, filepath):
     table.auto_set_font_size(False)
     table.set_fontsize(10)
     table.scale(1.2, 1.2)
-    
+
     plt.title(title, fontsize=14, pad=20)
     plt.tight_layout()
     plt.savefig(filepath, bbox_inches='tight', dpi=200)
     plt.close()
-
-# --- 2. Geração dos Gráficos e Tabelas ---
-
-# RQ01: Idade dos Repositórios (Gráfico de Pizza)
-print("Gerando gráfico para RQ01 - Idade dos Repositórios...")
-bins = [0, 5, 8, 10, 12, df['repositoryAge'].max()]
-labels = ['0-5 anos', '5-8 anos', '8-10 anos', '10-12 anos', '12+ anos']
-df['age_group'] = pd.cut(df['repositoryAge'], bins=bins, labels=labels, right=False)
-age_dist = df['age_group'].value_counts()
-
-plt.figure(figsize=(10, 8))
-plt.pie(age_dist, labels=age_dist.index, autopct='%1.1f%%', startangle=140)
-plt.title('RQ01: Proporção de Repositórios por Faixa de Idade')
-plt.axis('equal')
-plt.savefig(os.path.join(OUTPUT_DIR, 'rq01_idade_pizza.png'))
-plt.close()
-
-# RQ02 e RQ03: Pull Requests e Releases (Tabela de Estatísticas)
-print("Gerando tabela para RQ02 e RQ03 - Contribuições e Releases...")
-stats_df = df[['acceptedPullRequests', 'totalReleases']].describe().loc[['mean', '50%', '75%', 'max']]
-stats_df.rename(index={'50%': 'mediana', '75%': 'quartil_superior'}, inplace=True)
-stats_df.columns = ['Pull Requests Aceitas', 'Total de Releases']
-save_df_as_image(stats_df, 'RQ02 & RQ03: Estatísticas de Contribuições e Releases', os.path.join(OUTPUT_DIR, 'rq02_rq03_estatisticas_tabela.png'))
-
-# RQ04: Frequência de Atualizações (Gráfico de Pizza)
-print("Gerando gráfico para RQ04 - Atualização...")
-bins = [-1, 30, 90, 180, 365, df['daysSinceLastPush'].max()]
-labels = ['Menos de 1 mês', '1-3 meses', '3-6 meses', '6-12 meses', 'Mais de 1 ano']
-df['update_group'] = pd.cut(df['daysSinceLastPush'], bins=bins, labels=labels, right=True)
-update_dist = df['update_group'].value_counts()
-
-plt.figure(figsize=(10, 8))
-plt.pie(update_dist, labels=update_dist.index, autopct='%1.1f%%', startangle=90)
-plt.title('RQ04: Proporção por Tempo Desde a Última Atualização')
-plt.axis('equal')
-plt.savefig(os.path.join(OUTPUT_DIR, 'rq04_atualizacao_pizza.png'))
-plt.close()
-
-
-# RQ05: Linguagens de Programação (Pizza e Tabela)
-print("Gerando gráficos para RQ05 - Linguagens...")
-language_counts = df['primaryLanguage'].value_counts()
-top_10_languages = language_counts.nlargest(10)
-top_10_languages['Outras'] = language_counts.nsmallest(len(language_counts) - 10).sum()
-
-# Gráfico de Pizza
-plt.figure(figsize=(10, 8))
-plt.pie(top_10_languages, labels=top_10_languages.index, autopct='%1.1f%%', startangle=140)
-plt.title('RQ05: Distribuição das 10 Principais Linguagens')
-plt.axis('equal')
-plt.savefig(os.path.join(OUTPUT_DIR, 'rq05_linguagens_pizza.png'))
-plt.close()
-
-# Tabela
-lang_df = top_10_languages.reset_index()
-lang_df.columns = ['Linguagem', 'Nº de Repositórios']
-lang_df.set_index('Linguagem', inplace=True)
-save_df_as_image(lang_df, 'RQ05: Contagem de Repositórios por Linguagem', os.path.join(OUTPUT_DIR, 'rq05_linguagens_tabela.png'))
-
-# RQ06: Percentual de Issues Fechadas (Gráfico de Pizza)
-print("Gerando gráfico para RQ06 - Issues Fechadas...")
-bins = [0, 80, 90, 95, 99, 100.1] # .1 para incluir o 100
-labels = ['< 80%', '80-90%', '90-95%', '95-99%', '99-100%']
-df['issues_group'] = pd.cut(df['closedIssuesPercentage'], bins=bins, labels=labels, right=False)
-issues_dist = df['issues_group'].value_counts()
-
-plt.figure(figsize=(10, 8))
-plt.pie(issues_dist, labels=issues_dist.index, autopct='%1.1f%%', startangle=90)
-plt.title('RQ06: Proporção por Faixa de Issues Fechadas')
-plt.axis('equal')
-plt.savefig(os.path.join(OUTPUT_DIR, 'rq06_issues_pizza.png'))
-plt.close()
-
-# RQ07: Comparação de Métricas por Linguagem (Tabela)
-print("Gerando tabela para RQ07 - Comparação por Linguagem...")
-top_10_names = top_10_languages.drop('Outras').index
-df_top_lang = df[df['primaryLanguage'].isin(top_10_names)]
-metrics_by_lang = df_top_lang.groupby('primaryLanguage').agg({
-    'stars': 'median',
-    'repositoryAge': 'median',
-    'acceptedPullRequests': 'median',
-}).rename(columns={
-    'stars': 'Estrelas (Mediana)',
-    'repositoryAge': 'Idade Mediana (Anos)',
-    'acceptedPullRequests': 'PRs Aceitas (Mediana)',
-}).sort_values(by='Estrelas (Mediana)', ascending=False)
-save_df_as_image(metrics_by_lang, 'RQ07: Métricas por Linguagem (Mediana)', os.path.join(OUTPUT_DIR, 'rq07_comparacao_tabela.png'))
-
-print(f"\nTodos os gráficos foram gerados e salvos na pasta '{OUTPUT_DIR}'!")
\ No newline at end of file
+    return filepath
+
+# --- Função para salvar gráficos de pizza ---
+def save_pie(dist, title, filepath, startangle):
+    """ Salva uma distribuição (Series já agregada) como gráfico de pizza. """
+    plt.figure(figsize=(10, 8))
+    plt.pie(dist, labels=dist.index, autopct='%1.1f%%', startangle=startangle)
+    plt.title(title)
+    plt.axis('equal')
+    plt.savefig(filepath)
+    plt.close()
+    return filepath
+
+# --- 2. Agregação dos Dados de cada RQ ---
+def build_render_tasks(df):
+    """ Calcula os agregados de cada RQ e devolve as tarefas de renderização.
+
+    Cada tarefa é (função, argumentos) e recebe só a Series/tabela pequena de
+    que precisa, para poder ser enviada a outro processo sem o DataFrame inteiro.
+    """
+    tasks = []
+
+    # RQ01: Idade dos Repositórios (Gráfico de Pizza)
+    print("Agregando RQ01 - Idade dos Repositórios...")
+    bins = [0, 5, 8, 10, 12, df['repositoryAge'].max()]
+    labels = ['0-5 anos', '5-8 anos', '8-10 anos', '10-12 anos', '12+ anos']
+    age_dist = pd.cut(df['repositoryAge'], bins=bins, labels=labels, right=False).value_counts()
+    tasks.append((save_pie, (age_dist, 'RQ01: Proporção de Repositórios por Faixa de Idade',
+                             os.path.join(OUTPUT_DIR, 'rq01_idade_pizza.png'), 140)))
+
+    # RQ02 e RQ03: Pull Requests e Releases (Tabela de Estatísticas)
+    print("Agregando RQ02 e RQ03 - Contribuições e Releases...")
+    stats_df = df[['acceptedPullRequests', 'totalReleases']].describe().loc[['mean', '50%', '75%', 'max']]
+    stats_df.rename(index={'50%': 'mediana', '75%': 'quartil_superior'}, inplace=True)
+    stats_df.columns = ['Pull Requests Aceitas', 'Total de Releases']
+    tasks.append((save_df_as_image, (stats_df, 'RQ02 & RQ03: Estatísticas de Contribuições e Releases',
+                                     os.path.join(OUTPUT_DIR, 'rq02_rq03_estatisticas_tabela.png'))))
+
+    # RQ04: Frequência de Atualizações (Gráfico de Pizza)
+    print("Agregando RQ04 - Atualização...")
+    bins = [-1, 30, 90, 180, 365, df['daysSinceLastPush'].max()]
+    labels = ['Menos de 1 mês', '1-3 meses', '3-6 meses', '6-12 meses', 'Mais de 1 ano']
+    update_dist = pd.cut(df['daysSinceLastPush'], bins=bins, labels=labels, right=True).value_counts()
+    tasks.append((save_pie, (update_dist, 'RQ04: Proporção por Tempo Desde a Última Atualização',
+                             os.path.join(OUTPUT_DIR, 'rq04_atualizacao_pizza.png'), 90)))
+
+    # RQ05: Linguagens de Programação (Pizza e Tabela)
+    print("Agregando RQ05 - Linguagens...")
+    language_counts = df['primaryLanguage'].value_counts()
+    top_10_languages = language_counts.nlargest(10)
+    top_10_languages['Outras'] = language_counts.nsmallest(len(language_counts) - 10).sum()
+    tasks.append((save_pie, (top_10_languages, 'RQ05: Distribuição das 10 Principais Linguagens',
+                             os.path.join(OUTPUT_DIR, 'rq05_linguagens_pizza.png'), 140)))
+
+    lang_df = top_10_languages.reset_index()
+    lang_df.columns = ['Linguagem', 'Nº de Repositórios']
+    lang_df.set_index('Linguagem', inplace=True)
+    tasks.append((save_df_as_image, (lang_df, 'RQ05: Contagem de Repositórios por Linguagem',
+                                     os.path.join(OUTPUT_DIR, 'rq05_linguagens_tabela.png'))))
+
+    # RQ06: Percentual de Issues Fechadas (Gráfico de Pizza)
+    print("Agregando RQ06 - Issues Fechadas...")
+    bins = [0, 80, 90, 95, 99, 100.1] # .1 para incluir o 100
+    labels = ['< 80%', '80-90%', '90-95%', '95-99%', '99-100%']
+    issues_dist = pd.cut(df['closedIssuesPercentage'], bins=bins, labels=labels, right=False).value_counts()
+    tasks.append((save_pie, (issues_dist, 'RQ06: Proporção por Faixa de Issues Fechadas',
+                             os.path.join(OUTPUT_DIR, 'rq06_issues_pizza.png'), 90)))
+
+    # RQ07: Comparação de Métricas por Linguagem (Tabela)
+    print("Agregando RQ07 - Comparação por Linguagem...")
+    top_10_names = top_10_languages.drop('Outras').index
+    df_top_lang = df[df['primaryLanguage'].isin(top_10_names)]
+    metrics_by_lang = df_top_lang.groupby('primaryLanguage', observed=True).agg({
+        'stars': 'median',
+        'repositoryAge': 'median',
+        'acceptedPullRequests': 'median',
+    }).rename(columns={
+        'stars': 'Estrelas (Mediana)',
+        'repositoryAge': 'Idade Mediana (Anos)',
+        'acceptedPullRequests': 'PRs Aceitas (Mediana)',
+    }).sort_values(by='Estrelas (Mediana)', ascending=False)
+    tasks.append((save_df_as_image, (metrics_by_lang, 'RQ07: Métricas por Linguagem (Mediana)',
+                                     os.path.join(OUTPUT_DIR, 'rq07_comparacao_tabela.png'))))
+
+    return tasks
+
+def main():
+    # --- 1. Carregamento e Preparação dos Dados ---
+    print("Carregando e preparando os dados...")
+    # Usa o Parquet tipado (datas, categorias e métricas derivadas já calculadas)
+    # gerado pelo minerador/ingest.py; se ele não existir, prepara a partir do CSV
+    df = load_dataframe()
+    print("Dados carregados e preparados!")
+
+    if not os.path.exists(OUTPUT_DIR):
+        os.makedirs(OUTPUT_DIR)
+
+    tasks = build_render_tasks(df)
+
+    # --- 3. Geração dos Gráficos e Tabelas em paralelo ---
+    print(f"\nRenderizando {len(tasks)} figuras em paralelo...")
+    with ProcessPoolExecutor(max_workers=min(len(tasks), os.cpu_count() or 1)) as pool:
+        futures = [pool.submit(func, *args) for func, args in tasks]
+        for future in as_completed(futures):
+            print(f"Figura salva: {future.result()}")
+
+    print(f"\nTodos os gráficos foram gerados e salvos na pasta '{OUTPUT_DIR}'!")
+
+if __name__ == '__main__':
+    main()
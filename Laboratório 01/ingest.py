@@ -0,0 +1,57 @@
+import os
+import pandas as pd
+
+CSV_FILE = "top_1000_github_repos.csv"
+PARQUET_FILE = "top_1000_github_repos.parquet"
+
+INT_COLUMNS = ['stars', 'totalReleases', 'acceptedPullRequests', 'totalIssues', 'closedIssues']
+
+def prepare_dataframe(df, reference=None):
+    """tipa as colunas e materializa as métricas derivadas usadas na análise.
+
+    repositoryAge e daysSinceLastPush são calculadas em relação a `reference`
+    (por padrão, o momento da ingestão), que fica gravado na coluna snapshotAt.
+    """
+    reference = reference if reference is not None else pd.Timestamp.now(tz='UTC')
+    df = df.copy()
+
+    df['createdAt'] = pd.to_datetime(df['createdAt'], utc=True)
+    df['pushedAt'] = pd.to_datetime(df['pushedAt'], utc=True)
+    # 'N/A' vira ausente, como já acontecia ao ler o CSV com pd.read_csv
+    language = df['primaryLanguage']
+    df['primaryLanguage'] = language.where(language != 'N/A').astype('category')
+    for col in INT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+
+    df['repositoryAge'] = (reference - df['createdAt']).dt.days / 365.25
+    df['daysSinceLastPush'] = (reference - df['pushedAt']).dt.days
+    df['closedIssuesPercentage'] = (df['closedIssues'] / df['totalIssues'] * 100).fillna(100)
+    df['snapshotAt'] = reference
+    return df
+
+def write_parquet(df, path=PARQUET_FILE):
+    """grava o DataFrame tipado em Parquet; sem pyarrow, apenas avisa e segue com o CSV."""
+    try:
+        prepare_dataframe(df).to_parquet(path, index=False)
+    except ImportError:
+        print("pyarrow não instalado: Parquet não gerado, a análise usará o CSV.")
+        return False
+    print(f"arquivo tipado salvo em '{path}'")
+    return True
+
+def load_dataframe(csv_path=CSV_FILE, parquet_path=PARQUET_FILE):
+    """carrega o Parquet (mapeado em memória) se estiver atualizado; senão prepara a partir do CSV."""
+    parquet_is_fresh = (
+        os.path.exists(parquet_path)
+        and (not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path))
+    )
+    if parquet_is_fresh:
+        try:
+            return pd.read_parquet(parquet_path, memory_map=True)
+        except ImportError:
+            pass
+    return prepare_dataframe(pd.read_csv(csv_path))
+
+if __name__ == "__main__":
+    # ingestão avulsa de um CSV já minerado
+    write_parquet(pd.read_csv(CSV_FILE))
@@ -1,9 +1,17 @@
 import os
+import sys
+import argparse
+import asyncio
 import requests
 import pandas as pd
 import json
 from dotenv import load_dotenv
 import time
+from datetime import datetime, timezone
+from ingest import write_parquet
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'comum'))
+from request_metrics import RequestMetrics, endpoint_class
 
 # carrega variáveis de ambiente
 load_dotenv()
@@ -11,17 +19,50 @@ GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
 if not GITHUB_TOKEN:
     raise ValueError("Token não encontrado! Verifique seu arquivo .env.")
 
-API_URL = "https://api.github.com/graphql"
+API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/") + "/graphql"  # GITHUB_API_URL aponta para outro servidor (ex.: comum/mock_github.py)
 HEADERS = {"Authorization": f"bearer {GITHUB_TOKEN}"}
+METRICS = RequestMetrics()  # métricas das requisições desta execução (ver request_metrics.py)
 
-TOTAL_REPOS = 1000        # agora 1000 repositórios
-BATCH_SIZE = 4         # máximo permitido pela API
+TOTAL_REPOS = 1000        # agora 1000 repositórios (pode passar de 1000: a busca é particionada)
+BATCH_SIZE = 25        # tamanho inicial da página (a listagem só traz campos baratos)
+MIN_BATCH_SIZE = 1
+MAX_BATCH_SIZE = 100   # máximo permitido pela API
+OVERLOAD_STATUS = (502, 503, 504)  # respostas que indicam página pesada demais
 CSV_FILE = "top_1000_github_repos.csv"
 JSON_FILE = "laboratorio-01_data.json"
+JOURNAL_FILE = "laboratorio-01_journal.jsonl"  # checkpoint append-only (um lote por linha)
+SNAPSHOT_DIR = "snapshots"  # snapshots versionados + deltas gerados pelo --refresh
+METRICS_PREFIX = "laboratorio-01_metricas"  # resumo das requisições (.json/.csv) ao final da execução
+METRICS_PROMETHEUS = False  # também grava o .prom no formato texto do prometheus
+
+MIN_STARS = 2          # equivalente ao antigo "stars:>1"
+SEARCH_CAP = 1000      # a busca do GitHub não devolve mais que 1000 resultados por query
+NUM_WORKERS = 4        # partições/lotes processados em paralelo
+
+# segunda fase: campos caros buscados por nodes(ids:), em grupos com lote próprio
+ENRICHMENT_GROUPS = {
+    'metadata': {
+        'batch_size': 100,
+        'fields': "createdAt primaryLanguage { name }",
+    },
+    'contributions': {
+        'batch_size': 50,
+        'fields': "releases { totalCount } pullRequests(states: MERGED) { totalCount }",
+    },
+    'issues': {
+        'batch_size': 50,
+        'fields': "issues { totalCount } closedIssues: issues(states: CLOSED) { totalCount }",
+    },
+}
 
 GRAPHQL_QUERY = """
-query GetTopRepositories($cursor: String) {
-  search(query: "stars:>1 sort:stars-desc", type: REPOSITORY, first: %d, after: $cursor) {
+query GetTopRepositories($query: String!, $cursor: String, $first: Int!) {
+  rateLimit {
+    cost
+    remaining
+    resetAt
+  }
+  search(query: $query, type: REPOSITORY, first: $first, after: $cursor) {
     repositoryCount
     pageInfo {
       endCursor
@@ -29,114 +70,526 @@ query GetTopRepositories($cursor: String) {
     }
     nodes {
       ... on Repository {
+        id
         nameWithOwner
         stargazers { totalCount }
-        createdAt
         pushedAt
-        primaryLanguage { name }
-        releases { totalCount }
-        pullRequests(states: MERGED) { totalCount }
-        issues { totalCount }
-        closedIssues: issues(states: CLOSED) { totalCount }
       }
     }
   }
 }
-""" % BATCH_SIZE
+"""
+
+ENRICH_QUERY = """
+query EnrichRepositories($ids: [ID!]!) {
+  rateLimit {
+    cost
+    remaining
+    resetAt
+  }
+  nodes(ids: $ids) {
+    ... on Repository {
+      id
+      %s
+    }
+  }
+}
+"""
 
-def run_query(query, variables):
-    """executa a query com retry progressivo e timeout longo."""
+COUNT_QUERY = """
+query CountRepositories($query: String!) {
+  rateLimit {
+    cost
+    remaining
+    resetAt
+  }
+  search(query: $query, type: REPOSITORY, first: 1) {
+    repositoryCount
+    nodes {
+      ... on Repository {
+        stargazers { totalCount }
+      }
+    }
+  }
+}
+"""
+
+def shrink_page(variables):
+    """reduz pela metade a página pedida (o cursor continua válido) ou o lote de ids."""
+    if 'first' in variables:
+        variables['first'] = max(MIN_BATCH_SIZE, variables['first'] // 2)
+        print(f"página reduzida para {variables['first']} repositórios.")
+    elif 'ids' in variables and len(variables['ids']) > MIN_BATCH_SIZE:
+        variables['ids'] = variables['ids'][:len(variables['ids']) // 2]
+        print(f"lote reduzido para {len(variables['ids'])} ids.")
+
+def run_query(query, variables, allow_partial=False):
+    """executa a query com retry progressivo e timeout longo.
+
+    em 502/504 ou timeout a página é reduzida pela metade antes de tentar de novo;
+    quem chama pode ler variables['first'] (ou variables['ids']) para saber o
+    tamanho que funcionou. com allow_partial, erros que vêm junto de 'data'
+    (ex.: um id que não existe mais) não disparam retry.
+    """
+    endpoint = endpoint_class(API_URL, query)
     for attempt in range(8):
+        if attempt:
+            METRICS.retry(endpoint)
         try:
-            response = requests.post(API_URL, json={'query': query, 'variables': variables}, headers=HEADERS, timeout=60)
+            with METRICS.track(endpoint) as call:
+                call['response'] = requests.post(API_URL, json={'query': query, 'variables': variables}, headers=HEADERS, timeout=60)
+            response = call['response']
             if response.status_code == 200:
                 data = response.json()
-                if "errors" in data:
+                if "errors" in data and not (allow_partial and data.get('data')):
                     print(f"erro retornado pela API: {data['errors']}")
-                    time.sleep(min(60, 5 * 2**attempt))
+                    if 'timeout' in json.dumps(data['errors']).lower():
+                        shrink_page(variables)
+                    with METRICS.blocking('backoff'):
+                        time.sleep(min(60, 5 * 2**attempt))
                     continue
                 return data
             elif response.status_code == 401:
                 raise Exception("401 Unauthorized - verifique seu token.")
+            elif response.status_code in OVERLOAD_STATUS:
+                print(f"erro {response.status_code}. tentando novamente em {min(60, 5 * 2**attempt)}s...")
+                shrink_page(variables)
             else:
                 print(f"erro {response.status_code}. tentando novamente em {min(60, 5 * 2**attempt)}s...")
+        except requests.exceptions.Timeout as e:
+            print(f"timeout: {e}. tentando novamente em {min(60, 5 * 2**attempt)}s...")
+            shrink_page(variables)
         except requests.exceptions.RequestException as e:
             print(f"erro de conexão: {e}. tentando novamente em {min(60, 5 * 2**attempt)}s...")
-        time.sleep(min(60, 5 * 2**attempt))
+        with METRICS.blocking('backoff'):
+            time.sleep(min(60, 5 * 2**attempt))
     raise Exception("falha após várias tentativas.")
 
-def load_existing_data():
-    """carrega dados existentes de CSV ou JSON para continuar."""
-    if os.path.exists(CSV_FILE):
-        print(f"{CSV_FILE} existe. Continuando de onde parou...")
-        df_existing = pd.read_csv(CSV_FILE)
-        return df_existing.to_dict('records')
-    elif os.path.exists(JSON_FILE):
-        print(f"{JSON_FILE} existe. Continuando de onde parou...")
-        with open(JSON_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return []
+def grow_page(page_size, had_failure):
+    """aumenta a página enquanto as respostas vêm saudáveis.
+
+    dobra até a primeira falha; depois disso cresce de BATCH_SIZE em BATCH_SIZE
+    para não voltar logo ao tamanho que derrubou a API.
+    """
+    step = BATCH_SIZE if had_failure else page_size
+    return min(MAX_BATCH_SIZE, page_size + step)
+
+def pace_from_rate_limit(rate_limit):
+    """calcula a pausa até a próxima query distribuindo os pontos restantes até o resetAt."""
+    if not rate_limit:
+        return 0
+    cost = max(1, rate_limit['cost'])
+    remaining = rate_limit['remaining']
+    reset_at = datetime.fromisoformat(rate_limit['resetAt'].replace('Z', '+00:00'))
+    seconds_to_reset = max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+
+    if remaining < cost:
+        # cota esgotada: espera a janela renovar
+        return seconds_to_reset + 1
+    return seconds_to_reset / (remaining // cost)
+
+def load_journal():
+    """relê o journal e devolve (repositórios já listados, plano de partições,
+    progresso por partição, nós enriquecidos por grupo de campos)."""
+    all_repos_data, plan, progress, enriched = [], None, {}, {}
+    if not os.path.exists(JOURNAL_FILE):
+        return all_repos_data, plan, progress, enriched
+
+    print(f"{JOURNAL_FILE} existe (execução anterior interrompida). Continuando de onde parou...")
+    with open(JOURNAL_FILE, 'rb+') as f:
+        valid_end = 0
+        for line in f:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("linha sem quebra final")
+                entry = json.loads(line)
+            except ValueError:
+                # linha truncada por uma interrupção: o lote não foi confirmado. o arquivo é
+                # cortado no fim da última linha válida para que os próximos lotes não fiquem
+                # depois do lixo (e sejam ignorados na retomada seguinte)
+                print("linha incompleta no journal descartada.")
+                f.truncate(valid_end)
+                break
+            valid_end += len(line)
+            if 'plan' in entry:
+                plan = [tuple(partition) for partition in entry['plan']]
+                continue
+            if 'enrich' in entry:
+                enriched.setdefault(entry['enrich'], {}).update(entry['nodes'])
+                continue
+            all_repos_data.extend(entry['repos'])
+            progress[entry['partition']] = (entry['cursor'], entry['hasNextPage'])
+    return all_repos_data, plan, progress, enriched
+
+def write_journal(entry):
+    """acrescenta uma entrada ao journal e garante que ela chegou ao disco."""
+    with open(JOURNAL_FILE, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+def rotate_journal():
+    """arquiva o journal de uma execução concluída como <journal>.concluido, para que a
+    próxima execução comece do zero em vez de reaproveitar cursores e linhas antigas."""
+    if os.path.exists(JOURNAL_FILE):
+        os.replace(JOURNAL_FILE, JOURNAL_FILE + ".concluido")
+        print(f"journal arquivado em '{JOURNAL_FILE}.concluido'; a próxima execução minera do zero.")
+
+def append_journal(partition, repos, cursor, has_next_page):
+    """grava um lote no journal junto com o endCursor da partição que o confirma."""
+    write_journal({'partition': partition, 'cursor': cursor, 'hasNextPage': has_next_page, 'repos': repos})
+
+def partition_query(low, high):
+    """query de busca restrita a uma faixa fechada de estrelas."""
+    return f"stars:{low}..{high} sort:stars-desc"
+
+def count_repositories(query):
+    """devolve (repositoryCount, estrelas do primeiro resultado) respeitando a cota."""
+    result = run_query(COUNT_QUERY, {"query": query})
+    with METRICS.blocking('quota:graphql'):
+        time.sleep(pace_from_rate_limit(result['data'].get('rateLimit')))
+    search = result['data']['search']
+    top = search['nodes'][0]['stargazers']['totalCount'] if search['nodes'] else None
+    return search['repositoryCount'], top
+
+def plan_partitions(total_repos):
+    """divide o espaço de estrelas em faixas disjuntas stars:a..b com menos de SEARCH_CAP resultados cada.
+
+    as faixas são planejadas do topo para baixo até cobrir total_repos. como a
+    densidade de repositórios só aumenta quando as estrelas diminuem, a largura
+    da faixa anterior serve de limite para a busca binária da próxima.
+    """
+    _, high = count_repositories(f"stars:>={MIN_STARS} sort:stars-desc")
+    if high is None:
+        return []
+
+    partitions, planned, width = [], 0, high - MIN_STARS
+    while planned < total_repos and high >= MIN_STARS:
+        # menor "low" tal que stars:low..high caiba em SEARCH_CAP
+        lo_bound, hi_bound = max(MIN_STARS, high - width), high
+        best_low, best_count = high, None
+        while lo_bound <= hi_bound:
+            middle = (lo_bound + hi_bound) // 2
+            count, _ = count_repositories(partition_query(middle, high))
+            if count <= SEARCH_CAP:
+                best_low, best_count = middle, count
+                hi_bound = middle - 1
+            else:
+                lo_bound = middle + 1
+
+        if best_count is None:
+            # um único valor de estrelas já passa do limite: colhe só os primeiros SEARCH_CAP
+            best_count, _ = count_repositories(partition_query(high, high))
+            print(f"aviso: stars:{high} tem {best_count} repositórios, apenas {SEARCH_CAP} serão coletados.")
+            best_count = min(best_count, SEARCH_CAP)
+
+        partitions.append((best_low, high, best_count))
+        planned += best_count
+        width = max(0, high - best_low)
+        print(f"partição stars:{best_low}..{high} planejada ({best_count} repositórios, {planned} no total).")
+        high = best_low - 1
+
+    return partitions
+
+class RateBudget:
+    """orçamento de cota compartilhado pelos workers: espaça as queries de todos
+    segundo o último rateLimit recebido."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.interval = 0.0
+        self.next_slot = 0.0
+
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        with METRICS.blocking('quota:graphql'):
+            await asyncio.sleep(slot - now)
+
+    def update(self, rate_limit):
+        self.interval = pace_from_rate_limit(rate_limit)
 
 def save_data(all_repos_data):
-    """salva CSV e JSON incrementalmente no mesmo arquivo."""
-    # atualiza CSV completo
-    pd.DataFrame(all_repos_data).to_csv(CSV_FILE, index=False)
-    
-    # salva JSON completo
+    """exporta CSV, JSON e o Parquet tipado uma única vez, ao final da mineração."""
+    df = pd.DataFrame(all_repos_data)
+    df.to_csv(CSV_FILE, index=False)
+    write_parquet(df)
+
     with open(JSON_FILE, 'w', encoding='utf-8') as f:
         json.dump(all_repos_data, f, ensure_ascii=False, indent=2)
 
-def mine_repositories():
-    all_repos_data = load_existing_data()
-    cursor = None
+def parse_listing(repo):
+    """converte um nó da listagem (primeira fase) em id, nome, estrelas e pushedAt."""
+    return {
+        'id': repo['id'],
+        'name': repo['nameWithOwner'],
+        'stars': repo['stargazers']['totalCount'],
+        'pushedAt': repo['pushedAt'],
+    }
+
+def parse_repository(listing, repo):
+    """junta a listagem com os campos enriquecidos na linha do dataset."""
+    primary_language_name = repo['primaryLanguage']['name'] if repo['primaryLanguage'] else 'N/A'
+    return {
+        'name': listing['name'],
+        'stars': listing['stars'],
+        'createdAt': repo['createdAt'],
+        'pushedAt': listing['pushedAt'],
+        'primaryLanguage': primary_language_name,
+        'totalReleases': repo['releases']['totalCount'],
+        'acceptedPullRequests': repo['pullRequests']['totalCount'],
+        'totalIssues': repo['issues']['totalCount'],
+        'closedIssues': repo['closedIssues']['totalCount'],
+    }
+
+async def harvest_partition(partition, state, budget):
+    """percorre todas as páginas de uma partição, gravando cada lote no journal."""
+    low, high, _ = partition
+    key = partition_query(low, high)
+    cursor, has_next_page = state
+    page_size, had_failure = BATCH_SIZE, False
+    collected = 0
 
-    print(f"iniciando mineração...\n")
+    while has_next_page:
+        await budget.wait()
+        requested = page_size
+        variables = {"query": key, "cursor": cursor, "first": requested}
+        result = await asyncio.to_thread(run_query, GRAPHQL_QUERY, variables)
+        budget.update(result['data'].get('rateLimit'))
+        if variables['first'] < requested:
+            page_size, had_failure = variables['first'], True
+        else:
+            page_size = grow_page(page_size, had_failure)
 
-    while len(all_repos_data) < TOTAL_REPOS:
-        variables = {"cursor": cursor}
-        result = run_query(GRAPHQL_QUERY, variables)
         data = result['data']['search']
-        repos = data['nodes']
-
-        if not repos:
-            print("nenhum repositório retornado, saindo...")
-            break
-
-        for repo in repos:
-            primary_language_name = repo['primaryLanguage']['name'] if repo['primaryLanguage'] else 'N/A'
-            repo_data = {
-                'name': repo['nameWithOwner'],
-                'stars': repo['stargazers']['totalCount'],
-                'createdAt': repo['createdAt'],
-                'pushedAt': repo['pushedAt'],
-                'primaryLanguage': primary_language_name,
-                'totalReleases': repo['releases']['totalCount'],
-                'acceptedPullRequests': repo['pullRequests']['totalCount'],
-                'totalIssues': repo['issues']['totalCount'],
-                'closedIssues': repo['closedIssues']['totalCount'],
-            }
-            all_repos_data.append(repo_data)
-
-        # limita a quantidade total
-        if len(all_repos_data) > TOTAL_REPOS:
-            all_repos_data = all_repos_data[:TOTAL_REPOS]
-
-        # salva CSV + JSON incremental
-        save_data(all_repos_data)
-        print(f"coletados {len(all_repos_data)}/{TOTAL_REPOS} repositórios...\n")
-
-        page_info = data['pageInfo']
-        if not page_info['hasNextPage']:
-            print("não há mais páginas para buscar.")
-            break
-
-        cursor = page_info['endCursor']
-        time.sleep(2)  # pausa leve para não sobrecarregar a API
+        batch = [parse_listing(repo) for repo in data['nodes'] if repo]
+        cursor = data['pageInfo']['endCursor']
+        has_next_page = data['pageInfo']['hasNextPage'] and bool(batch)
+
+        # confirma o lote no journal (append-only) junto com o cursor
+        append_journal(key, batch, cursor, has_next_page)
+        collected += len(batch)
+
+    print(f"partição {key} concluída ({collected} repositórios nesta execução).")
+
+async def harvest_all(plan, progress):
+    """distribui as partições pendentes entre NUM_WORKERS workers com cota compartilhada."""
+    budget = RateBudget()
+    queue = asyncio.Queue()
+    for partition in plan:
+        state = progress.get(partition_query(partition[0], partition[1]), (None, True))
+        if state[1]:
+            queue.put_nowait((partition, state))
+
+    async def worker():
+        while True:
+            try:
+                partition, state = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await harvest_partition(partition, state, budget)
+
+    await asyncio.gather(*(worker() for _ in range(NUM_WORKERS)))
+
+async def enrich_all(repos, enriched):
+    """segunda fase: busca os campos caros de cada grupo via nodes(ids:) em paralelo.
+
+    lotes que falham são desmontados e cada id volta sozinho para a fila, sem
+    repetir a busca; ids que falham sozinhos ficam para a próxima execução.
+    """
+    budget = RateBudget()
+    queue = asyncio.Queue()
+    failed = set()
+    for group, config in ENRICHMENT_GROUPS.items():
+        done = enriched.setdefault(group, {})
+        pending = [repo['id'] for repo in repos if repo['id'] not in done]
+        size = config['batch_size']
+        for start in range(0, len(pending), size):
+            queue.put_nowait((group, pending[start:start + size]))
+
+    async def process(group, ids):
+        query = ENRICH_QUERY % ENRICHMENT_GROUPS[group]['fields']
+        variables = {"ids": ids}
+        await budget.wait()
+        try:
+            result = await asyncio.to_thread(run_query, query, variables, True)
+        except Exception as e:
+            print(f"falha ao enriquecer {len(ids)} ids ({group}): {e}")
+            if len(ids) > 1:
+                for node_id in ids:
+                    queue.put_nowait((group, [node_id]))
+            else:
+                failed.add(ids[0])
+            return
+        budget.update(result['data'].get('rateLimit'))
+
+        sent = variables['ids']
+        if len(sent) < len(ids):
+            # o lote foi reduzido por sobrecarga: o restante volta para a fila
+            queue.put_nowait((group, ids[len(sent):]))
+
+        nodes = {}
+        for node_id, node in zip(sent, result['data']['nodes']):
+            if node:
+                nodes[node_id] = node
+            elif len(sent) > 1:
+                queue.put_nowait((group, [node_id]))
+            else:
+                failed.add(node_id)
+        if nodes:
+            write_journal({'enrich': group, 'nodes': nodes})
+            enriched[group].update(nodes)
+
+    async def worker():
+        while True:
+            group, ids = await queue.get()
+            try:
+                await process(group, ids)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(NUM_WORKERS)]
+    await queue.join()
+    for task in workers:
+        task.cancel()
+
+    if failed:
+        print(f"aviso: {len(failed)} repositórios não puderam ser enriquecidos; rode de novo para tentar outra vez.")
+
+def merge_repositories(all_repos_data):
+    """junta as partições, remove duplicados por nameWithOwner e mantém os TOTAL_REPOS com mais estrelas."""
+    unique = {}
+    for repo in all_repos_data:
+        unique.setdefault(repo['name'], repo)
+    merged = sorted(unique.values(), key=lambda repo: repo['stars'], reverse=True)
+    return merged[:TOTAL_REPOS]
+
+def list_repositories():
+    """primeira fase: planeja (ou retoma) as partições e devolve a listagem deduplicada."""
+    _, plan, progress, _ = load_journal()
+
+    if plan is None:
+        print("planejando partições por faixa de estrelas...\n")
+        plan = plan_partitions(TOTAL_REPOS)
+        write_journal({'plan': plan})
+
+    print(f"iniciando listagem de {len(plan)} partições com {NUM_WORKERS} workers...\n")
+    asyncio.run(harvest_all(plan, progress))
+
+    # relê o journal: é a única fonte de verdade sobre o que foi confirmado
+    listing, _, _, enriched = load_journal()
+    return merge_repositories(listing), enriched
+
+def enrich_repositories(listing, enriched):
+    """segunda fase: enriquece a listagem e devolve as linhas completas do dataset."""
+    print(f"\nenriquecendo {len(listing)} repositórios via nodes(ids:)...\n")
+    asyncio.run(enrich_all(listing, enriched))
+
+    all_repos_data = []
+    for repo in listing:
+        if all(repo['id'] in enriched[group] for group in ENRICHMENT_GROUPS):
+            node = {}
+            for group in ENRICHMENT_GROUPS:
+                node.update(enriched[group][repo['id']])
+            all_repos_data.append(parse_repository(repo, node))
+    return all_repos_data
+
+def mine_repositories():
+    listing, enriched = list_repositories()
+    all_repos_data = enrich_repositories(listing, enriched)
+
+    # exporta CSV + JSON uma única vez
+    save_data(all_repos_data)
+    rotate_journal()
 
     print("mineração concluída!")
     print(f"arquivos finais salvos em '{CSV_FILE}' e '{JSON_FILE}'")
     return pd.DataFrame(all_repos_data)
 
+def build_delta(previous, current, stale=()):
+    """compara dois snapshots por nome e devolve as linhas adicionadas, atualizadas e removidas.
+
+    nomes em `stale` tiveram push mas não puderam ser re-enriquecidos: saem como 'stale'
+    (linha anterior mantida), não como atualizados ou removidos."""
+    delta = []
+    for name, repo in current.items():
+        if name in stale:
+            delta.append({**repo, 'change': 'stale'})
+        elif name not in previous:
+            delta.append({**repo, 'change': 'added'})
+        elif repo != previous[name]:
+            delta.append({**repo, 'change': 'updated'})
+    for name, repo in previous.items():
+        if name not in current:
+            delta.append({**repo, 'change': 'removed'})
+    return delta
+
+def refresh_repositories():
+    """atualiza o snapshot anterior re-enriquecendo só quem teve push desde então.
+
+    a listagem é refeita (é barata) num journal próprio do dia; repositórios cujo
+    pushedAt não mudou reaproveitam as métricas do snapshot anterior e só têm as
+    estrelas atualizadas. quem teve push mas falhou no enriquecimento também mantém a
+    linha anterior (com o pushedAt antigo, para ser tentado de novo no próximo refresh)
+    e aparece no delta como 'stale'. grava um snapshot versionado e o delta em SNAPSHOT_DIR.
+    """
+    global JOURNAL_FILE
+
+    if not os.path.exists(CSV_FILE):
+        print(f"{CSV_FILE} não existe: fazendo a mineração completa.")
+        return mine_repositories()
+
+    previous_df = pd.read_csv(CSV_FILE, keep_default_na=False)  # mantém o 'N/A' de primaryLanguage
+    previous = {repo['name']: repo for repo in previous_df.to_dict('records')}
+    print(f"snapshot anterior com {len(previous)} repositórios carregado de '{CSV_FILE}'.")
+
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%d')
+    JOURNAL_FILE = f"laboratorio-01_refresh_{stamp}.jsonl"
+    listing, enriched = list_repositories()
+
+    unchanged, changed = [], []
+    for repo in listing:
+        old = previous.get(repo['name'])
+        if old is not None and old['pushedAt'] == repo['pushedAt']:
+            unchanged.append({**old, 'stars': repo['stars']})
+        else:
+            changed.append(repo)
+    print(f"{len(unchanged)} repositórios sem push desde o último snapshot, {len(changed)} para re-enriquecer.")
+
+    refreshed = enrich_repositories(changed, enriched)
+    refreshed_names = {repo['name'] for repo in refreshed}
+    stale = [{**previous[repo['name']], 'stars': repo['stars']} for repo in changed
+             if repo['name'] not in refreshed_names and repo['name'] in previous]
+    if stale:
+        print(f"aviso: {len(stale)} repositórios com push novo mantêm as métricas do snapshot anterior (enriquecimento falhou).")
+
+    all_repos_data = unchanged + stale + refreshed
+    all_repos_data.sort(key=lambda repo: repo['stars'], reverse=True)
+    current = {repo['name']: repo for repo in all_repos_data}
+    delta = build_delta(previous, current, {repo['name'] for repo in stale})
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    snapshot_path = os.path.join(SNAPSHOT_DIR, f"top_repos_{stamp}.csv")
+    delta_path = os.path.join(SNAPSHOT_DIR, f"top_repos_{stamp}_delta.csv")
+    pd.DataFrame(all_repos_data).to_csv(snapshot_path, index=False)
+    pd.DataFrame(delta).to_csv(delta_path, index=False)
+    save_data(all_repos_data)
+    rotate_journal()
+
+    print("atualização concluída!")
+    print(f"snapshot salvo em '{snapshot_path}', delta ({len(delta)} linhas) em '{delta_path}'")
+    return pd.DataFrame(all_repos_data)
+
 if __name__ == "__main__":
-    df = mine_repositories()
+    parser = argparse.ArgumentParser(description="minera os repositórios mais populares do GitHub.")
+    parser.add_argument('--refresh', action='store_true',
+                        help="atualiza o snapshot atual re-enriquecendo só os repositórios com push novo")
+    args = parser.parse_args()
+
+    try:
+        df = refresh_repositories() if args.refresh else mine_repositories()
+    finally:
+        METRICS.write(METRICS_PREFIX, prometheus=METRICS_PROMETHEUS)
     print(df.head())
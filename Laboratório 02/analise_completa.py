@@ -4,35 +4,72 @@ import subprocess
 import pandas as pd
 import shutil
 import time
+import queue
+import sqlite3
+import threading
+from collections import deque
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 import stat 
+import sys
+from mirror_cache import MirrorCache
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "comum"))
+from sketches import KLLSketch
+from http_cache import HTTPCache
+from token_pool import TokenPool, load_tokens
+from request_metrics import RequestMetrics, endpoint_class
+try:
+    from ck_store import ingest_ck_outputs
+except ImportError:  # pyarrow é opcional: sem ele a saída bruta do CK não é guardada
+    ingest_ck_outputs = None
 
 # Bibliotecas para a análise
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy.stats import spearmanr
+from correlacao import RQ_METRICS, rq_correlations
 
 # --- FUNÇÕES AUXILIARES ---
 
 def find_best_java_source_directory(root_path):
-    """Tenta encontrar o melhor diretório de código-fonte Java em um projeto."""
+    """Tenta encontrar o melhor diretório de código-fonte Java em um projeto.
+
+    Faz uma única passada com os.scandir (ignorando diretórios ocultos como .git),
+    contando os .java de cada diretório e de cada subárvore. Prefere o `src/main/java`
+    com mais arquivos; se não houver, usa o diretório com mais arquivos .java.
+    """
     print(f"Buscando código-fonte em '{root_path}'...")
     standard_path_suffix = os.path.join("src", "main", "java")
-    for dirpath, _, _ in os.walk(root_path):
-        if dirpath.endswith(standard_path_suffix):
-            print(f"Diretório padrão encontrado: '{dirpath}'")
-            return dirpath, -1
-
+    standard_dirs = []
     best_path, max_java_files = root_path, 0
-    for dirpath, _, filenames in os.walk(root_path):
-        if os.path.sep + '.' in dirpath: continue
-        
-        java_files_count = sum(1 for f in filenames if f.endswith('.java'))
-        if java_files_count > max_java_files:
-            max_java_files = java_files_count
-            best_path = dirpath
-            
+
+    def scan(path):
+        nonlocal best_path, max_java_files
+        direct_count, subtree_count = 0, 0
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            return 0
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith('.'):
+                    subtree_count += scan(entry.path)
+            elif entry.name.endswith('.java'):
+                direct_count += 1
+
+        if direct_count > max_java_files:
+            best_path, max_java_files = path, direct_count
+        subtree_count += direct_count
+        if path.endswith(standard_path_suffix) and subtree_count > 0:
+            standard_dirs.append((subtree_count, path))
+        return subtree_count
+
+    scan(root_path)
+
+    if standard_dirs:
+        java_files_count, standard_path = max(standard_dirs)
+        print(f"Diretório padrão encontrado: '{standard_path}' ({java_files_count} arquivos).")
+        return standard_path, java_files_count
+
     if max_java_files > 0:
         print(f"Diretório com mais arquivos Java: '{best_path}' ({max_java_files} arquivos).")
     else:
@@ -45,147 +82,628 @@ def remove_readonly(func, path, exc_info):
     os.chmod(path, stat.S_IWRITE)
     func(path)
 
+# --- METADADOS VIA GRAPHQL ---
+
+GRAPHQL_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/") + "/graphql"
+
+METADATA_QUERY = """
+query JavaRepositories($cursor: String, $first: Int!) {
+  search(query: "language:java sort:stars-desc", type: REPOSITORY, first: $first, after: $cursor) {
+    pageInfo {
+      endCursor
+      hasNextPage
+    }
+    nodes {
+      ... on Repository {
+        name
+        nameWithOwner
+        url
+        stargazerCount
+        createdAt
+        diskUsage
+        releases { totalCount }
+        defaultBranchRef { target { oid } }
+      }
+    }
+  }
+}
+"""
+
+def run_graphql(query, variables, tokens, max_attempts=6, cache=None, ttl=0, metrics=None):
+    """Executa uma query GraphQL com retry; em 502/503/504 reduz a página pela metade.
+
+    Cada tentativa usa o token do pool (`tokens`) com mais cota de GraphQL; um token
+    esgotado é trocado na hora, sem esperar o reset.
+    Com `cache` (HTTPCache), uma resposta guardada há menos de `ttl` segundos é reaproveitada.
+    Com `metrics` (RequestMetrics), cada tentativa e cada espera ficam registradas.
+    """
+    metrics = metrics or RequestMetrics()
+    endpoint = endpoint_class(GRAPHQL_URL, query)
+    attempt = 0
+    while attempt < max_attempts:
+        wait = min(60, 5 * 2**attempt)
+        with metrics.blocking("quota:graphql"):
+            token = tokens.acquire("graphql")
+        response = None
+        try:
+            payload = {"query": query, "variables": variables}
+            with metrics.track(endpoint) as call:
+                if cache:
+                    call["response"] = cache.request(requests, "POST", GRAPHQL_URL, ttl, headers=tokens.headers(token), json=payload, scope=tokens.scope, timeout=60)
+                else:
+                    call["response"] = requests.post(GRAPHQL_URL, json=payload, headers=tokens.headers(token), timeout=60)
+            response = call["response"]
+        except requests.exceptions.RequestException as e:
+            print(f"Erro de conexão: {e}. Nova tentativa em {wait}s...")
+        finally:
+            # resposta lida do cache ou erro de conexão: a reserva do token é devolvida
+            fresh = response is None or getattr(response, "from_cache", None) == "fresh"
+            tokens.release(token, "graphql", None if fresh else response.headers)
+
+        if response is not None:
+            if response.status_code in (403, 429) and response.headers.get("X-RateLimit-Remaining") == "0" and "Retry-After" not in response.headers:
+                print("Cota de GraphQL esgotada em um dos tokens; tentando com outro.")
+                metrics.retry(endpoint)
+                continue
+            if response.status_code == 200:
+                body = response.json()
+                if "errors" not in body:
+                    return body["data"]
+                print(f"Erro retornado pela API GraphQL: {body['errors']}. Nova tentativa em {wait}s...")
+            elif response.status_code in (502, 503, 504) and "first" in variables:
+                variables["first"] = max(1, variables["first"] // 2)
+                print(f"Erro {response.status_code}. Página reduzida para {variables['first']}; nova tentativa em {wait}s...")
+            else:
+                print(f"Erro {response.status_code} na API GraphQL. Nova tentativa em {wait}s...")
+        metrics.retry(endpoint)
+        with metrics.blocking("backoff"):
+            time.sleep(wait)
+        attempt += 1
+    raise Exception("Falha na consulta GraphQL após várias tentativas.")
+
+def fetch_repository_metadata(tokens, total, page_size=100, cache=None, ttl=0, metrics=None):
+    """Gera estrelas, createdAt, nº de releases e SHA do HEAD de até `page_size` repositórios por query.
+
+    Substitui a busca REST paginada e as chamadas de releases feitas repositório a repositório.
+    """
+    cursor, fetched = None, 0
+    while fetched < total:
+        variables = {"cursor": cursor, "first": min(page_size, total - fetched)}
+        search = run_graphql(METADATA_QUERY, variables, tokens, cache=cache, ttl=ttl, metrics=metrics)["search"]
+        for node in search["nodes"]:
+            if node and fetched < total:
+                fetched += 1
+                yield node
+        print(f"Metadados de {fetched}/{total} repositórios obtidos.")
+        if not search["pageInfo"]["hasNextPage"]:
+            break
+        cursor = search["pageInfo"]["endCursor"]
+
+def prefetch(iterable):
+    """Consome `iterable` numa thread própria, sempre à frente de quem lê os itens."""
+    buffer = queue.Queue()
+    done = object()
+
+    def fill():
+        try:
+            for item in iterable:
+                buffer.put(item)
+        except Exception as e:
+            print(f"Erro fatal ao acessar a API do GitHub: {e}")
+        finally:
+            buffer.put(done)
+
+    threading.Thread(target=fill, daemon=True).start()
+    while (item := buffer.get()) is not done:
+        yield item
+
+# --- ESCALONAMENTO POR DISCO E MEMÓRIA ---
+
+def estimate_footprint(disk_usage_kb, sparse, limits):
+    """Estima disco (bytes), heap do CK (MB) e prazos (s) de um job a partir do `diskUsage` da API.
+
+    O `diskUsage` é o tamanho do repositório empacotado no GitHub; o checkout descompactado
+    ocupa um múltiplo disso (menor no clone esparso, que traz só os .java).
+    """
+    size_mb = (disk_usage_kb if disk_usage_kb is not None else limits["default_size_kb"]) / 1024
+    disk_factor = limits["sparse_disk_factor"] if sparse else limits["full_disk_factor"]
+    return {
+        "disk": int(size_mb * disk_factor * 2**20) + limits["ck_output_bytes"],
+        "heap_mb": int(min(limits["max_heap_mb"], limits["min_heap_mb"] + size_mb * limits["heap_mb_per_mb"])),
+        "clone_deadline": min(limits["max_deadline"], limits["base_deadline"] + size_mb * limits["clone_seconds_per_mb"]),
+        "ck_deadline": min(limits["max_deadline"], limits["base_deadline"] + size_mb * limits["ck_seconds_per_mb"]),
+    }
+
+class ResourceScheduler:
+    """Admite jobs na ordem de chegada enquanto a soma das estimativas cabe nos orçamentos.
+
+    Cada recurso ('disk' em bytes, 'heap_mb' em MB) tem o seu orçamento. Um job maior que
+    o orçamento inteiro não é recusado: ele espera o recurso esvaziar e roda sozinho.
+    """
+
+    def __init__(self, budgets):
+        self.budgets = budgets
+        self.in_use = {resource: 0 for resource in budgets}
+        self.waiting = {resource: deque() for resource in budgets}
+        self.cond = threading.Condition()
+
+    def _fits(self, resource, amount):
+        return self.in_use[resource] == 0 or self.in_use[resource] + amount <= self.budgets[resource]
+
+    def acquire(self, resource, amount):
+        ticket = object()
+        with self.cond:
+            self.waiting[resource].append(ticket)
+            # fila FIFO: jobs pequenos não passam à frente de um grande indefinidamente
+            self.cond.wait_for(lambda: self.waiting[resource][0] is ticket and self._fits(resource, amount))
+            self.waiting[resource].popleft()
+            self.in_use[resource] += amount
+            self.cond.notify_all()
+
+    def release(self, resource, amount):
+        with self.cond:
+            self.in_use[resource] -= amount
+            self.cond.notify_all()
+
+# --- CACHE DE RESULTADOS POR COMMIT ---
+
+CK_METRIC_COLUMNS = ["cbo_median", "dit_median", "lcom_median", "loc_total"]
+
+# Colunas de identificação das saídas do CK; todas as demais colunas numéricas viram sketches
+CK_ID_COLUMNS = {
+    "class": {"file", "class", "type"},
+    "method": {"file", "class", "method", "constructor", "line"},
+}
+CK_CSV_CHUNK_SIZE = 50_000
+
+class ResultCache:
+    """Cache SQLite dos agregados do CK, indexado por repositório + SHA do HEAD.
+
+    Se o HEAD não mudou desde a última execução, o resultado guardado é reaproveitado
+    e o repositório não é clonado nem analisado de novo. Como cada repositório é
+    gravado assim que termina, uma execução interrompida retoma de onde parou.
+    Guarda também um sketch KLL por métrica de class.csv e method.csv, o que permite
+    consultar qualquer percentil sem manter a saída bruta do CK.
+    """
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ck_results (
+                repo TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                cbo_median REAL, dit_median REAL, lcom_median REAL, loc_total INTEGER,
+                analyzed_at TEXT NOT NULL,
+                PRIMARY KEY (repo, sha)
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ck_sketches (
+                repo TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                source TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                sketch TEXT NOT NULL,
+                PRIMARY KEY (repo, sha, source, metric)
+            )""")
+        self.conn.commit()
+
+    def get(self, repo, sha):
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(CK_METRIC_COLUMNS)} FROM ck_results WHERE repo = ? AND sha = ?", (repo, sha)
+            ).fetchone()
+        if row is None:
+            return None
+        # loc_total é contagem: volta como int mesmo de um banco em que foi gravado como REAL
+        return {col: int(value) if col == "loc_total" and value is not None else value
+                for col, value in zip(CK_METRIC_COLUMNS, row)}
+
+    def put(self, repo, sha, metrics, sketches=None):
+        values = [None if pd.isna(metrics[col]) else int(metrics[col]) if col == "loc_total" else float(metrics[col])
+                  for col in CK_METRIC_COLUMNS]
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ck_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (repo, sha, *values, datetime.now(timezone.utc).isoformat()),
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO ck_sketches VALUES (?, ?, ?, ?, ?)",
+                [(repo, sha, source, metric, sketch.to_json()) for (source, metric), sketch in (sketches or {}).items()],
+            )
+            self.conn.commit()
+
+    def load_sketch(self, source, metric, repo=None):
+        """Sketch de uma métrica do CK ('class' ou 'method'): de um repositório ou, sem `repo`,
+        de todo o corpus, fundindo o sketch do SHA mais recente de cada repositório."""
+        query = """
+            SELECT s.sketch FROM ck_sketches s
+            JOIN ck_results r ON r.repo = s.repo AND r.sha = s.sha
+            WHERE s.source = ? AND s.metric = ?
+              AND r.analyzed_at = (SELECT MAX(analyzed_at) FROM ck_results WHERE repo = r.repo)"""
+        params = [source, metric]
+        if repo is not None:
+            query += " AND s.repo = ?"
+            params.append(repo)
+        with self.lock:
+            rows = self.conn.execute(query, params).fetchall()
+
+        merged = KLLSketch()
+        for (text,) in rows:
+            merged.merge(KLLSketch.from_json(text))
+        return merged
+
+    def quantile(self, source, metric, q, repo=None):
+        """Percentil aproximado (q entre 0 e 1) de uma métrica do CK, por repositório ou do corpus."""
+        return self.load_sketch(source, metric, repo).quantile(q)
+
+    def close(self):
+        self.conn.close()
+
+def resolve_head_sha(clone_url):
+    """Descobre o SHA do HEAD remoto com `git ls-remote`, sem clonar nada."""
+    result = subprocess.run(["git", "ls-remote", clone_url, "HEAD"], check=True, capture_output=True, text=True, timeout=60)
+    return result.stdout.split()[0] if result.stdout.strip() else None
+
+# --- PIPELINE CLONE -> CK -> AGREGAÇÃO ---
+
+def clone_repository(clone_url, repo_dir, sparse, timeout=300):
+    """Clona o repositório; no modo esparso baixa só os blobs dos arquivos .java.
+
+    `--filter=blob:none --no-checkout` traz apenas commits e árvores; o sparse-checkout
+    sem cone com o padrão `*.java` faz o checkout buscar somente os .java, deixando de
+    fora binários, assets e documentação.
+    """
+    if not sparse:
+        subprocess.run(["git", "clone", "--depth", "1", clone_url, repo_dir], check=True, capture_output=True, text=True, timeout=timeout)
+        return
+
+    subprocess.run(["git", "clone", "--depth", "1", "--filter=blob:none", "--no-checkout", clone_url, repo_dir], check=True, capture_output=True, text=True, timeout=timeout)
+    subprocess.run(["git", "-C", repo_dir, "sparse-checkout", "set", "--no-cone", "*.java"], check=True, capture_output=True, text=True, timeout=60)
+    subprocess.run(["git", "-C", repo_dir, "checkout"], check=True, capture_output=True, text=True, timeout=timeout)
+
+def clone_stage(job):
+    """Clona o repositório no diretório isolado do job e localiza o código-fonte Java."""
+    repo_dir = os.path.join(job["work_dir"], "repo")
+    timeout = job["footprint"]["clone_deadline"] * job["deadline_scale"]
+    if job.get("mirrors"):
+        # worktree a partir do mirror local: só o que mudou desde a última execução vem da rede
+        job["mirror_key"] = job["mirrors"].checkout(job["full_name"], job["clone_url"], repo_dir, job["sparse"], timeout)
+    else:
+        clone_repository(job["clone_url"], repo_dir, job["sparse"], timeout)
+    job["source_path"], job["file_count"] = find_best_java_source_directory(repo_dir)
+    # Projeto sem .java: o resultado (vazio) também vale para este SHA
+    job["cacheable"] = job["file_count"] == 0
+
+def ck_stage(job, ck_jar_path):
+    """Roda o CK com cwd no diretório do job (o class.csv não colide com outros jobs) e agrega as métricas.
+
+    O heap da JVM fica limitado (-Xmx) ao que o escalonador reservou para o job.
+    """
+    footprint = job["footprint"]
+    subprocess.run(["java", f"-Xmx{footprint['heap_mb']}m", "-jar", ck_jar_path, os.path.abspath(job["source_path"])], cwd=job["work_dir"],
+                   check=True, capture_output=True, text=True, timeout=footprint["ck_deadline"] * job["deadline_scale"])
+
+    sketches, median_columns, loc_total = {}, [], 0
+    for source, id_columns in CK_ID_COLUMNS.items():
+        csv_path = os.path.join(job["work_dir"], f"{source}.csv")
+        if not os.path.exists(csv_path):
+            continue
+        # Leitura em blocos e só das colunas de métricas: o CSV nunca fica inteiro na memória
+        chunks = pd.read_csv(csv_path, usecols=lambda col: col not in id_columns, chunksize=CK_CSV_CHUNK_SIZE)
+        for chunk in chunks:
+            for metric in chunk.select_dtypes('number').columns:
+                sketches.setdefault((source, metric), KLLSketch()).update(chunk[metric].to_numpy())
+            if source == "class":
+                median_columns.append(chunk[['cbo', 'dit', 'lcom']])
+                loc_total += chunk['loc'].sum()
+
+    if median_columns:
+        class_metrics = pd.concat(median_columns)
+        if not class_metrics.empty:
+            job["metrics"].update({
+                "cbo_median": class_metrics['cbo'].median(),
+                "dit_median": class_metrics['dit'].median(),
+                "lcom_median": class_metrics['lcom'].median(),
+                "loc_total": loc_total
+            })
+            print(f"[{job['metrics']['repo_name']}] Métricas do CK calculadas ({len(sketches)} sketches).")
+    job["sketches"] = sketches
+
+    if job.get("raw_store") and ingest_ck_outputs is not None:
+        repo_dir = os.path.abspath(os.path.join(job["work_dir"], "repo"))
+        counts = ingest_ck_outputs(job["raw_store"], job["full_name"], job["work_dir"], source_root=repo_dir)
+        print(f"[{job['metrics']['repo_name']}] Saída bruta do CK guardada em Parquet: {counts}")
+    job["cacheable"] = True
+
+def cleanup_job(job):
+    """Apaga o diretório de trabalho do job (clone + saídas do CK), devolve o mirror ao cache e libera o disco reservado.
+
+    O disco e o mirror são liberados mesmo se a remoção do diretório falhar (o erro é relançado depois)."""
+    try:
+        if os.path.exists(job["work_dir"]): shutil.rmtree(job["work_dir"], onerror=remove_readonly)
+    finally:
+        if job.pop("disk_reserved", False):
+            job["scheduler"].release("disk", job["footprint"]["disk"])
+        if job.get("mirror_key"):
+            try:
+                job["mirrors"].release(job.pop("mirror_key"))
+            except Exception as e:
+                print(f"Aviso: Falha ao devolver o mirror de {job['full_name']} ao cache. Erro: {e}")
+
+def run_pipeline(jobs, final_csv_path, ck_jar_path, num_clone_workers, num_ck_workers, queue_size, cache, scheduler, max_attempts=1):
+    """Executa clone (rede) e CK (CPU) em estágios sobrepostos ligados por filas limitadas.
+
+    `jobs` pode ser um gerador: ele é consumido por uma thread produtora, então a
+    coleta de metadados também corre em paralelo com os clones. O tamanho das filas
+    limita quantos repositórios clonados ficam no disco esperando o CK.
+    Antes de clonar, o SHA do HEAD é consultado no `cache`; um acerto pula clone e CK.
+
+    O `scheduler` reserva o disco estimado do job antes do clone (até o cleanup) e o heap
+    do CK antes da JVM subir. Um job que estoura o prazo de um estágio antes de
+    `max_attempts` tentativas não vai para o CSV: ele é devolvido na lista de retardatários.
+    """
+    clone_queue = queue.Queue(maxsize=queue_size)
+    ck_queue = queue.Queue(maxsize=queue_size)
+    result_queue = queue.Queue()
+
+    def producer():
+        try:
+            for job in jobs:
+                clone_queue.put(job)
+        finally:
+            for _ in range(num_clone_workers):
+                clone_queue.put(None)
+
+    def finish(job):
+        """Limpa o job e o entrega à agregação; um erro na limpeza é registrado e não derruba a thread."""
+        try:
+            cleanup_job(job)
+        except Exception as e:
+            print(f"ERRO: Falha ao limpar o diretório de {job['metrics']['repo_name']}. Erro: {e}")
+        finally:
+            result_queue.put(job)
+
+    def clone_worker():
+        while (job := clone_queue.get()) is not None:
+            handed_off = False
+            try:
+                if not job.get("head_sha"):
+                    job["head_sha"] = resolve_head_sha(job["clone_url"])
+                cached = cache.get(job["full_name"], job["head_sha"]) if job["head_sha"] else None
+                if cached is not None:
+                    # o diretório de trabalho foi criado ao enfileirar e não vai ser usado
+                    job["metrics"].update(cached)
+                    job["from_cache"] = True
+                    print(f"[{job['metrics']['repo_name']}] HEAD {job['head_sha'][:7]} já analisado, usando cache.")
+                else:
+                    scheduler.acquire("disk", job["footprint"]["disk"])
+                    job["disk_reserved"] = True
+                    clone_stage(job)
+                    if job["file_count"] != 0:
+                        ck_queue.put(job)
+                        handed_off = True
+            except subprocess.TimeoutExpired:
+                mark_straggler(job, "clone")
+            except Exception as e:
+                print(f"ERRO: Falha ao clonar {job['metrics']['repo_name']}. Erro: {e}")
+            finally:
+                if not handed_off:
+                    finish(job)
+
+    def ck_worker():
+        while (job := ck_queue.get()) is not None:
+            scheduler.acquire("heap_mb", job["footprint"]["heap_mb"])
+            try:
+                ck_stage(job, ck_jar_path)
+            except subprocess.TimeoutExpired:
+                mark_straggler(job, "CK")
+            except Exception as e:
+                print(f"ERRO: Falha no CK de {job['metrics']['repo_name']}. Erro: {e}")
+            finally:
+                scheduler.release("heap_mb", job["footprint"]["heap_mb"])
+                finish(job)
+
+    def mark_straggler(job, stage):
+        if job["attempt"] < max_attempts:
+            job["straggler"] = True
+            print(f"AVISO: {job['metrics']['repo_name']} estourou o prazo do {stage}; adiado para o fim da execução.")
+        else:
+            print(f"ERRO: {job['metrics']['repo_name']} estourou o prazo do {stage} em todas as tentativas.")
+
+    def start(target, count):
+        threads = [threading.Thread(target=target, daemon=True) for _ in range(count)]
+        for thread in threads: thread.start()
+        return threads
+
+    def close_after(threads, next_queue, sentinels):
+        """Quando todas as threads de um estágio terminam, fecha o estágio seguinte."""
+        for thread in threads: thread.join()
+        for _ in range(sentinels): next_queue.put(None)
+
+    start(producer, 1)
+    clone_threads = start(clone_worker, num_clone_workers)
+    ck_threads = start(ck_worker, num_ck_workers)
+    threading.Thread(target=close_after, args=(clone_threads, ck_queue, num_ck_workers), daemon=True).start()
+    threading.Thread(target=close_after, args=(ck_threads, result_queue, 1), daemon=True).start()
+
+    # Estágio de agregação: só a thread principal escreve no CSV final
+    processed, stragglers = 0, []
+    while (job := result_queue.get()) is not None:
+        if job.pop("straggler", False):
+            stragglers.append(job)
+            continue
+        processed += 1
+        if job.get("cacheable") and job.get("head_sha") and not job.get("from_cache"):
+            cache.put(job["full_name"], job["head_sha"], job["metrics"], job.get("sketches"))
+        df_to_append = pd.DataFrame([job["metrics"]])
+        file_exists = os.path.exists(final_csv_path)
+        df_to_append.to_csv(final_csv_path, mode='a', header=not file_exists, index=False)
+        print(f"--- [{processed}] {job['metrics']['repo_name']} salvo em {final_csv_path} ---")
+    return stragglers
+
 # --- FUNÇÃO DE ANÁLISE E VISUALIZAÇÃO ---
 
-def perform_analysis_and_visualization(final_df):
-    """Realiza a análise final e gera todos os gráficos para o relatório."""
+def plot_relationships(final_df, correlations):
+    """Gera um gráfico de dispersão com regressão por par RQ × métrica de qualidade.
+
+    Só desenha: rho, p-valor e IC vêm da tabela `correlations` (estrato 'todos').
+    """
+    if not os.path.exists("graficos"):
+        os.makedirs("graficos")
+
+    for row in correlations[correlations["stratum"] == "todos"].itertuples():
+        rq_data = RQ_METRICS[row.rq]
+        analysis_df = final_df[[row.x, row.y]].dropna()
+        plt.figure(figsize=(10, 6))
+        sns.regplot(data=analysis_df, x=row.x, y=row.y, line_kws={"color": "red"})
+        plt.title(f'{row.rq}: {rq_data["label"]} vs. {row.y.replace("_", " ").upper()}\n'
+                  f'ρ = {row.rho:.3f} (IC 95%: {row.ci_low:.3f} a {row.ci_high:.3f}; p = {row.p_value:.3f})')
+        plt.xlabel(rq_data["label"])
+        plt.ylabel(row.y.replace("_", " ").upper())
+        plt.grid(True)
+
+        filename = f"graficos/{row.rq}_{row.y}.png"
+        plt.savefig(filename)
+        plt.close()
+        print(f"Gráfico salvo em: {filename}")
+
+def perform_analysis_and_visualization(final_df, n_boot=2000, stratify_by=None):
+    """Realiza a análise final e gera todos os gráficos para o relatório.
+
+    A matriz de Spearman e os ICs por bootstrap são calculados de uma vez (correlacao.py);
+    a tabela fica em graficos/correlacoes_spearman.csv e os gráficos só a consultam.
+    """
     print("\n--- INICIANDO ANÁLISE E GERAÇÃO DE GRÁFICOS ---")
     if not os.path.exists("graficos"):
         os.makedirs("graficos")
 
-    rq_map = {
-        "RQ01_Popularidade": {"metric": "stars", "label": "Popularidade (Estrelas)"},
-        "RQ02_Maturidade": {"metric": "age_years", "label": "Maturidade (Anos)"},
-        "RQ03_Atividade": {"metric": "releases_count", "label": "Atividade (Nº de Releases)"},
-        "RQ04_Tamanho": {"metric": "loc_total", "label": "Tamanho (LOC Total)"}
-    }
-    
-    quality_metrics = ["cbo_median", "dit_median", "lcom_median"]
-
-    for rq_name, rq_data in rq_map.items():
-        for quality_metric in quality_metrics:
-            print(f"\nAnalisando: {rq_name} vs. {quality_metric}")
-            analysis_df = final_df[[rq_data["metric"], quality_metric]].dropna()
-            
-            if len(analysis_df) < 2:
-                print("Dados insuficientes para análise.")
-                continue
+    correlations = rq_correlations(final_df, n_boot, stratify_by=stratify_by)
+    if correlations.empty:
+        print("Dados insuficientes para análise.")
+        return
+    for row in correlations.itertuples():
+        print(f"[{row.stratum}] {row.rq} vs. {row.y}: Spearman {row.rho:.3f} "
+              f"(IC 95%: {row.ci_low:.3f} a {row.ci_high:.3f}; p-valor: {row.p_value:.3f}; n = {row.n})")
+    correlations.to_csv("graficos/correlacoes_spearman.csv", index=False)
 
-            corr, p_value = spearmanr(analysis_df[rq_data["metric"]], analysis_df[quality_metric])
-            print(f"Correlação de Spearman: {corr:.3f} (p-valor: {p_value:.3f})")
-            
-            plt.figure(figsize=(10, 6))
-            sns.regplot(data=analysis_df, x=rq_data["metric"], y=quality_metric, line_kws={"color": "red"})
-            plt.title(f'{rq_name}: {rq_data["label"]} vs. {quality_metric.replace("_", " ").upper()}')
-            plt.xlabel(rq_data["label"])
-            plt.ylabel(quality_metric.replace("_", " ").upper())
-            plt.grid(True)
-            
-            filename = f"graficos/{rq_name}_{quality_metric}.png"
-            plt.savefig(filename)
-            plt.close()
-            print(f"Gráfico salvo em: {filename}")
+    plot_relationships(final_df, correlations)
 
 # --- FUNÇÃO PRINCIPAL ---
 
 def main():
     # --- CONFIGURAÇÕES ---
     NUM_REPOS_TO_ANALYZE = 1000
-    REPOS_PER_PAGE = 100
+    REPOS_PER_PAGE = 100                # máximo de repositórios por query GraphQL
     FINAL_CSV_PATH = "analise_final_repositorios.csv"
     CK_JAR_FILENAME = "ck.jar"
+    CACHE_DB_PATH = "ck_cache.sqlite"   # agregados do CK por repositório + SHA do HEAD
+    HTTP_CACHE_PATH = "http_cache.sqlite"  # respostas da API (None desliga)
+    METADATA_CACHE_TTL = 6 * 3600       # páginas GraphQL reaproveitadas sem requisição por 6 h
+    METRICS_PREFIX = "metricas_api"     # resumo das requisições à API (.json/.csv) ao fim da coleta
+    METRICS_PROMETHEUS = False          # também grava metricas_api.prom (formato texto do Prometheus)
+    WORK_DIR = "workspace"              # um subdiretório isolado por repositório
+    SPARSE_CLONE = True                 # clone parcial: só os .java (o CK não lê mais nada)
+    RAW_STORE_DIR = "ck_store"          # dataset Parquet com field/variable/method.csv (None desliga)
+    MIRROR_CACHE_DIR = "mirrors"        # clones bare reaproveitados entre execuções (None desliga)
+    MIRROR_CACHE_MAX_GB = 50            # limite do cache de mirrors; acima disso, sai o menos usado
+    NUM_CLONE_WORKERS = 4               # clones são limitados pela rede
+    NUM_CK_WORKERS = os.cpu_count() or 1  # CK é limitado pela CPU
+    PIPELINE_QUEUE_SIZE = 8             # máximo de repositórios esperando em cada fila
+    DISK_BUDGET_GB = 40                 # soma das estimativas de disco dos jobs em andamento
+    HEAP_BUDGET_MB = 8192               # soma dos -Xmx das JVMs do CK rodando ao mesmo tempo
+    BOOTSTRAP_REPLICATES = 2000         # réplicas para os ICs das correlações (0 desliga)
+    STRATIFY_BY = None                  # coluna para estratificar as correlações (ex.: "age_years", em quartis)
+    STRAGGLER_ATTEMPTS = 3              # tentativas de um job que estoura prazo (cada uma com o dobro do prazo)
+    FOOTPRINT_LIMITS = {
+        "default_size_kb": 200 * 1024,  # quando a API não informa diskUsage
+        "full_disk_factor": 3.0,        # pack + checkout completo
+        "sparse_disk_factor": 1.0,      # objetos parciais + checkout só dos .java
+        "ck_output_bytes": 64 * 2**20,  # CSVs do CK
+        "min_heap_mb": 512, "max_heap_mb": 4096, "heap_mb_per_mb": 4,
+        "base_deadline": 120, "max_deadline": 1800,
+        "clone_seconds_per_mb": 1.0, "ck_seconds_per_mb": 2.0,
+    }
 
     load_dotenv()
-    GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-    if not GITHUB_TOKEN:
-        print("ERRO: GITHUB_TOKEN não encontrado no arquivo .env")
+    # GITHUB_TOKENS (vários, separados por vírgula) ou GITHUB_TOKEN
+    GITHUB_TOKENS = load_tokens()
+    if not GITHUB_TOKENS:
+        print("ERRO: GITHUB_TOKEN (ou GITHUB_TOKENS) não encontrado no arquivo .env")
         return
         
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
+    tokens = TokenPool(GITHUB_TOKENS)
     
     if os.path.exists(FINAL_CSV_PATH):
         os.remove(FINAL_CSV_PATH)
-        print(f"Arquivo de resultados antigo '{FINAL_CSV_PATH}' removido.")
+        print(f"Arquivo de resultados antigo '{FINAL_CSV_PATH}' removido (repositórios já analisados virão do cache).")
 
-    all_repos = []
-    num_pages_needed = (NUM_REPOS_TO_ANALYZE + REPOS_PER_PAGE - 1) // REPOS_PER_PAGE
-    for page in range(1, num_pages_needed + 1):
-        api_url = f"https://api.github.com/search/repositories?q=language:java&sort=stars&order=desc&per_page={REPOS_PER_PAGE}&page={page}"
-        try:
-            print(f"\nBuscando página {page}/{num_pages_needed} de repositórios...")
-            response = requests.get(api_url, timeout=60, headers=headers)
-            response.raise_for_status()
-            all_repos.extend(response.json().get('items', []))
-        except requests.exceptions.RequestException as e:
-            print(f"Erro fatal ao acessar a API do GitHub: {e}"); return
-    
-    repos_to_process = all_repos[:NUM_REPOS_TO_ANALYZE]
+    os.makedirs(WORK_DIR, exist_ok=True)
+    http_cache = HTTPCache(HTTP_CACHE_PATH) if HTTP_CACHE_PATH else None
+    mirrors = MirrorCache(MIRROR_CACHE_DIR, MIRROR_CACHE_MAX_GB * 2**30) if MIRROR_CACHE_DIR else None
+    scheduler = ResourceScheduler({"disk": DISK_BUDGET_GB * 2**30, "heap_mb": HEAP_BUDGET_MB})
+    # só cobre a API: clones e CK aparecem como tempo de "cpu" no resumo
+    api_metrics = RequestMetrics()
 
-    for i, repo_data in enumerate(repos_to_process):
-        repo_name = repo_data['name']
-        clone_url = repo_data['clone_url']
-        print(f"\n--- Processando Repositório {i + 1}/{len(repos_to_process)}: {repo_name} ---")
+    def build_jobs():
+        # Metadados vêm em lotes de 100 por query GraphQL, numa thread que corre à frente do pipeline
+        metadata = prefetch(fetch_repository_metadata(tokens, NUM_REPOS_TO_ANALYZE, REPOS_PER_PAGE, http_cache, METADATA_CACHE_TTL, api_metrics))
+        for i, repo_data in enumerate(metadata):
+            repo_name = repo_data['name']
+            print(f"\n--- Enfileirando Repositório {i + 1}/{NUM_REPOS_TO_ANALYZE}: {repo_name} ---")
 
-        releases_url = repo_data.get('releases_url', '').replace('{/id}', '')
-        releases_count = 0
-        try:
-            releases_response = requests.get(f"{releases_url}?per_page=1", headers=headers, timeout=30)
-            if 'Link' in releases_response.headers:
-                link_header = releases_response.headers['Link']
-                if 'last' in link_header:
-                    releases_count = int(link_header.split('page=')[-1].split('>')[0])
-                else:
-                    releases_count = len(requests.get(releases_url, headers=headers, timeout=30).json())
-            elif releases_response.ok:
-                 releases_count = len(releases_response.json())
-        except Exception:
-            print("Aviso: Falha ao buscar contagem de releases.")
-
-        repo_metrics = {
-            "repo_name": repo_name,
-            "stars": repo_data.get('stargazers_count', 0),
-            "age_years": (datetime.now(timezone.utc) - pd.to_datetime(repo_data.get('created_at'))).days / 365.25 if repo_data.get('created_at') else 0,
-            "releases_count": releases_count,
-            "cbo_median": None, "dit_median": None, "lcom_median": None, "loc_total": None
-        }
+            repo_metrics = {
+                "repo_name": repo_name,
+                "stars": repo_data.get('stargazerCount', 0),
+                "age_years": (datetime.now(timezone.utc) - pd.to_datetime(repo_data.get('createdAt'))).days / 365.25 if repo_data.get('createdAt') else 0,
+                "releases_count": repo_data['releases']['totalCount'],
+                "cbo_median": None, "dit_median": None, "lcom_median": None, "loc_total": None
+            }
+            default_branch = repo_data.get('defaultBranchRef')
+
+            # Cada job tem seu próprio diretório: clone e saídas do CK não colidem
+            work_dir = os.path.join(WORK_DIR, f"{i:04d}_{repo_name}")
+            if os.path.exists(work_dir): shutil.rmtree(work_dir, onerror=remove_readonly)
+            os.makedirs(work_dir)
+            yield {
+                "metrics": repo_metrics,
+                "full_name": repo_data['nameWithOwner'],
+                "clone_url": f"{repo_data['url']}.git",
+                "head_sha": default_branch['target']['oid'] if default_branch else None,
+                "work_dir": work_dir,
+                "sparse": SPARSE_CLONE,
+                "raw_store": RAW_STORE_DIR,
+                "mirrors": mirrors,
+                "scheduler": scheduler,
+                "footprint": estimate_footprint(repo_data.get('diskUsage'), SPARSE_CLONE, FOOTPRINT_LIMITS),
+                "attempt": 1,
+                "deadline_scale": 1,
+            }
+
+    cache = ResultCache(CACHE_DB_PATH)
+    try:
+        stragglers = run_pipeline(build_jobs(), FINAL_CSV_PATH, os.path.abspath(CK_JAR_FILENAME),
+                                  NUM_CLONE_WORKERS, NUM_CK_WORKERS, PIPELINE_QUEUE_SIZE, cache, scheduler, STRAGGLER_ATTEMPTS)
+        # Retardatários rodam no fim, um de cada vez e com o prazo dobrado a cada tentativa,
+        # para que um repositório gigante não segure os demais
+        while stragglers:
+            print(f"\n--- Reprocessando {len(stragglers)} repositório(s) que estouraram o prazo ---")
+            for job in stragglers:
+                job["attempt"] += 1
+                job["deadline_scale"] *= 2
+                os.makedirs(job["work_dir"], exist_ok=True)
+            stragglers = run_pipeline(stragglers, FINAL_CSV_PATH, os.path.abspath(CK_JAR_FILENAME),
+                                      1, 1, PIPELINE_QUEUE_SIZE, cache, scheduler, STRAGGLER_ATTEMPTS)
+    finally:
+        cache.close()
+        api_metrics.write(METRICS_PREFIX, prometheus=METRICS_PROMETHEUS)
 
-        try:
-            if os.path.exists(repo_name): shutil.rmtree(repo_name, onerror=remove_readonly)
-            subprocess.run(["git", "clone", "--depth", "1", clone_url, repo_name], check=True, capture_output=True, text=True, timeout=300)
-
-            source_path, file_count = find_best_java_source_directory(repo_name)
-            
-            if file_count != 0:
-                subprocess.run(["java", "-jar", CK_JAR_FILENAME, source_path], check=True, capture_output=True, text=True, timeout=300)
-                
-                if os.path.exists("class.csv"):
-                    df = pd.read_csv("class.csv")
-                    if not df.empty:
-                        repo_metrics.update({
-                            "cbo_median": df['cbo'].median(),
-                            "dit_median": df['dit'].median(),
-                            "lcom_median": df['lcom'].median(),
-                            "loc_total": df['loc'].sum()
-                        })
-                        print("Métricas do CK calculadas.")
-        except Exception as e:
-            print(f"ERRO: Falha no processamento do repositório {repo_name}. Erro: {e}")
-        finally:
-            df_to_append = pd.DataFrame([repo_metrics])
-            file_exists = os.path.exists(FINAL_CSV_PATH)
-            df_to_append.to_csv(FINAL_CSV_PATH, mode='a', header=not file_exists, index=False)
-            print(f"Dados do repositório salvos em {FINAL_CSV_PATH}")
-
-            if os.path.exists("class.csv"): os.remove("class.csv")
-            if os.path.exists("method.csv"): os.remove("method.csv")
-            if os.path.exists(repo_name): shutil.rmtree(repo_name, onerror=remove_readonly)
-            
     print(f"\n--- COLETA DE DADOS CONCLUÍDA! ---")
 
     if os.path.exists(FINAL_CSV_PATH):
         final_df = pd.read_csv(FINAL_CSV_PATH)
         if not final_df.empty:
-            perform_analysis_and_visualization(final_df)
+            perform_analysis_and_visualization(final_df, BOOTSTRAP_REPLICATES, STRATIFY_BY)
     else:
         print("Arquivo de análise final não encontrado.")
 
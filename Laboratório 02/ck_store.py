@@ -0,0 +1,175 @@
+import os
+import argparse
+from urllib.parse import quote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# --- ARMAZENAMENTO COLUNAR DA SAÍDA BRUTA DO CK ---
+#
+# Layout (particionado por tipo de saída e por repositório):
+#   <raiz>/<kind>/repo=<repo>/data.parquet   fatos: ids int32 + métricas numéricas estreitas
+#   <raiz>/strings/repo=<repo>.parquet       tabela de strings internadas (id -> valor)
+#
+# Caminhos, classes, métodos e variáveis se repetem em quase toda linha do CSV do CK;
+# no Parquet eles viram ids inteiros que apontam para a tabela de strings do repositório.
+#
+# O tipo de cada coluna (bool < int < float < string) é decidido numa primeira passada
+# pelo CSV inteiro, e o esquema do Parquet é declarado antes da escrita: um bloco com a
+# coluna toda vazia, ou com inteiros que o pandas leu como float, não muda o esquema.
+
+CHUNK_SIZE = 100_000
+KINDS = ["bool", "int", "float", "string"]   # do mais estreito para o mais largo
+ARROW_TYPES = {"bool": pa.bool_(), "int": pa.int32(), "float": pa.float32(), "string": pa.int32()}
+
+def partition_name(repo):
+    """Nome seguro e reversível para a partição (owner/name -> owner%2Fname).
+
+    É a codificação de URL que o pyarrow desfaz ao ler partições hive, então a coluna
+    `repo` do dataset já volta como owner/name."""
+    return quote(repo, safe="")
+
+def column_kind(values):
+    """Tipo mais estreito que comporta os valores de um bloco (None se estiverem todos vazios)."""
+    inferred = pd.api.types.infer_dtype(values, skipna=True)
+    if inferred == "empty":
+        return None
+    if inferred == "boolean":
+        return "bool"
+    if inferred == "integer":
+        return "int"
+    if inferred in ("floating", "mixed-integer-float"):
+        numbers = pd.to_numeric(values, errors="coerce").dropna()
+        return "int" if (numbers == numbers.round()).all() and numbers.abs().max() < 2**31 else "float"
+    return "string"
+
+def scan_kinds(csv_path, chunk_size=CHUNK_SIZE):
+    """Tipo de cada coluna do CSV inteiro; colunas sempre vazias ficam como float."""
+    kinds = {}
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        for col in chunk.columns:
+            kind = column_kind(chunk[col])
+            if kind is not None and (kinds.get(col) is None or KINDS.index(kind) > KINDS.index(kinds[col])):
+                kinds[col] = kind
+            else:
+                kinds.setdefault(col, None)
+    return {col: kind or "float" for col, kind in kinds.items()}
+
+class CKStoreWriter:
+    """Ingere as saídas do CK de um repositório (field.csv, variable.csv, method.csv...) em streaming."""
+
+    def __init__(self, root, repo, source_root=None):
+        self.root = root
+        self.repo = partition_name(repo)
+        # prefixo absoluto do clone, removido dos caminhos antes de internar
+        self.source_prefix = source_root.rstrip("\\/") if source_root else None
+        self.strings = {}
+
+    def _intern(self, values):
+        """Converte uma coluna de strings em ids int32 da tabela do repositório."""
+        codes, uniques = pd.factorize(values.fillna(""))
+        table_ids = pd.array([self.strings.setdefault(value, len(self.strings)) for value in uniques], dtype="int32")
+        return pd.Series(table_ids.take(codes), index=values.index, dtype="int32")
+
+    def _compact(self, chunk, kinds):
+        """Converte o bloco para os tipos de `kinds` (vazios viram nulos, não mudam o tipo)."""
+        columns = {}
+        for col, kind in kinds.items():
+            values = chunk[col]
+            if kind == "bool":
+                columns[col] = values.astype("boolean")
+            elif kind == "int":
+                columns[col] = pd.to_numeric(values).astype("Int32")
+            elif kind == "float":
+                columns[col] = pd.to_numeric(values).astype("float32")
+            else:
+                values = values.astype("string")
+                if col == "file" and self.source_prefix:
+                    values = values.str.removeprefix(self.source_prefix).str.lstrip("\\/")
+                columns[f"{col}_id"] = self._intern(values)
+        return pd.DataFrame(columns)
+
+    @staticmethod
+    def _schema(kinds):
+        return pa.schema([pa.field(f"{col}_id" if kind == "string" else col, ARROW_TYPES[kind]) for col, kind in kinds.items()])
+
+    def ingest(self, csv_path, kind):
+        """Lê `csv_path` em blocos (uma passada para os tipos, outra para gravar) e grava
+        <raiz>/<kind>/repo=<repo>/data.parquet; devolve o nº de linhas."""
+        out_dir = os.path.join(self.root, kind, f"repo={self.repo}")
+        os.makedirs(out_dir, exist_ok=True)
+        kinds = scan_kinds(csv_path)
+        schema = self._schema(kinds)
+        rows = 0
+        with pq.ParquetWriter(os.path.join(out_dir, "data.parquet"), schema) as writer:
+            for chunk in pd.read_csv(csv_path, chunksize=CHUNK_SIZE):
+                writer.write_table(pa.Table.from_pandas(self._compact(chunk, kinds), schema=schema, preserve_index=False))
+                rows += len(chunk)
+        return rows
+
+    def close(self):
+        """Grava a tabela de strings internadas do repositório."""
+        strings_dir = os.path.join(self.root, "strings")
+        os.makedirs(strings_dir, exist_ok=True)
+        table = pa.table({
+            "id": pa.array(list(self.strings.values()), type=pa.int32()),
+            "value": pa.array(list(self.strings.keys()), type=pa.string()),
+        })
+        pq.write_table(table, os.path.join(strings_dir, f"repo={self.repo}.parquet"))
+
+def ingest_ck_outputs(root, repo, work_dir, source_root=None, kinds=("field", "variable", "method")):
+    """Ingere as saídas do CK presentes em `work_dir`; devolve {kind: nº de linhas}."""
+    writer = CKStoreWriter(root, repo, source_root)
+    counts = {}
+    for kind in kinds:
+        csv_path = os.path.join(work_dir, f"{kind}.csv")
+        if os.path.exists(csv_path):
+            counts[kind] = writer.ingest(csv_path, kind)
+    writer.close()
+    return counts
+
+def load_strings(root, repo):
+    """Tabela de strings de um repositório (owner/name) como Series id -> valor."""
+    table = pq.read_table(os.path.join(root, "strings", f"repo={partition_name(repo)}.parquet"))
+    return pd.Series(table.column("value").to_pylist(), index=table.column("id").to_pylist())
+
+def top_by_usage(root, kind="field", key="class", n=10):
+    """Top `n` valores de `key` por soma de `usage` em todos os repositórios.
+
+    Varre o dataset em lotes, somando só as colunas (repo, <key>_id, usage); as strings
+    são resolvidas apenas para o resultado final.
+    """
+    dataset = ds.dataset(os.path.join(root, kind), format="parquet", partitioning="hive")
+    totals = None
+    for batch in dataset.to_batches(columns=["repo", f"{key}_id", "usage"]):
+        partial = batch.to_pandas().groupby(["repo", f"{key}_id"], observed=True)["usage"].sum()
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+    if totals is None:
+        return pd.DataFrame(columns=["repo", key, "usage"])
+
+    top = totals.nlargest(n).astype("int64").reset_index()
+    top["repo"] = top["repo"].astype(str)
+    top[key] = [load_strings(root, repo)[key_id] for repo, key_id in zip(top["repo"], top[f"{key}_id"])]
+    return top[["repo", key, "usage"]]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Armazenamento colunar da saída bruta do CK.")
+    parser.add_argument("--root", default="ck_store", help="diretório do dataset Parquet")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = sub.add_parser("ingest", help="ingere field.csv/variable.csv/method.csv de um diretório")
+    ingest_parser.add_argument("repo")
+    ingest_parser.add_argument("work_dir", nargs="?", default=".")
+    ingest_parser.add_argument("--source-root", default=None, help="prefixo dos caminhos a remover")
+
+    top_parser = sub.add_parser("top", help="classes/métodos/variáveis com maior uso somado")
+    top_parser.add_argument("--kind", default="field", choices=["field", "variable"])
+    top_parser.add_argument("--key", default="class", choices=["file", "class", "method", "variable"])
+    top_parser.add_argument("-n", type=int, default=10)
+
+    args = parser.parse_args()
+    if args.command == "ingest":
+        print(ingest_ck_outputs(args.root, args.repo, args.work_dir, args.source_root))
+    else:
+        print(top_by_usage(args.root, args.kind, args.key, args.n).to_string(index=False))
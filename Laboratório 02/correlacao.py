@@ -0,0 +1,129 @@
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata, t as t_dist
+
+# --- CORRELAÇÃO DE SPEARMAN VETORIZADA (SEM MATPLOTLIB) ---
+#
+# Cada coluna é ranqueada uma única vez e a matriz inteira de Spearman sai de um
+# produto matricial dos postos padronizados. O bootstrap reamostra as linhas em
+# lotes de réplicas (tensor réplica x linha x coluna) e reranqueia cada réplica
+# com rankdata(axis=1); não há laço Python sobre as réplicas.
+
+RQ_METRICS = {
+    "RQ01_Popularidade": {"metric": "stars", "label": "Popularidade (Estrelas)"},
+    "RQ02_Maturidade": {"metric": "age_years", "label": "Maturidade (Anos)"},
+    "RQ03_Atividade": {"metric": "releases_count", "label": "Atividade (Nº de Releases)"},
+    "RQ04_Tamanho": {"metric": "loc_total", "label": "Tamanho (LOC Total)"},
+}
+QUALITY_METRICS = ["cbo_median", "dit_median", "lcom_median"]
+MAX_STRATA = 10   # colunas numéricas com mais valores distintos que isso viram quartis
+
+def _pearson_of_ranks(ranks):
+    """Matriz de correlação entre as colunas do último eixo (funciona com um eixo de réplicas à frente)."""
+    centered = ranks - ranks.mean(axis=-2, keepdims=True)
+    norms = np.sqrt((centered ** 2).sum(axis=-2, keepdims=True))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        standardized = centered / norms
+    return np.einsum("...ni,...nj->...ij", standardized, standardized)
+
+def spearman_matrix(values):
+    """Matriz de Spearman (colunas x colunas) e p-valores bicaudais (aproximação t, como o scipy)."""
+    n = values.shape[0]
+    rho = _pearson_of_ranks(rankdata(values, axis=0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_stat = rho * np.sqrt((n - 2) / ((1 - rho) * (1 + rho)))
+    p_values = 2 * t_dist.sf(np.abs(t_stat), n - 2)
+    return rho, p_values
+
+def bootstrap_spearman(values, n_boot=2000, confidence=0.95, batch_size=250, seed=0):
+    """Intervalos de confiança percentis da matriz de Spearman por bootstrap das linhas.
+
+    As réplicas são sorteadas e ranqueadas em lotes de `batch_size` para limitar a
+    memória a batch_size x n x colunas valores.
+    """
+    rng = np.random.default_rng(seed)
+    n = values.shape[0]
+    replicates = []
+    for start in range(0, n_boot, batch_size):
+        size = min(batch_size, n_boot - start)
+        samples = values[rng.integers(n, size=(size, n))]
+        replicates.append(_pearson_of_ranks(rankdata(samples, axis=1)))
+    replicates = np.concatenate(replicates)
+    alpha = (1 - confidence) / 2
+    low, high = np.nanquantile(replicates, [alpha, 1 - alpha], axis=0)
+    return low, high
+
+def strata(df, column, max_strata=MAX_STRATA):
+    """Valores de `column` usados como estratos: a própria coluna ou, se for numérica com
+    mais de `max_strata` valores distintos, os quartis dela (pd.qcut)."""
+    if column not in df.columns:
+        raise KeyError(f"Coluna de estratificação '{column}' não existe no dataset (colunas: {', '.join(df.columns)}).")
+    values = df[column]
+    if pd.api.types.is_numeric_dtype(values) and values.nunique() > max_strata:
+        return pd.qcut(values, 4, duplicates="drop")
+    return values
+
+def correlation_table(df, x_columns, y_columns, n_boot=2000, confidence=0.95, stratify_by=None, min_rows=3, seed=0):
+    """Tabela (estrato, x, y, n, rho, p_value, ci_low, ci_high) para todos os pares x × y.
+
+    Usa as linhas completas nas colunas analisadas: no CSV do Lab02 as métricas do CK
+    faltam juntas (o CK falhou ou não havia .java), então isso coincide com o dropna
+    feito par a par. Com `stratify_by`, a matriz é calculada também dentro de cada
+    estrato da coluna (ver `strata`; ex.: quartis de age_years); o estrato 'todos' é
+    sempre incluído. Uma coluna inexistente levanta KeyError.
+    """
+    columns = list(dict.fromkeys([*x_columns, *y_columns]))
+    groups = [("todos", df)]
+    if stratify_by is not None:
+        groups += [(str(value), group) for value, group in df.groupby(strata(df, stratify_by), observed=True)]
+
+    x_index = [columns.index(col) for col in x_columns]
+    y_index = [columns.index(col) for col in y_columns]
+    tables = []
+    for stratum, group in groups:
+        values = group[columns].dropna().to_numpy(dtype=float)
+        if len(values) < min_rows:
+            print(f"Dados insuficientes para o estrato '{stratum}' ({len(values)} linhas).")
+            continue
+        rho, p_values = spearman_matrix(values)
+        low, high = bootstrap_spearman(values, n_boot, confidence, seed=seed) if n_boot else (np.full_like(rho, np.nan),) * 2
+
+        # só o bloco x × y da matriz completa
+        block = np.ix_(x_index, y_index)
+        xs, ys = np.meshgrid(x_columns, y_columns, indexing="ij")
+        tables.append(pd.DataFrame({
+            "stratum": stratum,
+            "x": xs.ravel(),
+            "y": ys.ravel(),
+            "n": len(values),
+            "rho": rho[block].ravel(),
+            "p_value": p_values[block].ravel(),
+            "ci_low": low[block].ravel(),
+            "ci_high": high[block].ravel(),
+        }))
+    if not tables:
+        return pd.DataFrame(columns=["stratum", "x", "y", "n", "rho", "p_value", "ci_low", "ci_high"])
+    return pd.concat(tables, ignore_index=True)
+
+def rq_correlations(final_df, n_boot=2000, confidence=0.95, stratify_by=None):
+    """Correlações das RQs do Lab02 (métricas de processo × métricas de qualidade do CK)."""
+    x_columns = [rq["metric"] for rq in RQ_METRICS.values()]
+    table = correlation_table(final_df, x_columns, QUALITY_METRICS, n_boot, confidence, stratify_by)
+    rq_names = {rq["metric"]: rq_name for rq_name, rq in RQ_METRICS.items()}
+    table.insert(1, "rq", table["x"].map(rq_names))
+    return table
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Correlações de Spearman das RQs do Lab02 com ICs por bootstrap.")
+    parser.add_argument("csv", nargs="?", default="analise_final_repositorios.csv")
+    parser.add_argument("--bootstrap", type=int, default=2000, help="nº de réplicas (0 desliga)")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--stratify-by", default=None, help="coluna para estratificar (ex.: age_years, em quartis)")
+    parser.add_argument("--output", default=None, help="salva a tabela em CSV")
+    args = parser.parse_args()
+
+    table = rq_correlations(pd.read_csv(args.csv), args.bootstrap, args.confidence, args.stratify_by)
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if args.output:
+        table.to_csv(args.output, index=False)
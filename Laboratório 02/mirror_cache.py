@@ -0,0 +1,111 @@
+import os
+import shutil
+import stat
+import subprocess
+import threading
+
+# --- CACHE DE CLONES BARE ENTRE EXECUÇÕES ---
+
+def directory_size(path):
+    """Soma o tamanho em bytes de todos os arquivos abaixo de `path`."""
+    total = 0
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            total += directory_size(entry.path)
+        elif entry.is_file(follow_symlinks=False):
+            total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+def _remove_readonly(func, path, exc_info):
+    """Os objetos do git são somente leitura no Windows; libera antes de apagar."""
+    os.chmod(path, stat.S_IWRITE)
+    func(path)
+
+def _git(*args, timeout=300):
+    subprocess.run(["git", *args], check=True, capture_output=True, text=True, timeout=timeout)
+
+# ref local que guarda o último HEAD remoto buscado: o próximo fetch negocia a partir
+# dela e os objetos baixados continuam alcançáveis (não somem num `git gc`)
+CACHE_REF = "refs/heads/_cache_head"
+
+class MirrorCache:
+    """Clones bare parciais sem árvores nem blobs (`--filter=tree:0`) guardados em disco e
+    atualizados com `git fetch`.
+
+    Cada job ganha um `git worktree` do mirror: os objetos já baixados são compartilhados
+    e só as árvores e blobs que faltam (no modo esparso, apenas os .java) vêm da rede. Quando
+    o total passa de `max_bytes`, os mirrors usados há mais tempo são apagados (LRU).
+
+    Custo: a primeira execução baixa todos os commits do repositório (só os commits, sem
+    árvores/blobs do histórico), um pouco mais que o clone raso de `clone_repository`;
+    em troca, as execuções seguintes só buscam os commits novos e as árvores/blobs do HEAD
+    que mudaram. Para uma execução única, desligue o cache (MIRROR_CACHE_DIR = None).
+    """
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.in_use = set()
+        os.makedirs(root, exist_ok=True)
+        self.sizes = {entry.name: directory_size(entry.path) for entry in os.scandir(root) if entry.is_dir()}
+
+    def _mirror_path(self, key):
+        return os.path.join(self.root, key)
+
+    def checkout(self, full_name, clone_url, dest, sparse, timeout=300):
+        """Atualiza (ou cria) o mirror de `full_name` e monta um worktree do HEAD remoto em `dest`.
+
+        `timeout` (segundos) vale para cada operação de rede do git. Devolve a chave do mirror, que deve ser passada a `release` quando o job terminar.
+        """
+        key = full_name.replace("/", "__") + ".git"
+        mirror = self._mirror_path(key)
+        with self.lock:
+            self.in_use.add(key)
+
+        created = not os.path.exists(mirror)
+        try:
+            if created:
+                _git("clone", "--bare", "--filter=tree:0", clone_url, mirror, timeout=timeout)
+            else:
+                _git("-C", mirror, "worktree", "prune")
+            # busca incremental para uma ref de verdade: só os commits novos desde a última execução
+            _git("-C", mirror, "fetch", "--filter=tree:0", "origin", f"+HEAD:{CACHE_REF}", timeout=timeout)
+
+            dest = os.path.abspath(dest)
+            _git("-C", mirror, "worktree", "add", "--detach", "--no-checkout", dest, CACHE_REF)
+            if sparse:
+                _git("-C", dest, "sparse-checkout", "set", "--no-cone", "*.java", timeout=60)
+            _git("-C", dest, "read-tree", "-mu", "HEAD", timeout=timeout)
+        except Exception:
+            # um mirror recém-criado e incompleto não deve ficar no cache
+            if created and os.path.exists(mirror):
+                shutil.rmtree(mirror, onerror=_remove_readonly)
+            self.release(key)
+            raise
+        return key
+
+    def release(self, key):
+        """Marca o uso do mirror (para o LRU), registra o novo tamanho e aplica o limite do cache."""
+        mirror = self._mirror_path(key)
+        if os.path.exists(mirror):
+            _git("-C", mirror, "worktree", "prune")
+            os.utime(mirror)
+            size = directory_size(mirror)
+        else:
+            size = 0
+        with self.lock:
+            self.in_use.discard(key)
+            self.sizes[key] = size
+            self._evict()
+
+    def _evict(self):
+        total = sum(self.sizes.values())
+        for key in sorted(self.sizes, key=lambda k: os.path.getmtime(self._mirror_path(k)) if os.path.exists(self._mirror_path(k)) else 0):
+            if total <= self.max_bytes:
+                break
+            if key in self.in_use:
+                continue
+            shutil.rmtree(self._mirror_path(key), onerror=_remove_readonly)
+            total -= self.sizes.pop(key)
+            print(f"Mirror '{key}' removido do cache (limite de {self.max_bytes / 2**30:.1f} GiB).")
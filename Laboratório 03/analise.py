@@ -6,20 +6,65 @@ Este script processa o dataset 'github_prs_dataset.csv' para responder
 às questões de pesquisa sobre a atividade de code review.
 
 Ele calcula estatísticas descritivas (medianas), realiza testes de correlação
-(Spearman) e gera visualizações (boxplots e scatter plots).
+(Spearman) e gera visualizações (boxplots e mapas de densidade). Os gráficos são
+desenhados a partir de resumos (quartis por grupo, histograma 2-D), então o custo
+de desenhar não cresce com o número de PRs e não é preciso amostrar o dataset.
+
+Datasets grandes demais para a memória (ou um dataset Arrow particionado) são
+analisados em blocos por `analise_streaming.py`; veja lá a tolerância em relação
+ao caminho em memória.
 """
 
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy.stats import spearmanr
 import os
+from graficos_agregados import box_stats, draw_boxplot, draw_density, histogram_2d, log_edges
+from analise_streaming import analyze_streaming, CHUNK_SIZE
 
 # --- CONFIGURAÇÃO ---
 DATASET_FILE = 'github_prs_dataset.csv'
 OUTPUT_DIR = 'graficos'
+STREAMING_THRESHOLD_MB = 500  # no modo 'auto', CSVs maiores que isso são analisados em blocos
+BOX_COLUMNS = ['total_lines', 'num_files', 'analysis_time_hours', 'description_length', 'num_comments', 'num_participants']
+SPEARMAN_PAIRS = {
+    'RQ05': ('total_lines', 'num_reviews'),
+    'RQ06': ('analysis_time_hours', 'num_reviews'),
+    'RQ07': ('description_length', 'num_reviews'),
+    'RQ08_comentarios': ('num_comments', 'num_reviews'),
+    'RQ08_participantes': ('num_participants', 'num_reviews'),
+}
+DENSITY_PAIR = ('num_comments', 'num_reviews')
+
+def analyze_in_memory(source):
+    """
+    Carrega o dataset inteiro (CSV, arquivo Parquet ou diretório de dataset Arrow) e calcula
+    medianas, boxplots, correlações e o histograma 2-D do RQ08.
+    """
+    if os.path.isdir(source) or source.endswith('.parquet'):
+        df = pd.read_parquet(source)
+        # num dataset particionado o status volta como categoria
+        df['status'] = df['status'].astype(str)
+    else:
+        df = pd.read_csv(source)
+    # Adicionar uma coluna 'total_lines' para a métrica de tamanho
+    df['total_lines'] = df['lines_added'] + df['lines_removed']
 
-def main():
+    x, y = DENSITY_PAIR
+    x_edges, y_edges = log_edges(df[x].max()), log_edges(df[y].max())
+    density_data = df[[x, y]].dropna()
+    return {
+        'n': len(df),
+        'medians': df.groupby('status')[BOX_COLUMNS].median(),
+        # Quartis e bigodes de todas as métricas por status, num único groupby
+        'boxes': box_stats(df, BOX_COLUMNS, by='status'),
+        'spearman': {name: tuple(spearmanr(df[a], df[b])) for name, (a, b) in SPEARMAN_PAIRS.items()},
+        'density': (histogram_2d(density_data[x], density_data[y], x_edges, y_edges), x_edges, y_edges),
+        'approximated': [],
+    }
+
+def main(mode='auto', source=DATASET_FILE, chunk_size=CHUNK_SIZE):
     """
     Função principal que orquestra a análise e visualização dos dados.
     """
@@ -28,18 +73,26 @@ def main():
         os.makedirs(OUTPUT_DIR)
 
     # --- CARREGAMENTO E PREPARAÇÃO DOS DADOS ---
-    try:
-        df = pd.read_csv(DATASET_FILE)
-    except FileNotFoundError:
-        print(f"ERRO: O arquivo '{DATASET_FILE}' não foi encontrado.")
+    if not os.path.exists(source):
+        print(f"ERRO: O arquivo '{source}' não foi encontrado.")
         print("Certifique-se de que o script de coleta foi executado com sucesso e o dataset está na mesma pasta.")
         return
 
-    # Adicionar uma coluna 'total_lines' para a métrica de tamanho
-    df['total_lines'] = df['lines_added'] + df['lines_removed']
+    if mode == 'auto':
+        # diretórios (dataset Arrow) e CSVs grandes vão para o modo em blocos
+        large = os.path.isdir(source) or os.path.getsize(source) > STREAMING_THRESHOLD_MB * 2**20
+        mode = 'streaming' if large else 'memoria'
+    if mode == 'streaming':
+        print(f"Analisando '{source}' em blocos de {chunk_size} linhas (modo streaming).")
+        results = analyze_streaming(source, BOX_COLUMNS, SPEARMAN_PAIRS, DENSITY_PAIR, chunk_size)
+        if results['approximated']:
+            print(f"Colunas com valores aproximados por sketch KLL: {', '.join(results['approximated'])}.")
+    else:
+        results = analyze_in_memory(source)
+    medians, boxes, spearman = results['medians'], results['boxes'], results['spearman']
 
     print("--- Análise de Dados Iniciada ---")
-    print(f"Total de PRs no dataset: {len(df)}")
+    print(f"Total de PRs no dataset: {results['n']}")
     print("\n")
 
     # ==============================================================================
@@ -49,20 +102,20 @@ def main():
 
     # --- RQ01: Relação entre o Tamanho e o Status ---
     print("\n[RQ01: Tamanho vs. Status]")
-    median_size = df.groupby('status')[['total_lines', 'num_files']].median()
+    median_size = medians[['total_lines', 'num_files']]
     print("Valores Medianos:")
     print(median_size)
     
     plt.figure(figsize=(12, 6))
     plt.suptitle('RQ01: Relação entre Tamanho do PR e Status Final', fontsize=16)
     plt.subplot(1, 2, 1)
-    sns.boxplot(x='status', y='total_lines', data=df, showfliers=False, order=['MERGED', 'CLOSED'], palette="pastel")
+    draw_boxplot(plt.gca(), boxes['total_lines'])
     plt.title('Total de Linhas Alteradas')
     plt.ylabel('Mediana de Linhas (Adicionadas + Removidas)')
     plt.xlabel('Status do PR')
 
     plt.subplot(1, 2, 2)
-    sns.boxplot(x='status', y='num_files', data=df, showfliers=False, order=['MERGED', 'CLOSED'], palette="pastel")
+    draw_boxplot(plt.gca(), boxes['num_files'])
     plt.title('Número de Arquivos Modificados')
     plt.ylabel('Mediana de Arquivos')
     plt.xlabel('Status do PR')
@@ -71,12 +124,12 @@ def main():
     plt.close()
 
     print("\n[RQ02: Tempo de Análise vs. Status]")
-    median_time = df.groupby('status')['analysis_time_hours'].median()
+    median_time = medians['analysis_time_hours']
     print("Valores Medianos (Horas):")
     print(median_time)
     
     plt.figure(figsize=(7, 6))
-    sns.boxplot(x='status', y='analysis_time_hours', data=df, showfliers=False, order=['MERGED', 'CLOSED'], palette="pastel")
+    draw_boxplot(plt.gca(), boxes['analysis_time_hours'])
     plt.title('RQ02: Relação entre Tempo de Análise e Status Final', fontsize=14)
     plt.ylabel('Mediana do Tempo de Análise (Horas)')
     plt.xlabel('Status do PR')
@@ -85,12 +138,12 @@ def main():
     plt.close()
 
     print("\n[RQ03: Descrição vs. Status]")
-    median_desc = df.groupby('status')['description_length'].median()
+    median_desc = medians['description_length']
     print("Valores Medianos (Nº de Caracteres):")
     print(median_desc)
 
     plt.figure(figsize=(7, 6))
-    sns.boxplot(x='status', y='description_length', data=df, showfliers=False, order=['MERGED', 'CLOSED'], palette="pastel")
+    draw_boxplot(plt.gca(), boxes['description_length'])
     plt.title('RQ03: Relação entre Tamanho da Descrição e Status Final', fontsize=14)
     plt.ylabel('Mediana do Nº de Caracteres na Descrição')
     plt.xlabel('Status do PR')
@@ -99,20 +152,20 @@ def main():
     plt.close()
 
     print("\n[RQ04: Interações vs. Status]")
-    median_interactions = df.groupby('status')[['num_comments', 'num_participants']].median()
+    median_interactions = medians[['num_comments', 'num_participants']]
     print("Valores Medianos:")
     print(median_interactions)
 
     plt.figure(figsize=(12, 6))
     plt.suptitle('RQ04: Relação entre Interações no PR e Status Final', fontsize=16)
     plt.subplot(1, 2, 1)
-    sns.boxplot(x='status', y='num_comments', data=df, showfliers=False, order=['MERGED', 'CLOSED'], palette="pastel")
+    draw_boxplot(plt.gca(), boxes['num_comments'])
     plt.title('Número de Comentários')
     plt.ylabel('Mediana de Comentários')
     plt.xlabel('Status do PR')
 
     plt.subplot(1, 2, 2)
-    sns.boxplot(x='status', y='num_participants', data=df, showfliers=False, order=['MERGED', 'CLOSED'], palette="pastel")
+    draw_boxplot(plt.gca(), boxes['num_participants'])
     plt.title('Número de Participantes')
     plt.ylabel('Mediana de Participantes')
     plt.xlabel('Status do PR')
@@ -123,31 +176,27 @@ def main():
 
     print("\n\n--- PARTE B: Análise do Número de Revisões ---")
 
-    corr_size, p_size = spearmanr(df['total_lines'], df['num_reviews'])
+    corr_size, p_size = spearman['RQ05']
     print(f"\n[RQ05: Tamanho vs. Nº Revisões] | Correlação de Spearman: {corr_size:.3f}, p-valor: {p_size:.3g}")
 
-    corr_time, p_time = spearmanr(df['analysis_time_hours'], df['num_reviews'])
+    corr_time, p_time = spearman['RQ06']
     print(f"[RQ06: Tempo vs. Nº Revisões] | Correlação de Spearman: {corr_time:.3f}, p-valor: {p_time:.3g}")
 
-    corr_desc, p_desc = spearmanr(df['description_length'], df['num_reviews'])
+    corr_desc, p_desc = spearman['RQ07']
     print(f"[RQ07: Descrição vs. Nº Revisões] | Correlação de Spearman: {corr_desc:.3f}, p-valor: {p_desc:.3g}")
 
     # --- RQ08: Relação entre as Interações e o Número de Revisões ---
-    corr_comm, p_comm = spearmanr(df['num_comments'], df['num_reviews'])
-    corr_part, p_part = spearmanr(df['num_participants'], df['num_reviews'])
+    corr_comm, p_comm = spearman['RQ08_comentarios']
+    corr_part, p_part = spearman['RQ08_participantes']
     print(f"[RQ08: Comentários vs. Nº Revisões] | Correlação de Spearman: {corr_comm:.3f}, p-valor: {p_comm:.3g}")
     print(f"[RQ08: Participantes vs. Nº Revisões] | Correlação de Spearman: {corr_part:.3f}, p-valor: {p_part:.3g}")
 
+    # Densidade de todos os PRs (histograma 2-D em faixas log) com a mediana de revisões por faixa
     plt.figure(figsize=(8, 6))
-    sample_df = df.sample(n=min(len(df), 2000), random_state=42)
-    sns.regplot(x='num_comments', y='num_reviews', data=sample_df,
-                scatter_kws={'alpha':0.3, 's':25},
-                line_kws={'color':'red', 'linewidth':2})
+    draw_density(plt.gca(), *results['density'])
     plt.title(f'RQ08: Comentários vs. Número de Revisões\n(Correlação Spearman: {corr_comm:.2f})', fontsize=14)
     plt.xlabel('Número de Comentários')
     plt.ylabel('Número de Revisões')
-    plt.xscale('log')
-    plt.yscale('log')
     plt.tight_layout()
     plt.savefig(os.path.join(OUTPUT_DIR, 'RQ08_correlacao_comentarios_revisoes.png'))
     plt.close()
@@ -155,4 +204,10 @@ def main():
     print(f"\n--- Análise Finalizada ---\nGráficos salvos na pasta: '{OUTPUT_DIR}'")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Análise do dataset de PRs do Lab03 (RQ01-RQ08).")
+    parser.add_argument('source', nargs='?', default=DATASET_FILE, help="CSV, arquivo Parquet ou diretório de dataset Arrow")
+    parser.add_argument('--modo', choices=['auto', 'memoria', 'streaming'], default='auto',
+                        help=f"'auto' usa streaming para diretórios e CSVs acima de {STREAMING_THRESHOLD_MB} MB")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="linhas por bloco no modo streaming")
+    args = parser.parse_args()
+    main(args.modo, args.source, args.chunk_size)
\ No newline at end of file
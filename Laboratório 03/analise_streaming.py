@@ -0,0 +1,254 @@
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.stats import t as t_dist
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'comum'))
+from sketches import KLLSketch
+from graficos_agregados import histogram_2d, log_edges
+
+try:
+    import pyarrow.dataset as pa_dataset
+except ImportError:  # pyarrow é opcional: sem ele, só o CSV é lido em blocos
+    pa_dataset = None
+
+# --- ANÁLISE FORA DA MEMÓRIA (DATASETS COM MILHÕES DE PRS) ---
+#
+# O dataset é lido em blocos (pd.read_csv(chunksize=...) ou os lotes de um dataset Arrow
+# particionado) e nunca inteiro. São duas passadas:
+#   1. um resumo por coluna e status (ColumnSummary) dá medianas e quartis; um resumo
+#      por coluna (todos os status) dá a distribuição usada nos postos do Spearman;
+#   2. com os quartis, os bigodes dos boxplots saem de min/max dentro das cercas; com as
+#      distribuições, cada valor vira o seu posto médio e o Spearman é a correlação de
+#      Pearson desses postos, acumulada por somas; o histograma 2-D do RQ08 é somado.
+#
+# Cada ColumnSummary guarda contagens exatas por valor enquanto a coluna tem até
+# `max_exact` valores distintos e, a partir daí, passa para um sketch KLL (comum/sketches.py).
+# A memória fica limitada pelo bloco + max_exact valores por resumo + O(k) por sketch.
+#
+# Tolerância em relação ao caminho em memória (analise.py --modo memoria):
+#   - colunas com até `max_exact` valores distintos (contagens, e as demais colunas em
+#     datasets de até ~max_exact PRs): medianas, quartis, bigodes e Spearman iguais ao
+#     pandas/scipy, a menos de arredondamento (|Δ| < 1e-9);
+#   - colunas que viraram sketch (k=200): quantis com erro de posto de ~1% (o valor
+#     devolvido está entre os quantis exatos q-0,01 e q+0,01) e |Δρ| do Spearman < 0,01;
+#     os p-valores usam a mesma aproximação t do scipy sobre o ρ aproximado.
+
+CHUNK_SIZE = 200_000
+MAX_EXACT_DISTINCT = 100_000
+SKETCH_K = 200
+DENSITY_BINS = 40
+COLUMNS = ['status', 'lines_added', 'lines_removed', 'num_files', 'analysis_time_hours',
+           'description_length', 'num_comments', 'num_participants', 'num_reviews']
+
+class ColumnSummary:
+    """Distribuição de uma coluna: contagens exatas por valor ou, acima de `max_exact` distintos, um KLLSketch."""
+
+    def __init__(self, max_exact=MAX_EXACT_DISTINCT, k=SKETCH_K):
+        self.max_exact = max_exact
+        self.k = k
+        self.counts = pd.Series(dtype=float)
+        self.sketch = None
+        self.n = 0
+
+    @property
+    def exact(self):
+        return self.sketch is None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.n += values.size
+        if self.sketch is not None:
+            self.sketch.update(values)
+            return
+        unique, counts = np.unique(values, return_counts=True)
+        self.counts = self.counts.add(pd.Series(counts, index=unique, dtype=float), fill_value=0).sort_index()
+        if len(self.counts) > self.max_exact:
+            self._to_sketch()
+
+    def _to_sketch(self, block=1_000_000):
+        """Passa as contagens para o sketch em blocos de até `block` itens repetidos."""
+        self.sketch = KLLSketch(self.k, seed=0)
+        values, counts = self.counts.index.to_numpy(), self.counts.to_numpy().astype(np.int64)
+        start = 0
+        while start < len(values):
+            end = start + max(1, int(np.searchsorted(np.cumsum(counts[start:]), block, side='right')))
+            self.sketch.update(np.repeat(values[start:end], counts[start:end]))
+            start = end
+        self.counts = None
+
+    def merge(self, other):
+        """Funde outro resumo neste (ex.: partições processadas separadamente)."""
+        if self.exact and other.exact:
+            self.counts = self.counts.add(other.counts, fill_value=0).sort_index()
+            self.n += other.n
+            if len(self.counts) > self.max_exact:
+                self._to_sketch()
+            return self
+        if self.exact:
+            self._to_sketch()
+        if other.exact:
+            other = ColumnSummary(other.max_exact, other.k).merge(other)
+            other._to_sketch()
+        self.sketch.merge(other.sketch)
+        self.n += other.n
+        return self
+
+    def quantile(self, q):
+        """Quantil q com interpolação linear (como o pandas) no modo exato; aproximado no sketch."""
+        if self.n == 0:
+            return np.nan
+        if not self.exact:
+            return self.sketch.quantile(q)
+        values, cumulative = self.counts.index.to_numpy(), self.counts.cumsum().to_numpy()
+        position = (self.n - 1) * q
+        low, high = int(np.floor(position)), int(np.ceil(position))
+        value_low = values[np.searchsorted(cumulative, low, side='right')]
+        value_high = values[np.searchsorted(cumulative, high, side='right')]
+        return value_low + (position - low) * (value_high - value_low)
+
+    def midranks(self, values):
+        """Posto médio (1 a n, empates com a média dos postos, como o rankdata) de cada valor."""
+        values = np.asarray(values, dtype=float)
+        missing = np.isnan(values)
+        if self.exact:
+            index = self.counts.index.to_numpy()
+            cumulative = np.concatenate([[0.0], self.counts.cumsum().to_numpy()])
+            below = cumulative[np.searchsorted(index, values, side='left')]
+            through = cumulative[np.searchsorted(index, values, side='right')]
+        else:
+            below, through = self.sketch.rank(values)
+            through = np.maximum(through, below + 1)  # o próprio valor está no dataset
+        return np.where(missing, np.nan, below + (through - below + 1) / 2)
+
+def iter_chunks(source, chunk_size=CHUNK_SIZE, columns=COLUMNS):
+    """Blocos de `columns` de um CSV, de um arquivo Parquet ou de um diretório com dataset Arrow (partição hive)."""
+    if os.path.isdir(source) or source.endswith('.parquet'):
+        if pa_dataset is None:
+            raise ImportError("pyarrow é necessário para ler datasets Arrow/Parquet.")
+        dataset = pa_dataset.dataset(source, format='parquet', partitioning='hive')
+        for batch in dataset.to_batches(columns=columns, batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunk_size)
+
+def prepare_chunk(chunk):
+    chunk = chunk.copy()
+    chunk['status'] = chunk['status'].astype(str)
+    chunk['total_lines'] = chunk['lines_added'] + chunk['lines_removed']
+    return chunk
+
+def csv_to_dataset(csv_path, dataset_dir, chunk_size=CHUNK_SIZE):
+    """Converte o CSV, em blocos, num dataset Parquet particionado por status (status=MERGED/, status=CLOSED/)."""
+    if pa_dataset is None:
+        raise ImportError("pyarrow é necessário para gravar o dataset Arrow.")
+    import pyarrow as pa
+    for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunk_size)):
+        pa_dataset.write_dataset(pa.Table.from_pandas(chunk, preserve_index=False), dataset_dir, format='parquet',
+                                 partitioning=['status'], partitioning_flavor='hive',
+                                 basename_template=f'parte-{i:05d}-{{i}}.parquet', existing_data_behavior='overwrite_or_ignore')
+    print(f"Dataset Arrow particionado por status salvo em '{dataset_dir}'.")
+
+def spearman_from_sums(sums, n):
+    """ρ e p-valor (aproximação t, como o scipy) a partir das somas dos postos centrados."""
+    sx, sy, sxx, syy, sxy = sums
+    covariance = sxy - sx * sy / n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rho = covariance / np.sqrt((sxx - sx * sx / n) * (syy - sy * sy / n))
+        t_stat = rho * np.sqrt((n - 2) / ((1 - rho) * (1 + rho)))
+    return float(rho), float(2 * t_dist.sf(abs(t_stat), n - 2))
+
+def analyze_streaming(source, box_columns, spearman_pairs, density_pair, chunk_size=CHUNK_SIZE,
+                      max_exact=MAX_EXACT_DISTINCT, k=SKETCH_K, bins=DENSITY_BINS, whis=1.5):
+    """Mesmos resultados de `analise.analyze_in_memory`, lendo o dataset em blocos (duas passadas)."""
+    rank_columns = list(dict.fromkeys(column for pair in spearman_pairs.values() for column in pair))
+
+    # 1ª passada: distribuições por status (medianas, quartis) e por coluna (postos)
+    by_status, overall, maxima, n = {}, {}, {}, 0
+    for chunk in iter_chunks(source, chunk_size):
+        chunk = prepare_chunk(chunk)
+        n += len(chunk)
+        for status, group in chunk.groupby('status'):
+            for column in box_columns:
+                by_status.setdefault((status, column), ColumnSummary(max_exact, k)).update(group[column].to_numpy())
+        for column in rank_columns:
+            overall.setdefault(column, ColumnSummary(max_exact, k)).update(chunk[column].to_numpy())
+        for column in density_pair:
+            maxima[column] = max(maxima.get(column, 0), chunk[column].max())
+
+    statuses = sorted({status for status, _ in by_status})
+    quartiles = {key: [summary.quantile(q) for q in (0.25, 0.5, 0.75)] for key, summary in by_status.items()}
+    fences = {key: (q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)) for key, (q1, _, q3) in quartiles.items()}
+
+    # 2ª passada: bigodes, somas dos postos e histograma 2-D
+    whiskers = {key: [np.inf, -np.inf] for key in by_status}
+    sums = {name: np.zeros(5) for name in spearman_pairs}
+    pair_counts = {name: 0 for name in spearman_pairs}
+    x_edges, y_edges = log_edges(maxima[density_pair[0]], bins), log_edges(maxima[density_pair[1]], bins)
+    density = np.zeros((len(x_edges) - 1, len(y_edges) - 1))
+    for chunk in iter_chunks(source, chunk_size):
+        chunk = prepare_chunk(chunk)
+        for status, group in chunk.groupby('status'):
+            for column in box_columns:
+                low, high = fences[(status, column)]
+                values = group[column].to_numpy(dtype=float)
+                inside = values[(values >= low) & (values <= high)]
+                if inside.size:
+                    whisker = whiskers[(status, column)]
+                    whisker[0], whisker[1] = min(whisker[0], inside.min()), max(whisker[1], inside.max())
+
+        ranks = {}
+        for column in rank_columns:
+            center = (overall[column].n + 1) / 2  # posto médio esperado: somas menores, menos erro numérico
+            ranks[column] = overall[column].midranks(chunk[column].to_numpy(dtype=float)) - center
+        for name, (x, y) in spearman_pairs.items():
+            valid = ~(np.isnan(ranks[x]) | np.isnan(ranks[y]))
+            rx, ry = ranks[x][valid], ranks[y][valid]
+            sums[name] += [rx.sum(), ry.sum(), (rx * rx).sum(), (ry * ry).sum(), (rx * ry).sum()]
+            pair_counts[name] += int(valid.sum())
+
+        data = chunk[list(density_pair)].dropna()
+        density += histogram_2d(data[density_pair[0]], data[density_pair[1]], x_edges, y_edges)
+
+    medians = pd.DataFrame({column: [quartiles[(status, column)][1] for status in statuses] for column in box_columns},
+                           index=pd.Index(statuses, name='status'))
+    boxes = {
+        column: {
+            status: {
+                'label': status,
+                'q1': quartiles[(status, column)][0],
+                'med': quartiles[(status, column)][1],
+                'q3': quartiles[(status, column)][2],
+                'whislo': whiskers[(status, column)][0],
+                'whishi': whiskers[(status, column)][1],
+                'n': by_status[(status, column)].n,
+            }
+            for status in statuses
+        }
+        for column in box_columns
+    }
+    spearman = {name: spearman_from_sums(sums[name], pair_counts[name]) for name in spearman_pairs}
+    approximated = sorted({column for (_, column), summary in by_status.items() if not summary.exact}
+                          | {column for column, summary in overall.items() if not summary.exact})
+    return {
+        'n': n,
+        'medians': medians,
+        'boxes': boxes,
+        'spearman': spearman,
+        'density': (density, x_edges, y_edges),
+        'approximated': approximated,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Converte o dataset de PRs do Lab03 num dataset Arrow particionado por status.")
+    parser.add_argument('csv', nargs='?', default='github_prs_dataset.csv')
+    parser.add_argument('dataset_dir', nargs='?', default='github_prs_dataset')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+    csv_to_dataset(args.csv, args.dataset_dir, args.chunk_size)
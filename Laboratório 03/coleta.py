@@ -1,5 +1,10 @@
 import os
+import sys
+import json
 import time
+import shutil
+import asyncio
+import argparse
 from datetime import datetime, timedelta
 from dotenv import load_dotenv 
 
@@ -7,10 +12,17 @@ import pandas as pd
 import requests
 from tqdm import tqdm
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'comum'))
+from http_cache import HTTPCache
+from request_metrics import RequestMetrics, endpoint_class
+from token_pool import TokenPool, load_tokens
+
 load_dotenv()  
 
 
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
+# GITHUB_TOKENS (vários, separados por vírgula) ou GITHUB_TOKEN no .env
+GITHUB_TOKENS = load_tokens()
+GITHUB_API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
 
 REPOSITORIES = [
     "freeCodeCamp/freeCodeCamp", "vuejs/vue", "facebook/react", "tensorflow/tensorflow",
@@ -23,38 +35,200 @@ REPOSITORIES = [
 ]
 
 HEADERS = {
-    'Authorization': f'token {GITHUB_TOKEN}',
     'Accept': 'application/vnd.github.v3+json'
 }
 
 OUTPUT_CSV_FILE = 'github_prs_dataset.csv'
+SHARDS_DIR = 'coleta_shards'    # um JSONL por repositório + manifest.jsonl (permite retomar a coleta)
 MAX_PRS_PER_REPO = 500  
 
+# 'graphql': uma query paginada por repositório; 'rest': lista + reviews + detalhes + comentários por PR
+COLLECTION_BACKEND = 'graphql'
+GRAPHQL_URL = f'{GITHUB_API_URL}/graphql'
+GRAPHQL_PAGE_SIZE = 50
+
+MAX_CONCURRENT_REPOS = 8        # repositórios coletados ao mesmo tempo
+MAX_CONCURRENT_REQUESTS = 16    # requisições em voo (e conexões no pool HTTP)
+MAX_REQUESTS_PER_SECOND = 10    # ritmo máximo por recurso, abaixo do limite secundário do GitHub
+UNSPECIFIED_LIMIT_PAUSE = 60    # pausa em 403/429 de limite sem Retry-After nem cota zerada
+
+# Cache HTTP em disco (None desliga): listas são revalidadas por ETag (304 não gasta cota);
+# reviews, detalhes e comentários de PRs já fechados são reaproveitados sem requisição
+HTTP_CACHE_FILE = 'http_cache.sqlite'
+CLOSED_PR_TTL = 30 * 24 * 3600
+GRAPHQL_CACHE_TTL = 12 * 3600   # GraphQL não tem ETag: só reaproveitamento por tempo
 
+# Métricas por endpoint (contagens, latência, bytes, novas tentativas, tempo esperando cota)
+METRICS_PREFIX = 'metricas_coleta'   # gera metricas_coleta.json e metricas_coleta.csv
+METRICS_PROMETHEUS = False           # True também grava metricas_coleta.prom (formato texto do Prometheus)
 
-def get_api_data(url: str):
+
+class RateLimiter:
     """
-    Faz uma requisição GET à API do GitHub com tratamento de limite de taxa (rate limit).
+    Token bucket compartilhado por todas as corrotinas, com um balde por recurso da API
+    ('core' para o REST, 'graphql' para o GraphQL).
+
+    As fichas são liberadas a no máximo `max_per_second` por segundo (rajada de `burst`),
+    abaixo do limite secundário de requisições por minuto. A cota de cada token (cabeçalhos
+    `X-RateLimit-Remaining`/`X-RateLimit-Reset`) fica com o `TokenPool`, que só faz a coleta
+    esperar quando todos os tokens esgotam. Um `Retry-After` pausa todas as requisições
+    pelo tempo pedido.
+    """
+
+    def __init__(self, max_per_second: float = 10, burst: int = 20):
+        self.max_per_second = max_per_second
+        self.burst = burst
+        self.buckets = {}
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _bucket(self, resource: str):
+        return self.buckets.setdefault(resource, {'tokens': float(self.burst), 'updated': time.monotonic()})
+
+    async def acquire(self, resource: str):
+        while True:
+            async with self.lock:
+                now = time.monotonic()
+                bucket = self._bucket(resource)
+                wait = self.paused_until - now
+                if wait <= 0:
+                    bucket['tokens'] = min(self.burst, bucket['tokens'] + (now - bucket['updated']) * self.max_per_second)
+                    bucket['updated'] = now
+                    if bucket['tokens'] >= 1:
+                        bucket['tokens'] -= 1
+                        return
+                    wait = (1 - bucket['tokens']) / self.max_per_second
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Suspende todas as requisições por `seconds` segundos."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def create_session():
+    """
+    Sessão HTTP com pool de conexões do tamanho da concorrência máxima (keep-alive entre requisições).
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENT_REQUESTS)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+class APIClient:
     """
+    Recursos compartilhados por todas as corrotinas da coleta: pool HTTP, limiter,
+    pool de tokens, limite de requisições em voo e cache HTTP em disco.
+    """
+
+    def __init__(self, tokens, cache_file: str = None, metrics: RequestMetrics = None):
+        self.session = create_session()
+        self.limiter = RateLimiter(MAX_REQUESTS_PER_SECOND)
+        self.tokens = TokenPool(tokens)
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.cache = HTTPCache(cache_file) if cache_file else None
+        self.metrics = metrics or RequestMetrics()
+
+    def close(self):
+        self.session.close()
+        if self.cache:
+            self.cache.close()
+
+
+async def acquire_token(client: APIClient, resource: str):
+    """
+    Reserva o token com mais cota no recurso; só espera se todos estiverem esgotados.
+    """
+    while True:
+        token, wait = client.tokens.choose(resource)
+        if token is not None:
+            return token
+        tqdm.write(f"Todos os tokens esgotaram a cota de '{resource}'. Aguardando por {wait:.0f} segundos.")
+        with client.metrics.blocking(f"quota:{resource}"):
+            await asyncio.sleep(wait)
+
+
+async def send_request(client: APIClient, method: str, url: str, resource: str, ttl: float = 0, **kwargs):
+    """
+    Envia uma requisição respeitando o limiter e a concorrência máxima, com o token de mais
+    folga; trata rate limits e erros de conexão. Retorna a resposta (qualquer status que não
+    seja de rate limit). Com cache, uma resposta dentro do `ttl` volta sem requisição e as
+    demais são condicionais (ETag/Last-Modified).
+    """
+    endpoint = endpoint_class(url, kwargs.get('json', {}).get('query'))
+    conditional = {}
+    if client.cache:
+        cached, conditional = client.cache.lookup(method, url, json_body=kwargs.get('json'), ttl=ttl, scope=client.tokens.scope)
+        if cached is not None:
+            with client.metrics.track(endpoint) as call:
+                call['response'] = cached
+            return cached
+
     while True:
+        response = None
         try:
-            response = requests.get(url, headers=HEADERS, timeout=30)
-            if response.status_code == 200:
-                return response.json()
-            elif response.status_code == 403 and 'rate limit' in response.text.lower():
-                reset_time = int(response.headers.get('X-RateLimit-Reset', time.time() + 60))
-                sleep_duration = max(reset_time - time.time() + 5, 1) 
-                tqdm.write(f"Rate limit atingido. Aguardando por {sleep_duration:.0f} segundos.")
-                time.sleep(sleep_duration)
-            elif response.status_code == 404:
-                tqdm.write(f"Recurso não encontrado (404): {url}")
-                return None
-            else:
-                tqdm.write(f"Erro ao acessar a API (Status {response.status_code}) para a URL: {url}")
-                return None
+            async with client.semaphore:
+                # a ficha e o token são pegos já com a vaga garantida: nada fica "reservado" esperando na fila
+                with client.metrics.blocking('limiter'):
+                    await client.limiter.acquire(resource)
+                token = await acquire_token(client, resource)
+                try:
+                    with client.metrics.track(endpoint) as call:
+                        call['response'] = await asyncio.to_thread(client.session.request, method, url,
+                                                                   headers={**conditional, **client.tokens.headers(token)}, **kwargs)
+                    response = call['response']
+                finally:
+                    # sempre devolve a reserva (inclusive em cancelamento): sem resposta, sem cabeçalhos de cota
+                    client.tokens.release(token, resource, response.headers if response is not None else None)
         except requests.exceptions.RequestException as e:
+            client.metrics.retry(endpoint)
             tqdm.write(f"Erro de conexão: {e}. Tentando novamente em 30 segundos.")
-            time.sleep(30)
+            with client.metrics.blocking('backoff'):
+                await asyncio.sleep(30)
+            continue
+
+        if response.status_code in (403, 429) and 'Retry-After' in response.headers:
+            # limite secundário: o GitHub diz quanto esperar e vale para todas as requisições
+            sleep_duration = int(response.headers['Retry-After'])
+            tqdm.write(f"Limite secundário atingido. Aguardando por {sleep_duration} segundos.")
+            client.limiter.pause(sleep_duration)
+            client.metrics.retry(endpoint)
+        elif response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0':
+            # o pool já marcou este token como esgotado: a nova tentativa vai para outro
+            tqdm.write(f"Rate limit atingido em um dos {len(client.tokens.tokens)} tokens.")
+            client.metrics.retry(endpoint)
+        elif response.status_code == 429 or (response.status_code == 403 and 'rate limit' in response.text.lower()):
+            # limite secundário sem Retry-After: pausa padrão para todas as requisições e nova tentativa
+            tqdm.write(f"Limite secundário sem Retry-After. Aguardando por {UNSPECIFIED_LIMIT_PAUSE} segundos.")
+            client.limiter.pause(UNSPECIFIED_LIMIT_PAUSE)
+            client.metrics.retry(endpoint)
+        elif client.cache:
+            return client.cache.resolve(method, url, response, json_body=kwargs.get('json'), scope=client.tokens.scope)
+        else:
+            return response
+
+
+class FetchError(Exception):
+    """
+    Falha ao buscar um recurso (erro da API que não é rate limit nem 404). O PR ou o
+    repositório afetado não entra no manifesto e é buscado de novo na próxima execução.
+    """
+
+
+async def get_api_data(client, url: str, ttl: float = 0):
+    """
+    Faz uma requisição GET à API do GitHub com tratamento de limite de taxa (rate limit).
+    Retorna None se o recurso não existir (404) e levanta FetchError nos demais erros.
+    """
+    response = await send_request(client, 'GET', url, 'core', ttl, timeout=30)
+    if response.status_code == 200:
+        return response.json()
+    elif response.status_code == 404:
+        tqdm.write(f"Recurso não encontrado (404): {url}")
+        return None
+    raise FetchError(f"Erro ao acessar a API (Status {response.status_code}) para a URL: {url}")
 
 
 def parse_iso_datetime(date_str: str):
@@ -65,121 +239,415 @@ def parse_iso_datetime(date_str: str):
         return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
     return None
 
-def get_pull_requests(repo_owner: str, repo_name: str):
+async def post_graphql(client, query: str, variables: dict):
+    """
+    Executa uma query GraphQL com o mesmo tratamento de rate limit de `get_api_data`.
+    Em 502/504 (query pesada demais) a página é reduzida pela metade.
+    Retorna None se o recurso não existir (erro NOT_FOUND) e levanta FetchError nos demais erros.
+    """
+    while True:
+        response = await send_request(client, 'POST', GRAPHQL_URL, 'graphql', GRAPHQL_CACHE_TTL,
+                                      json={'query': query, 'variables': variables}, timeout=60)
+        if response.status_code == 200:
+            body = response.json()
+            if 'errors' not in body:
+                return body['data']
+            if all(error.get('type') == 'NOT_FOUND' for error in body['errors']):
+                tqdm.write(f"Recurso não encontrado na API GraphQL: {body['errors']}")
+                return None
+            raise FetchError(f"Erro retornado pela API GraphQL: {body['errors']}")
+        elif response.status_code in (502, 504) and variables.get('first', 1) > 1:
+            variables['first'] = max(1, variables['first'] // 2)
+            client.metrics.retry(endpoint_class(GRAPHQL_URL, query))
+            tqdm.write(f"Erro {response.status_code} na API GraphQL. Página reduzida para {variables['first']} PRs.")
+        else:
+            raise FetchError(f"Erro ao acessar a API GraphQL (Status {response.status_code}).")
+
+
+async def get_pull_requests(client, repo_owner: str, repo_name: str):
     """
     Busca Pull Requests (merged e closed) de um repositório, com paginação.
+    A primeira página vem antes; as demais são pedidas em paralelo.
     """
-    prs = []
-    base_url = f"https://api.github.com/repos/{repo_owner}/{repo_name}/pulls?state=closed&per_page=100"
+    base_url = f"{GITHUB_API_URL}/repos/{repo_owner}/{repo_name}/pulls?state=closed&per_page=100"
     
     max_pages = MAX_PRS_PER_REPO // 100
     
-    for page in range(1, max_pages + 1):
-        paginated_url = f"{base_url}&page={page}"
-        data = get_api_data(paginated_url)
+    first_page = await get_api_data(client, f"{base_url}&page=1")
+    if not first_page:
+        return []
+    pages = await asyncio.gather(*(get_api_data(client, f"{base_url}&page={page}") for page in range(2, max_pages + 1)))
+
+    prs = list(first_page)
+    for data in pages:
         if not data:
             break
         prs.extend(data)
-        time.sleep(1) 
     
     return prs
 
 
-def main():
+PULL_REQUESTS_QUERY = """
+query PullRequests($owner: String!, $name: String!, $first: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(states: [MERGED, CLOSED], first: $first, after: $cursor, orderBy: {field: CREATED_AT, direction: DESC}) {
+      totalCount
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        number
+        merged
+        createdAt
+        closedAt
+        updatedAt
+        additions
+        deletions
+        changedFiles
+        body
+        author { login }
+        comments(first: 100) { totalCount nodes { author { login } } }
+        reviews(first: 100) { totalCount nodes { author { login } comments { totalCount } } }
+      }
+    }
+  }
+}
+"""
+
+
+def build_pr_record(repo_full_name: str, number: int, merged: bool, created_at, closed_at, last_activity_at,
+                    num_files: int, lines_added: int, lines_removed: int, body: str,
+                    participants: set, num_comments: int, num_reviews: int):
     """
-    Função principal para orquestrar a coleta e processamento dos dados.
+    Monta a linha do dataset (mesmo esquema do 'github_prs_dataset.csv' para os dois backends).
     """
-    if not GITHUB_TOKEN:
-        print("ERRO: A variável de ambiente 'GITHUB_TOKEN' não está definida.")
-        print("Por favor, defina a variável com seu token de acesso pessoal do GitHub e tente novamente.")
-        return
+    analysis_time_hours = (last_activity_at - created_at).total_seconds() / 3600 if last_activity_at else 0
+    return {
+        'repo': repo_full_name,
+        'pr_number': number,
+        'status': 'MERGED' if merged else 'CLOSED',
+        'num_files': num_files,
+        'lines_added': lines_added,
+        'lines_removed': lines_removed,
+        'analysis_time_hours': round(analysis_time_hours, 2),
+        'description_length': len(body or ''),
+        'num_participants': len(participants),
+        'num_comments': num_comments,
+        'num_reviews': num_reviews,
+        'created_at': created_at.isoformat(),
+        'closed_at': closed_at.isoformat()
+    }
+
+
+def graphql_pr_record(repo_full_name: str, pr: dict):
+    """
+    Monta a linha do dataset a partir de um nó da query GraphQL (None se o PR não atender aos critérios).
+    """
+    created_at = parse_iso_datetime(pr['createdAt'])
+    closed_at = parse_iso_datetime(pr.get('closedAt'))
+
+    if not closed_at: return None
+
+    if (closed_at - created_at) <= timedelta(hours=1):
+        return None
+
+    reviews = pr['reviews']
+    if reviews['totalCount'] == 0:
+        return None
+
+    participants = {pr['author']['login']} if pr.get('author') else set()
+    for node in pr['comments']['nodes'] + reviews['nodes']:
+        if node.get('author'): participants.add(node['author']['login'])
+
+    # comentários da issue + comentários de revisão (linha a linha), como no REST
+    review_comments = sum(review['comments']['totalCount'] for review in reviews['nodes'])
 
-    all_prs_data = []
+    return build_pr_record(
+        repo_full_name, pr['number'], pr['merged'], created_at, closed_at, parse_iso_datetime(pr['updatedAt']),
+        pr['changedFiles'], pr['additions'], pr['deletions'], pr['body'],
+        participants, pr['comments']['totalCount'] + review_comments, reviews['totalCount'])
 
-    print("Iniciando a coleta de dados dos Pull Requests...")
+
+async def collect_repository_graphql(client, repo_full_name: str, writer):
+    """
+    Coleta os PRs (merged e closed) de um repositório com uma query GraphQL paginada:
+    tamanho, descrição, reviews e autores de comentários/reviews vêm todos na mesma página.
+    Cada PR é entregue ao `writer` assim que a página chega (os já gravados são pulados) e
+    o cursor da próxima página fica no manifesto, de onde uma execução interrompida continua.
+    Retorna False se o repositório tiver menos de 100 PRs fechados ou não existir; uma
+    página que não pôde ser buscada levanta FetchError.
+    """
+    owner, name = repo_full_name.split('/')
+    done = writer.done_prs(repo_full_name)
+    cursor, fetched = writer.resume_point(repo_full_name)
+
+    while fetched < MAX_PRS_PER_REPO:
+        variables = {'owner': owner, 'name': name, 'first': min(GRAPHQL_PAGE_SIZE, MAX_PRS_PER_REPO - fetched), 'cursor': cursor}
+        data = await post_graphql(client, PULL_REQUESTS_QUERY, variables)
+        if not data or not data.get('repository'):
+            return False
+        connection = data['repository']['pullRequests']
+        if cursor is None and connection['totalCount'] < 100:
+            return False
+
+        for pr in connection['nodes']:
+            fetched += 1
+            if pr['number'] not in done:
+                writer.add(repo_full_name, pr['number'], graphql_pr_record(repo_full_name, pr))
+
+        if not connection['pageInfo']['hasNextPage']:
+            break
+        cursor = connection['pageInfo']['endCursor']
+        writer.checkpoint(repo_full_name, cursor, fetched)
+
+    return True
+
+
+async def collect_pr_rest(client, repo_full_name: str, pr: dict):
+    """
+    Busca reviews, detalhes e comentários de um PR pela API REST e monta a linha do dataset
+    (None se o PR não atender aos critérios de coleta).
+    """
+    created_at = parse_iso_datetime(pr['created_at'])
+    closed_at = parse_iso_datetime(pr.get('closed_at'))
+
+    if not closed_at: return None
+
+    if (closed_at - created_at) <= timedelta(hours=1):
+        return None
+
+    reviews_url = pr['_links']['self']['href'] + '/reviews'
+    reviews_data = await get_api_data(client, reviews_url, CLOSED_PR_TTL)
+
+    if not reviews_data or len(reviews_data) == 0:
+        return None
+    
+    pr_details_url = pr['url']
+    pr_details = await get_api_data(client, pr_details_url, CLOSED_PR_TTL)
     
-    for repo_full_name in tqdm(REPOSITORIES, desc="Progresso dos Repositórios"):
-        owner, name = repo_full_name.split('/')
-        
-        pull_requests = get_pull_requests(owner, name)
+    if not pr_details:
+        return None
 
-        if len(pull_requests) < 100:
-            tqdm.write(f"Repositório '{repo_full_name}' ignorado (possui menos de 100 PRs fechados).")
-            continue
+    comments_data = await get_api_data(client, pr_details['_links']['comments']['href'], CLOSED_PR_TTL)
+    participants = {pr_details['user']['login']}
+    
+    if comments_data:
+        for comment in comments_data:
+            if comment.get('user'): participants.add(comment['user']['login'])
+    
+    for review in reviews_data:
+        if review.get('user'): participants.add(review['user']['login'])
+    
+    num_comments = pr_details.get('comments', 0) + pr_details.get('review_comments', 0)
 
-        for pr in tqdm(pull_requests, desc=f"Analisando PRs de '{name}'", leave=False):
-            created_at = parse_iso_datetime(pr['created_at'])
-            closed_at = parse_iso_datetime(pr.get('closed_at'))
+    return build_pr_record(
+        repo_full_name, pr['number'], pr_details.get('merged'), created_at, closed_at, parse_iso_datetime(pr['updated_at']),
+        pr_details.get('changed_files', 0), pr_details.get('additions', 0), pr_details.get('deletions', 0),
+        pr_details.get('body'), participants, num_comments, len(reviews_data))
 
-            if not closed_at: continue
 
-            if (closed_at - created_at) <= timedelta(hours=1):
-                continue
+async def collect_repository_rest(client, repo_full_name: str, writer):
+    """
+    Coleta os PRs de um repositório pela API REST: a lista paginada e, para cada PR,
+    reviews, detalhes e comentários (os PRs são processados em paralelo e cada um vai
+    para o `writer` ao terminar; os já gravados são pulados).
+    Retorna False se o repositório tiver menos de 100 PRs fechados. Se a lista ou algum
+    PR não puder ser buscado, levanta FetchError (depois de gravar os PRs que deram certo).
+    """
+    owner, name = repo_full_name.split('/')
+    pull_requests = await get_pull_requests(client, owner, name)
 
-            reviews_url = pr['_links']['self']['href'] + '/reviews'
-            reviews_data = get_api_data(reviews_url)
+    if len(pull_requests) < 100:
+        return False
 
-            if not reviews_data or len(reviews_data) == 0:
-                continue
-            
-            pr_details_url = pr['url']
-            pr_details = get_api_data(pr_details_url)
-            
-            if not pr_details:
+    done = writer.done_prs(repo_full_name)
+    failed = []
+
+    async def collect(pr):
+        try:
+            record = await collect_pr_rest(client, repo_full_name, pr)
+        except FetchError as e:
+            tqdm.write(str(e))
+            failed.append(pr['number'])
+            return
+        writer.add(repo_full_name, pr['number'], record)
+
+    await asyncio.gather(*(collect(pr) for pr in pull_requests if pr['number'] not in done))
+    if failed:
+        raise FetchError(f"{len(failed)} PRs de '{repo_full_name}' não puderam ser buscados.")
+    return True
+
+
+COLLECTORS = {
+    'graphql': collect_repository_graphql,
+    'rest': collect_repository_rest,
+}
+
+
+class DatasetWriter:
+    """
+    Grava as linhas do dataset em disco à medida que são coletadas, em lotes, num shard
+    JSONL por repositório, e mantém um manifesto (também JSONL, só de acréscimo) com os
+    PRs já processados, o cursor da próxima página de cada repositório e os repositórios
+    concluídos.
+
+    Cada lote entra primeiro no shard e só depois no manifesto: após uma queda, tudo o
+    que o manifesto lista está no disco (um PR pode aparecer duas vezes no shard, o que
+    `export_csv` resolve). PRs descartados pelos critérios também entram no manifesto,
+    para não serem buscados de novo; PRs e repositórios cuja busca falhou (FetchError)
+    nunca são passados ao writer e ficam para a próxima execução.
+    """
+
+    def __init__(self, directory: str, batch_size: int = 50):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.manifest_path = os.path.join(directory, 'manifest.jsonl')
+        self.pending = {}
+        self.processed = {}
+        self.cursors = {}
+        self.finished = {}
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # última linha incompleta de uma execução interrompida
+                    if 'finished' in entry:
+                        self.finished[entry['repo']] = entry['skipped']
+                    elif 'cursor' in entry:
+                        self.cursors[entry['repo']] = (entry['cursor'], entry['fetched'])
+                    else:
+                        self.processed.setdefault(entry['repo'], set()).add(entry['pr_number'])
+
+    def shard_path(self, repo_full_name: str):
+        return os.path.join(self.directory, repo_full_name.replace('/', '__') + '.jsonl')
+
+    def done_prs(self, repo_full_name: str):
+        return self.processed.get(repo_full_name, set())
+
+    def resume_point(self, repo_full_name: str):
+        """Cursor da próxima página e PRs já percorridos (None, 0 se o repositório não foi iniciado)."""
+        return self.cursors.get(repo_full_name, (None, 0))
+
+    def add(self, repo_full_name: str, pr_number: int, record):
+        """Registra um PR processado (`record` None se ele não entrou no dataset)."""
+        batch = self.pending.setdefault(repo_full_name, [])
+        batch.append((pr_number, record))
+        if len(batch) >= self.batch_size:
+            self.flush(repo_full_name)
+
+    def _append(self, path: str, entries):
+        with open(path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def flush(self, repo_full_name: str):
+        batch = self.pending.pop(repo_full_name, [])
+        if not batch:
+            return
+        self._append(self.shard_path(repo_full_name), [record for _, record in batch if record is not None])
+        self._append(self.manifest_path, [{'repo': repo_full_name, 'pr_number': number} for number, _ in batch])
+        self.processed.setdefault(repo_full_name, set()).update(number for number, _ in batch)
+
+    def checkpoint(self, repo_full_name: str, cursor: str, fetched: int):
+        """Grava os PRs pendentes do repositório e, depois deles, o cursor da próxima página."""
+        self.flush(repo_full_name)
+        self._append(self.manifest_path, [{'repo': repo_full_name, 'cursor': cursor, 'fetched': fetched}])
+        self.cursors[repo_full_name] = (cursor, fetched)
+
+    def finish_repo(self, repo_full_name: str, skipped: bool):
+        self.flush(repo_full_name)
+        self._append(self.manifest_path, [{'repo': repo_full_name, 'finished': True, 'skipped': skipped}])
+        self.finished[repo_full_name] = skipped
+
+    def export_csv(self, path: str, repositories):
+        """
+        Junta os shards em `path`, na ordem de `repositories`, um repositório por vez
+        (a memória fica limitada a um shard). Retorna o número de linhas escritas.
+        """
+        total = 0
+        if os.path.exists(path):
+            os.remove(path)
+        for repo_full_name in repositories:
+            shard = self.shard_path(repo_full_name)
+            if not os.path.exists(shard) or os.path.getsize(shard) == 0:
                 continue
+            df = pd.read_json(shard, lines=True, dtype=False, convert_dates=False).drop_duplicates('pr_number', keep='last')
+            df.to_csv(path, mode='a', header=total == 0, index=False, encoding='utf-8')
+            total += len(df)
+        return total
+
+
+async def collect_all(repositories, writer: DatasetWriter, metrics: RequestMetrics = None):
+    """
+    Coleta vários repositórios ao mesmo tempo, com um pool HTTP e um limiter compartilhados,
+    gravando tudo pelo `writer`. Repositórios já concluídos no manifesto são pulados; um
+    repositório cuja busca falhou não é marcado como concluído e volta na próxima execução.
+    """
+    collect_repository = COLLECTORS[COLLECTION_BACKEND]
+    client = APIClient(GITHUB_TOKENS, HTTP_CACHE_FILE, metrics)
+    repo_slots = asyncio.Semaphore(MAX_CONCURRENT_REPOS)
+    pending = [repo for repo in repositories if repo not in writer.finished]
+    progress = tqdm(total=len(repositories), initial=len(repositories) - len(pending), desc="Progresso dos Repositórios")
+
+    async def collect(repo_full_name):
+        async with repo_slots:
+            try:
+                has_enough_prs = await collect_repository(client, repo_full_name, writer)
+            except FetchError as e:
+                tqdm.write(f"{e} Repositório '{repo_full_name}' fica pendente para a próxima execução.")
+                return
+        writer.finish_repo(repo_full_name, skipped=not has_enough_prs)
+        progress.update(1)
+        if not has_enough_prs:
+            tqdm.write(f"Repositório '{repo_full_name}' ignorado (possui menos de 100 PRs fechados).")
+
+    try:
+        await asyncio.gather(*(collect(repo_full_name) for repo_full_name in pending))
+    finally:
+        # o que já foi coletado de repositórios incompletos também fica no disco
+        for repo_full_name in list(writer.pending):
+            writer.flush(repo_full_name)
+        progress.close()
+        client.close()
+
+
+def main():
+    """
+    Função principal para orquestrar a coleta e processamento dos dados.
+    """
+    parser = argparse.ArgumentParser(description="Coleta de Pull Requests para o Lab03.")
+    parser.add_argument('--fresh', action='store_true', help="descarta os shards e o manifesto e coleta tudo de novo")
+    args = parser.parse_args()
+
+    if not GITHUB_TOKENS:
+        print("ERRO: A variável de ambiente 'GITHUB_TOKEN' não está definida.")
+        print("Por favor, defina a variável com seu token de acesso pessoal do GitHub (ou vários em 'GITHUB_TOKENS', separados por vírgula) e tente novamente.")
+        return
+
+    if args.fresh and os.path.exists(SHARDS_DIR):
+        shutil.rmtree(SHARDS_DIR)
+    writer = DatasetWriter(SHARDS_DIR)
+    if writer.processed or writer.finished:
+        print(f"Retomando a coleta: {len(writer.finished)} repositórios concluídos e "
+              f"{sum(len(prs) for prs in writer.processed.values())} PRs já processados em '{SHARDS_DIR}'.")
+
+    print(f"Iniciando a coleta de dados dos Pull Requests (backend {COLLECTION_BACKEND})...")
+    metrics = RequestMetrics()
+    try:
+        asyncio.run(collect_all(REPOSITORIES, writer, metrics))
+    finally:
+        metrics.write(METRICS_PREFIX, prometheus=METRICS_PROMETHEUS)
 
-          
-            status = 'MERGED' if pr_details.get('merged') else 'CLOSED'
-            
-            num_files = pr_details.get('changed_files', 0)
-            lines_added = pr_details.get('additions', 0)
-            lines_removed = pr_details.get('deletions', 0)
-            
-            last_activity_at = parse_iso_datetime(pr['updated_at'])
-            analysis_time_hours = (last_activity_at - created_at).total_seconds() / 3600 if last_activity_at else 0
-            
-            description_length = len(pr_details.get('body') or '')
-            
-            comments_data = get_api_data(pr_details['_links']['comments']['href'])
-            participants = {pr_details['user']['login']}
-            
-            if comments_data:
-                for comment in comments_data:
-                    if comment.get('user'): participants.add(comment['user']['login'])
-            
-            for review in reviews_data:
-                if review.get('user'): participants.add(review['user']['login'])
-            
-            num_participants = len(participants)
-            num_comments = pr_details.get('comments', 0) + pr_details.get('review_comments', 0)
-            
-  
-            num_reviews = len(reviews_data)
-
-            all_prs_data.append({
-                'repo': repo_full_name,
-                'pr_number': pr['number'],
-                'status': status,
-                'num_files': num_files,
-                'lines_added': lines_added,
-                'lines_removed': lines_removed,
-                'analysis_time_hours': round(analysis_time_hours, 2),
-                'description_length': description_length,
-                'num_participants': num_participants,
-                'num_comments': num_comments,
-                'num_reviews': num_reviews,
-                'created_at': created_at.isoformat(),
-                'closed_at': closed_at.isoformat()
-            })
-
-    if not all_prs_data:
+    total = writer.export_csv(OUTPUT_CSV_FILE, REPOSITORIES)
+    if not total:
         print("\nNenhum Pull Request atendeu a todos os critérios de coleta.")
         return
 
-    df = pd.DataFrame(all_prs_data)
-    df.to_csv(OUTPUT_CSV_FILE, index=False, encoding='utf-8')
     print(f"\nColeta finalizada com sucesso!")
-    print(f"{len(df)} Pull Requests foram coletados e salvos em '{OUTPUT_CSV_FILE}'.")
+    print(f"{total} Pull Requests foram coletados e salvos em '{OUTPUT_CSV_FILE}'.")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,100 @@
+import numpy as np
+import seaborn as sns
+
+# --- GRÁFICOS DESENHADOS A PARTIR DE RESUMOS (CUSTO INDEPENDENTE DO Nº DE PRS) ---
+#
+# Boxplots: os quartis de todas as colunas saem de um único groupby().quantile() e os
+# bigodes (regra de Tukey, 1,5 × IQR) de um groupby().min()/max() sobre os valores dentro
+# dos limites; o ax.bxp só desenha as caixas já resumidas.
+# Dispersão: em vez de amostrar pontos, os PRs são contados num histograma 2-D com
+# faixas logarítmicas (o zero tem faixa própria) e desenhados como mapa de densidade.
+# Contagens de histogramas com as mesmas faixas podem ser somadas, o que permite montar
+# o gráfico em partes.
+
+STATUS_ORDER = ['MERGED', 'CLOSED']
+PALETTE = "pastel"
+
+def box_stats(df, columns, by='status', whis=1.5):
+    """{coluna: {grupo: estatísticas do ax.bxp}} para todas as `columns` de uma vez."""
+    grouped = df.groupby(by, observed=True)[columns]
+    quartiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()  # linhas: grupos; colunas: (coluna, quantil)
+    q1 = quartiles.xs(0.25, axis=1, level=1)
+    q3 = quartiles.xs(0.75, axis=1, level=1)
+    iqr = q3 - q1
+
+    # bigodes: valor mais extremo dentro de [q1 - whis*IQR, q3 + whis*IQR] em cada grupo
+    groups = df[by]
+    low = (q1 - whis * iqr).reindex(groups).set_axis(df.index)
+    high = (q3 + whis * iqr).reindex(groups).set_axis(df.index)
+    values = df[columns]
+    inside = values.where((values >= low) & (values <= high))
+    whislo = inside.groupby(groups, observed=True).min()
+    whishi = inside.groupby(groups, observed=True).max()
+    counts = grouped.count()
+
+    return {
+        column: {
+            group: {
+                'label': group,
+                'q1': q1.at[group, column],
+                'med': quartiles.at[group, (column, 0.5)],
+                'q3': q3.at[group, column],
+                'whislo': whislo.at[group, column],
+                'whishi': whishi.at[group, column],
+                'n': int(counts.at[group, column]),
+            }
+            for group in quartiles.index
+        }
+        for column in columns
+    }
+
+def draw_boxplot(ax, stats, order=STATUS_ORDER, palette=PALETTE):
+    """Desenha as caixas de `stats` ({grupo: estatísticas}) na ordem pedida, sem outliers."""
+    present = [group for group in order if group in stats]
+    boxes = ax.bxp([stats[group] for group in present], showfliers=False, patch_artist=True, widths=0.6,
+                   medianprops={'color': '0.25', 'linewidth': 1.5})
+    for patch, color in zip(boxes['boxes'], sns.color_palette(palette, len(present))):
+        patch.set_facecolor(color)
+    ax.set_xticks(range(1, len(present) + 1), present)
+    return boxes
+
+def log_edges(max_value, bins=40):
+    """Faixas [0, 1) e depois logarítmicas de 1 até `max_value` (valores inteiros não negativos)."""
+    top = max(float(max_value), 1.0) + 1
+    # arredondadas para inteiros: nenhuma faixa fica sem valores possíveis no início da escala
+    return np.unique(np.concatenate([[0.0], np.round(np.geomspace(1.0, top, bins)), [np.ceil(top)]]))
+
+def histogram_2d(x, y, x_edges, y_edges):
+    """Contagem de PRs por célula (x × y); contagens com as mesmas faixas podem ser somadas."""
+    counts, _, _ = np.histogram2d(np.asarray(x, dtype=float), np.asarray(y, dtype=float), bins=[x_edges, y_edges])
+    return counts
+
+def bin_centers(edges):
+    """Valor representativo de cada faixa: o próprio inteiro nas faixas de largura 1, a média geométrica nas demais."""
+    low, high = edges[:-1], edges[1:]
+    return np.where(high - low <= 1, low, np.sqrt(low * high))
+
+def binned_median(counts, y_edges, min_count=10):
+    """Mediana aproximada de y em cada faixa de x (faixas com menos de `min_count` PRs ficam em NaN)."""
+    totals = counts.sum(axis=1)
+    cumulative = counts.cumsum(axis=1)
+    index = (cumulative < (totals / 2)[:, None]).sum(axis=1).clip(max=len(y_edges) - 2)
+    return np.where(totals >= min_count, bin_centers(y_edges)[index], np.nan)
+
+def draw_density(ax, counts, x_edges, y_edges, cmap='viridis', trend_color='red'):
+    """Mapa de densidade (escala log nas contagens e nos eixos, com o zero visível) e a linha das medianas."""
+    masked = np.ma.masked_equal(counts.T, 0)
+    mesh = ax.pcolormesh(x_edges, y_edges, masked, cmap=cmap, norm='log', shading='flat')
+    ax.figure.colorbar(mesh, ax=ax, label='Nº de PRs')
+
+    medians = binned_median(counts, y_edges)
+    ax.plot(bin_centers(x_edges), medians, color=trend_color, linewidth=2, marker='o', markersize=3, label='Mediana por faixa')
+    ax.set_xscale('symlog', linthresh=1)
+    ax.set_yscale('symlog', linthresh=1)
+    # eixos só até as faixas ocupadas
+    rows, columns = np.nonzero(counts)
+    if len(rows):
+        ax.set_xlim(x_edges[rows.min()], x_edges[rows.max() + 1])
+        ax.set_ylim(y_edges[columns.min()], y_edges[columns.max() + 1])
+    ax.legend(loc='upper left')
+    return mesh
@@ -1,22 +1,29 @@
 import os
+import sys
 import requests
 import pandas as pd
 import time
 from dotenv import load_dotenv  
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'comum'))
+from http_cache import HTTPCache
+from token_pool import TokenPool, load_tokens
+from request_metrics import RequestMetrics, endpoint_class
+
 load_dotenv() 
 
 
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN') 
-if not GITHUB_TOKEN:
+# GITHUB_TOKENS (vários, separados por vírgula) ou GITHUB_TOKEN: cada página vai para o token com mais cota de busca
+GITHUB_TOKENS = load_tokens()
+if not GITHUB_TOKENS:
     raise EnvironmentError("Variável de ambiente GITHUB_TOKEN não configurada. Verifique seu arquivo .env")
+TOKENS = TokenPool(GITHUB_TOKENS)
 
 HEADERS = {
-    'Authorization': f'token {GITHUB_TOKEN}',
     'Accept': 'application/vnd.github.v3+json'
 }
 
-API_URL = 'https://api.github.com/search/repositories'
+API_URL = os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/') + '/search/repositories'
 
 
 TOPICOS_DE_BUSCA = {
@@ -27,82 +34,148 @@ TOPICOS_DE_BUSCA = {
 
 PAGINAS_POR_TOPICO = 10
 RESULTADOS_POR_PAGINA = 100
-
-dados_finais = []
-
-print("Iniciando a coleta de dados da API do GitHub...")
-
-
-for categoria, query in TOPICOS_DE_BUSCA.items():
+PAUSA_ENTRE_PAGINAS = 2.5   # segundos entre páginas da busca (limite de 30 buscas por minuto)
+ESPERA_LIMITE_SEM_CABECALHO = 60   # 403/429 sem Retry-After nem cota zerada: espera inicial (dobra a cada repetição)
+ESPERA_MAXIMA = 15 * 60
+
+# Cache HTTP em disco: dentro do TTL a página sai do disco; depois, é revalidada por ETag.
+# O arquivo só é aberto durante a coleta (importar o módulo não cria nada no disco)
+ARQUIVO_CACHE_HTTP = 'http_cache.sqlite'
+CACHE_TTL = 6 * 3600
+
+# Métricas por endpoint (requisições, latência, bytes, tempo esperando cota) gravadas no fim
+METRICAS = RequestMetrics()
+METRICAS_PREFIXO = 'metricas_coleta'   # metricas_coleta.json / metricas_coleta.csv
+METRICAS_PROMETHEUS = False            # também grava metricas_coleta.prom
+ENDPOINT = endpoint_class(API_URL)
+
+def coletar(topicos=TOPICOS_DE_BUSCA, paginas_por_topico=PAGINAS_POR_TOPICO, pausa=PAUSA_ENTRE_PAGINAS):
+    """Busca as páginas de cada tópico e devolve uma linha por repositório encontrado."""
+    cache_http = HTTPCache(ARQUIVO_CACHE_HTTP)
+    try:
+        return coletar_topicos(topicos, paginas_por_topico, pausa, cache_http)
+    finally:
+        cache_http.close()
+
+def buscar_pagina(cache_http, params):
+    """Busca uma página com o token de mais cota; a reserva do token é sempre devolvida ao pool."""
+    with METRICAS.blocking('quota:search'):
+        token = TOKENS.acquire('search')
+    response = None
+    try:
+        with METRICAS.track(ENDPOINT) as chamada:
+            chamada['response'] = cache_http.request(requests, 'GET', API_URL, CACHE_TTL, headers={**HEADERS, **TOKENS.headers(token)},
+                                                     params=params, scope=TOKENS.scope)
+        response = chamada['response']
+    finally:
+        # sem resposta (erro de conexão) ou página lida do disco: nada gastou cota
+        TOKENS.release(token, 'search', None if response is None or response.from_cache == 'fresh' else response.headers)
+    return response
+
+def coletar_topicos(topicos, paginas_por_topico, pausa, cache_http):
+    """Percorre as páginas de cada tópico usando o cache HTTP já aberto."""
+    dados_finais = []
+
+    for categoria, query in topicos.items():
     
-    print(f"\nBuscando categoria: '{categoria}' (Query: '{query}')")
+        print(f"\nBuscando categoria: '{categoria}' (Query: '{query}')")
     
-    for page_num in range(1, PAGINAS_POR_TOPICO + 1):
+        page_num, bloqueios_seguidos = 1, 0
+        while page_num <= paginas_por_topico:
         
-        params = {
-            'q': query,
-            'sort': 'stars',  
-            'order': 'desc',
-            'per_page': RESULTADOS_POR_PAGINA,
-            'page': page_num
-        }
+            params = {
+                'q': query,
+                'sort': 'stars',  
+                'order': 'desc',
+                'per_page': RESULTADOS_POR_PAGINA,
+                'page': page_num
+            }
         
-        try:
-            response = requests.get(API_URL, headers=HEADERS, params=params)
+            try:
+                response = buscar_pagina(cache_http, params)
             
-            if response.status_code == 200:
-                data = response.json()
-                items = data.get('items', [])
+                if response.status_code == 200:
+                    data = response.json()
+                    items = data.get('items', [])
                 
-                if not items:
-                    print(f"  Página {page_num}: Não encontrou mais resultados. Terminando este tópico.")
-                    break  
+                    if not items:
+                        print(f"  Página {page_num}: Não encontrou mais resultados. Terminando este tópico.")
+                        break  
                 
-                print(f"  Página {page_num}: Coletando {len(items)} repositórios...")
+                    print(f"  Página {page_num}: Coletando {len(items)} repositórios...")
                 
-                for repo in items:
-                    dados_repo = {
-                        'categoria': categoria,
-                        'nome_repo': repo.get('name'),
-                        'url': repo.get('html_url'),
-                        'stargazers_count': repo.get('stargazers_count'),
-                        'forks_count': repo.get('forks_count'),
-                        'open_issues_count': repo.get('open_issues_count'),
-                        'language': repo.get('language'),
-                        'license_name': repo.get('license', {}).get('name') if repo.get('license') else None,
-                        'created_at': repo.get('created_at'),
-                        'pushed_at': repo.get('pushed_at')
-                    }
-                    dados_finais.append(dados_repo)
+                    for repo in items:
+                        dados_repo = {
+                            'categoria': categoria,
+                            'nome_repo': repo.get('name'),
+                            'url': repo.get('html_url'),
+                            'stargazers_count': repo.get('stargazers_count'),
+                            'forks_count': repo.get('forks_count'),
+                            'open_issues_count': repo.get('open_issues_count'),
+                            'language': repo.get('language'),
+                            'license_name': repo.get('license', {}).get('name') if repo.get('license') else None,
+                            'created_at': repo.get('created_at'),
+                            'pushed_at': repo.get('pushed_at')
+                        }
+                        dados_finais.append(dados_repo)
                 
                
-                time.sleep(2.5) 
+                    if response.from_cache != 'fresh':  # página lida do disco não conta no limite da busca
+                        with METRICAS.blocking('quota:search'):
+                            time.sleep(pausa) 
+                    page_num, bloqueios_seguidos = page_num + 1, 0
                 
-            elif response.status_code == 403:
-                print(f"  Erro 403: Atingiu o Rate Limit da API. Aguardando 60 segundos...")
-                print(f"  Mensagem do GitHub: {response.json().get('message')}")
-                print(f"  Headers de limite: {response.headers.get('X-RateLimit-Remaining')} restantes.")
-                time.sleep(60)
-            else:
-                print(f"  Erro ao buscar página {page_num}. Status: {response.status_code}")
-                print(f"  Mensagem: {response.text}")
-                break 
-
-        except requests.exceptions.RequestException as e:
-            print(f"Ocorreu um erro de rede ou conexão: {e}")
-            print("Aguardando 30 segundos antes de tentar novamente...")
-            time.sleep(30)
-        except Exception as e:
-            print(f"Ocorreu um erro inesperado: {e}")
-            break
-
-
-if dados_finais:
-    df = pd.DataFrame(dados_finais)
-    
-    nome_arquivo = 'github_dataset_alternativo.csv'
-    df.to_csv(nome_arquivo, index=False, encoding='utf-8')
-    
-    print(f"\nColeta concluída! {len(df)} registros salvos em '{nome_arquivo}'.")
-else:
-    print("\nColeta concluída, mas nenhum dado foi salvo.")
\ No newline at end of file
+                elif response.status_code in (403, 429) and 'Retry-After' in response.headers:
+                    # limite secundário: espera o tempo pedido e repete a mesma página
+                    retry_after = int(response.headers['Retry-After'])
+                    print(f"  Erro {response.status_code}: limite secundário da API. Aguardando {retry_after} segundos...")
+                    print(f"  Mensagem do GitHub: {response.json().get('message')}")
+                    METRICAS.retry(ENDPOINT)
+                    with METRICAS.blocking('retry-after'):
+                        time.sleep(retry_after)
+                elif response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0':
+                    # cota do token esgotada: o pool já sabe, então a mesma página vai para outro
+                    # token (ou espera o X-RateLimit-Reset, se todos estiverem esgotados)
+                    print(f"  Erro {response.status_code}: cota de busca de um dos {len(TOKENS.tokens)} tokens esgotada. Repetindo a página {page_num}...")
+                    METRICAS.retry(ENDPOINT)
+                elif response.status_code in (403, 429):
+                    # limite secundário sem Retry-After: espera com recuo exponencial e repete a página
+                    espera = min(ESPERA_MAXIMA, ESPERA_LIMITE_SEM_CABECALHO * 2 ** bloqueios_seguidos)
+                    bloqueios_seguidos += 1
+                    print(f"  Erro {response.status_code} sem Retry-After. Aguardando {espera} segundos antes de repetir a página {page_num}...")
+                    print(f"  Mensagem: {response.text}")
+                    METRICAS.retry(ENDPOINT)
+                    with METRICAS.blocking('backoff'):
+                        time.sleep(espera)
+                else:
+                    print(f"  Erro ao buscar página {page_num}. Status: {response.status_code}")
+                    print(f"  Mensagem: {response.text}")
+                    break 
+
+            except requests.exceptions.RequestException as e:
+                print(f"Ocorreu um erro de rede ou conexão: {e}")
+                print("Aguardando 30 segundos antes de tentar novamente...")
+                METRICAS.retry(ENDPOINT)
+                with METRICAS.blocking('backoff'):
+                    time.sleep(30)
+            except Exception as e:
+                print(f"Ocorreu um erro inesperado: {e}")
+                break
+
+    return dados_finais
+
+
+if __name__ == '__main__':
+    print("Iniciando a coleta de dados da API do GitHub...")
+    dados_finais = coletar()
+    METRICAS.write(METRICAS_PREFIXO, prometheus=METRICAS_PROMETHEUS)
+
+    if dados_finais:
+        df = pd.DataFrame(dados_finais)
+
+        nome_arquivo = 'github_dataset_alternativo.csv'
+        df.to_csv(nome_arquivo, index=False, encoding='utf-8')
+
+        print(f"\nColeta concluída! {len(df)} registros salvos em '{nome_arquivo}'.")
+    else:
+        print("\nColeta concluída, mas nenhum dado foi salvo.")
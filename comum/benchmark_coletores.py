@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import csv
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_github import MockGitHub
+
+# --- BENCHMARK DE VAZÃO DOS COLETORES CONTRA A API DE TESTE ---
+#
+# Para cada coletor e cada escala (nº de registros), sobe um MockGitHub novo, roda o
+# coletor num subprocesso (diretório temporário próprio, GITHUB_API_URL apontando para o
+# mock) e mede o tempo de parede da coleta, as requisições atendidas pelo servidor e o
+# resumo do RequestMetrics do coletor (o que limitou a execução: rede, cota ou CPU).
+#
+# Por padrão o mock não impõe cota nem o teto de 1000 resultados da busca, e os ritmos
+# fixos dos coletores (limiter do Lab03, pausa entre páginas do Lab04) são desligados: o
+# número medido é o custo do próprio coletor. Com --keep-pacing esses ritmos são mantidos.
+# O Lab02 é medido só na fase de metadados (clones e CK não passam pela API).
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCALES = [1_000, 10_000, 100_000]
+LAB03_PRS_PER_REPO = 500
+
+COLLECTORS = {
+    "lab01-minerador": {"lab": "Laboratório 01", "unit": "repositórios"},
+    "lab02-metadados": {"lab": "Laboratório 02", "unit": "repositórios"},
+    "lab03-graphql": {"lab": "Laboratório 03", "unit": "PRs"},
+    "lab03-rest": {"lab": "Laboratório 03", "unit": "PRs"},
+    "lab04-busca": {"lab": "Laboratório 04", "unit": "repositórios"},
+}
+
+# --- drivers (rodam no subprocesso, com o laboratório no sys.path e cwd temporário) ---
+
+def drive_lab01(records, keep_pacing):
+    import minerador
+    minerador.TOTAL_REPOS = records
+    start = time.perf_counter()
+    rows = len(minerador.mine_repositories())
+    return rows, time.perf_counter() - start, minerador.METRICS
+
+def drive_lab02(records, keep_pacing):
+    import analise_completa
+    from request_metrics import RequestMetrics
+    from token_pool import TokenPool, load_tokens
+    metrics = RequestMetrics()
+    start = time.perf_counter()
+    rows = sum(1 for _ in analise_completa.fetch_repository_metadata(TokenPool(load_tokens()), records, 100, metrics=metrics))
+    return rows, time.perf_counter() - start, metrics
+
+def drive_lab03(backend):
+    def drive(records, keep_pacing):
+        import coleta
+        from request_metrics import RequestMetrics
+        coleta.COLLECTION_BACKEND = backend
+        coleta.MAX_PRS_PER_REPO = LAB03_PRS_PER_REPO
+        coleta.HTTP_CACHE_FILE = None
+        if not keep_pacing:
+            coleta.MAX_REQUESTS_PER_SECOND = 1e9
+        repositories = [f"bench/repo-{i}" for i in range(math.ceil(records / LAB03_PRS_PER_REPO))]
+        writer = coleta.DatasetWriter(coleta.SHARDS_DIR)
+        metrics = RequestMetrics()
+        start = time.perf_counter()
+        asyncio.run(coleta.collect_all(repositories, writer, metrics))
+        rows = writer.export_csv(coleta.OUTPUT_CSV_FILE, repositories)
+        return rows, time.perf_counter() - start, metrics
+    return drive
+
+def drive_lab04(records, keep_pacing):
+    import coleta
+    topics = {f"Tópico {i}": f"topic:benchmark-{i}" for i in range(math.ceil(records / 1000))}
+    pause = coleta.PAUSA_ENTRE_PAGINAS if keep_pacing else 0
+    start = time.perf_counter()
+    rows = len(coleta.coletar(topics, 1000 // coleta.RESULTADOS_POR_PAGINA, pause))
+    return rows, time.perf_counter() - start, coleta.METRICAS
+
+DRIVERS = {
+    "lab01-minerador": drive_lab01,
+    "lab02-metadados": drive_lab02,
+    "lab03-graphql": drive_lab03("graphql"),
+    "lab03-rest": drive_lab03("rest"),
+    "lab04-busca": drive_lab04,
+}
+
+def run_driver(name, records, keep_pacing):
+    """Modo subprocesso: roda o coletor e imprime o resultado numa linha 'RESULTADO {json}'."""
+    sys.path.insert(0, os.path.join(ROOT, COLLECTORS[name]["lab"]))
+    rows, wall, metrics = DRIVERS[name](records, keep_pacing)
+    summary = metrics.summary()
+    print("RESULTADO " + json.dumps({"rows": rows, "wall_seconds": wall, "bound_by": summary["bound_by"],
+                                      "time_breakdown_seconds": summary["time_breakdown_seconds"]}))
+
+# --- orquestração ---
+
+def benchmark(name, records, args):
+    """Roda um coletor numa escala contra um mock novo e devolve a linha do relatório."""
+    mock_repos = 1 if name.startswith("lab03") else records + 1000
+    unlimited = None if args.realistic_quota else {"core": 10**9, "search": 10**9, "graphql": 10**9}
+    mock = MockGitHub(repos=mock_repos, prs_per_repo=LAB03_PRS_PER_REPO, latency=args.latency,
+                      latency_per_node=args.latency_per_node, error_rate=args.error_rate,
+                      rate_limits=unlimited, window=args.window, secondary_limit=args.secondary_limit,
+                      retry_after=args.retry_after, search_cap=1000 if args.realistic_quota else None,
+                      seed=args.seed).start()
+    tokens = ",".join(f"token-benchmark-{i}" for i in range(args.tokens))
+    env = {**os.environ, "GITHUB_API_URL": mock.url, "GITHUB_TOKENS": tokens, "GITHUB_TOKEN": tokens.split(",")[0],
+           "MPLBACKEND": "Agg"}
+    command = [sys.executable, os.path.abspath(__file__), "--driver", name, "--records", str(records)]
+    if args.keep_pacing:
+        command.append("--keep-pacing")
+
+    row = {"collector": name, "records": records, "unit": COLLECTORS[name]["unit"]}
+    try:
+        with tempfile.TemporaryDirectory(prefix=f"bench_{name}_") as workdir:
+            process = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True, timeout=args.timeout)
+        result = next((json.loads(line[len("RESULTADO "):]) for line in reversed(process.stdout.splitlines())
+                       if line.startswith("RESULTADO ")), None)
+        if result is None:
+            print(f"{name} ({records}) falhou:\n{process.stderr[-2000:]}")
+            return {**row, "status": "falhou"}
+    except subprocess.TimeoutExpired:
+        print(f"{name} ({records}) passou do limite de {args.timeout}s.")
+        return {**row, "status": "timeout", "requests": mock.requests_total}
+    finally:
+        mock.stop()
+
+    requests_total = mock.requests_total
+    wall = result["wall_seconds"]
+    return {
+        **row,
+        "status": "ok",
+        "rows": result["rows"],
+        "requests": requests_total,
+        "wall_seconds": round(wall, 2),
+        "requests_per_second": round(requests_total / wall, 1) if wall else None,
+        "records_per_second": round(records / wall, 1) if wall else None,
+        "bound_by": result["bound_by"],
+        "routes": json.dumps(mock.stats_by_route()),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão dos coletores dos laboratórios contra a API de teste (comum/mock_github.py).")
+    parser.add_argument("--collectors", nargs="+", choices=list(COLLECTORS), default=list(COLLECTORS))
+    parser.add_argument("--scales", nargs="+", type=int, default=SCALES, help="nº de registros por execução")
+    parser.add_argument("--latency", type=float, default=0.02, help="latência base do mock (s)")
+    parser.add_argument("--latency-per-node", type=float, default=0.0002, help="latência por item devolvido (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tokens", type=int, default=2, help="nº de tokens falsos no GITHUB_TOKENS")
+    parser.add_argument("--realistic-quota", action="store_true",
+                        help="cotas padrão do GitHub (5000/30/5000 por janela) e teto de 1000 resultados na busca")
+    parser.add_argument("--window", type=int, default=3600, help="janela da cota do mock (s)")
+    parser.add_argument("--secondary-limit", type=int, default=None, help="requisições por token por minuto antes do 403 secundário")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--keep-pacing", action="store_true", help="mantém os ritmos fixos configurados nos coletores")
+    parser.add_argument("--timeout", type=int, default=3600, help="limite por execução (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="salva o relatório em CSV")
+    parser.add_argument("--driver", choices=list(COLLECTORS), help=argparse.SUPPRESS)
+    parser.add_argument("--records", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.driver:
+        return run_driver(args.driver, args.records, args.keep_pacing)
+
+    report = []
+    for name in args.collectors:
+        for records in args.scales:
+            print(f"Rodando {name} com {records} {COLLECTORS[name]['unit']}...")
+            row = benchmark(name, records, args)
+            report.append(row)
+            if row["status"] == "ok":
+                print(f"  {row['wall_seconds']:.1f}s, {row['requests']} requisições "
+                      f"({row['requests_per_second']} req/s, {row['records_per_second']} registros/s), limitado por {row['bound_by']}.")
+
+    columns = ["collector", "records", "unit", "status", "rows", "requests", "wall_seconds",
+               "requests_per_second", "records_per_second", "bound_by", "routes"]
+    print("\n" + " | ".join(columns[:-1]))
+    for row in report:
+        print(" | ".join(str(row.get(column, "")) for column in columns[:-1]))
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows({column: row.get(column) for column in columns} for row in report)
+        print(f"\nRelatório salvo em '{args.output}'.")
+
+if __name__ == "__main__":
+    main()
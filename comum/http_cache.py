@@ -0,0 +1,130 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# --- CACHE HTTP EM DISCO PARA OS COLETORES DA API DO GITHUB ---
+#
+# Guarda o corpo de cada resposta 200 junto com ETag/Last-Modified, indexado por
+# método + URL (com parâmetros) + corpo enviado + escopo de autenticação (hash do
+# cabeçalho Authorization, nunca o token em si; com um pool de tokens, o escopo do
+# pool, para que a resposta valha qualquer que seja o token usado). Numa nova execução:
+#   - dentro do `ttl` pedido pelo coletor, a resposta sai do disco sem requisição;
+#   - depois disso, um GET vira requisição condicional (If-None-Match /
+#     If-Modified-Since); um 304 reaproveita o corpo guardado e não gasta cota REST.
+# POSTs (GraphQL) não têm revalidação: só são reaproveitados dentro do `ttl`.
+
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+def _auth_scope(headers, scope=None):
+    if scope is not None:
+        return scope
+    token = (headers or {}).get("Authorization", "")
+    return hashlib.sha256(token.encode()).hexdigest()[:16] if token else "anonymous"
+
+class HTTPCache:
+    """Cache SQLite de respostas HTTP com revalidação por ETag/Last-Modified e reaproveitamento por TTL."""
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS http_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                stored_at REAL NOT NULL
+            )""")
+        self.conn.commit()
+
+    def key(self, method, url, headers=None, params=None, json_body=None, scope=None):
+        prepared = requests.Request(method, url, params=params).prepare().url
+        body = json.dumps(json_body, sort_keys=True) if json_body is not None else ""
+        raw = "\n".join([method.upper(), prepared, body, _auth_scope(headers, scope)])
+        return hashlib.sha256(raw.encode()).hexdigest(), prepared
+
+    def _load(self, key):
+        with self.lock:
+            return self.conn.execute("SELECT headers, body, stored_at FROM http_cache WHERE key = ?", (key,)).fetchone()
+
+    def _to_response(self, url, stored_headers, body, from_cache, extra_headers=None):
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response.headers = CaseInsensitiveDict(json.loads(stored_headers))
+        # cabeçalhos de rate limit do 304 continuam visíveis para quem faz o controle de cota
+        response.headers.update({k: v for k, v in (extra_headers or {}).items() if k.lower().startswith("x-ratelimit")})
+        response.from_cache = from_cache
+        return response
+
+    def lookup(self, method, url, headers=None, params=None, json_body=None, ttl=0, scope=None):
+        """Consulta o cache antes da requisição.
+
+        Devolve (resposta, cabeçalhos_condicionais): a resposta guardada se ainda estiver
+        dentro do `ttl` (segundos), senão None e os cabeçalhos a somar na requisição.
+        """
+        key, prepared = self.key(method, url, headers, params, json_body, scope)
+        row = self._load(key)
+        if row is None:
+            return None, {}
+        stored_headers, body, stored_at = row
+        if ttl and time.time() - stored_at < ttl:
+            return self._to_response(prepared, stored_headers, body, "fresh"), {}
+        if method.upper() != "GET":
+            return None, {}
+        validators = CaseInsensitiveDict(json.loads(stored_headers))
+        conditional = {}
+        if validators.get("ETag"):
+            conditional["If-None-Match"] = validators["ETag"]
+        if validators.get("Last-Modified"):
+            conditional["If-Modified-Since"] = validators["Last-Modified"]
+        return None, conditional
+
+    def resolve(self, method, url, response, headers=None, params=None, json_body=None, scope=None):
+        """Trata a resposta recebida: um 304 vira a resposta guardada; um 200 é gravado."""
+        key, prepared = self.key(method, url, headers, params, json_body, scope)
+        if response.status_code == 304:
+            row = self._load(key)
+            if row is None:
+                return response
+            with self.lock:
+                self.conn.execute("UPDATE http_cache SET stored_at = ? WHERE key = ?", (time.time(), key))
+                self.conn.commit()
+            return self._to_response(prepared, row[0], row[1], "revalidated", response.headers)
+
+        response.from_cache = None
+        if response.status_code != 200:
+            return response
+        if method.upper() != "GET":
+            # GraphQL responde 200 mesmo com erro: esse corpo não deve ser reaproveitado
+            try:
+                if "errors" in response.json():
+                    return response
+            except ValueError:
+                return response
+        stored_headers = json.dumps({name: response.headers[name] for name in STORED_HEADERS if name in response.headers})
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?)",
+                              (key, prepared, stored_headers, response.content, time.time()))
+            self.conn.commit()
+        return response
+
+    def request(self, session, method, url, ttl=0, headers=None, params=None, json=None, scope=None, **kwargs):
+        """Versão síncrona completa: consulta, faz a requisição (condicional) e grava.
+
+        `session` pode ser um requests.Session ou o próprio módulo requests.
+        """
+        cached, conditional = self.lookup(method, url, headers, params, json, ttl, scope)
+        if cached is not None:
+            return cached
+        response = session.request(method, url, headers={**(headers or {}), **conditional}, params=params, json=json, **kwargs)
+        return self.resolve(method, url, response, headers, params, json, scope)
+
+    def close(self):
+        self.conn.close()
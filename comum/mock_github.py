@@ -0,0 +1,554 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# --- SERVIDOR LOCAL QUE IMITA A API DO GITHUB ---
+#
+# Serve dados sintéticos (determinísticos pela `seed`) nos endpoints que os coletores
+# dos laboratórios usam:
+#   REST:    /search/repositories, /repos/{o}/{r}/pulls, /pulls/{n}, /pulls/{n}/reviews,
+#            /pulls/{n}/comments, /issues/{n}/comments, /rate_limit
+#   GraphQL: /graphql com search(...), nodes(ids: ...) e repository(...) { pullRequests }
+# com latência, taxa de erros, cabeçalhos X-RateLimit-* (cota por token e por recurso),
+# limite secundário (403 + Retry-After) e ETag/304 configuráveis. Basta apontar
+# GITHUB_API_URL para `server.url`.
+#
+# Os repositórios sintéticos são ordenados por estrelas (todas distintas); na busca, só o
+# qualificador `stars:` filtra (`stars:a..b`, `stars:>=n`, `stars:>n`, `stars:n`), os demais
+# (language:, topic:, sort:) são aceitos e ignorados. Qualquer `owner/nome` tem
+# `prs_per_repo` PRs fechados.
+
+LANGUAGES = ["Java", "Python", "JavaScript", "TypeScript", "Go", "C++", "Rust", None]
+MIN_STARS = 2
+STAR_STEP = 7
+EPOCH = datetime(2015, 1, 1, tzinfo=timezone.utc)
+
+def _iso(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+class MockGitHub:
+    """Servidor HTTP (em thread própria) com a API sintética; use `start()`/`stop()` ou `with`.
+
+    `rate_limits` é a cota por token em cada recurso, renovada a cada `window` segundos.
+    `secondary_limit` requisições por token a cada `secondary_window` segundos (ou mais de
+    `max_concurrent` em voo) devolvem 403 com `Retry-After: retry_after`. Uma fração
+    `error_rate` das requisições recebe `error_status`. A latência de cada resposta é
+    `latency + latency_per_node * itens` (± `jitter`).
+    """
+
+    def __init__(self, repos=1000, prs_per_repo=500, latency=0.0, latency_per_node=0.0, jitter=0.0,
+                 error_rate=0.0, error_status=502, rate_limits=None, window=3600,
+                 secondary_limit=None, secondary_window=60, max_concurrent=None, retry_after=60,
+                 search_cap=1000, seed=0, host="127.0.0.1", port=0):
+        self.repos = repos
+        self.prs_per_repo = prs_per_repo
+        self.latency = latency
+        self.latency_per_node = latency_per_node
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limits = {"core": 5000, "search": 30, "graphql": 5000, **(rate_limits or {})}
+        self.window = window
+        self.secondary_limit = secondary_limit
+        self.secondary_window = secondary_window
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self.search_cap = search_cap
+        self.seed = seed
+        self.address = (host, port)
+
+        self.lock = threading.Lock()
+        self.quota = {}
+        self.recent = {}
+        self.in_flight = 0
+        self.stats = Counter()
+        self.random = random.Random(seed)
+        self.server = None
+
+    # --- ciclo de vida ---
+
+    def start(self):
+        handler = type("Handler", (_Handler,), {"mock": self})
+        self.server = ThreadingHTTPServer(self.address, handler)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 256
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests_total(self):
+        with self.lock:
+            return sum(self.stats.values())
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats.clear()
+
+    def stats_by_route(self):
+        """{rota: {status: contagem}} (ex.: {'graphql:search': {'200': 10, '403': 1}})."""
+        with self.lock:
+            routes = {}
+            for (route, status), count in sorted(self.stats.items()):
+                routes.setdefault(route, {})[str(status)] = count
+            return routes
+
+    # --- dados sintéticos ---
+
+    def _rng(self, *key):
+        return random.Random(":".join(map(str, (self.seed, *key))))
+
+    def stars(self, index):
+        return MIN_STARS + STAR_STEP * (self.repos - 1 - index)
+
+    def repository(self, index):
+        """Repositório de posição `index` no ranking (superconjunto dos campos pedidos pelos coletores)."""
+        rng = self._rng("repo", index)
+        name = f"repo-{index}"
+        owner = f"org{index % 97}"
+        created = EPOCH + timedelta(days=rng.randint(0, 3000))
+        pushed = created + timedelta(days=rng.randint(0, 600))
+        language = LANGUAGES[index % len(LANGUAGES)]
+        return {
+            "index": index,
+            "id": f"R_{index}",
+            "name": name,
+            "owner": owner,
+            "nameWithOwner": f"{owner}/{name}",
+            "url": f"https://github.com/{owner}/{name}",
+            "stars": self.stars(index),
+            "forks": rng.randint(0, 5000),
+            "open_issues": rng.randint(0, 500),
+            "language": language,
+            "license": rng.choice(["MIT License", "Apache License 2.0", None]),
+            "createdAt": _iso(created),
+            "pushedAt": _iso(pushed),
+            "diskUsage": rng.randint(100, 500_000),
+            "releases": rng.randint(0, 300),
+            "mergedPullRequests": rng.randint(0, 20_000),
+            "issues": (issues := rng.randint(0, 20_000)),
+            "closedIssues": rng.randint(0, issues),
+            "oid": hashlib.sha1(f"{self.seed}:{index}".encode()).hexdigest(),
+        }
+
+    def graphql_repository(self, repo):
+        return {
+            "id": repo["id"],
+            "name": repo["name"],
+            "nameWithOwner": repo["nameWithOwner"],
+            "url": repo["url"],
+            "stargazers": {"totalCount": repo["stars"]},
+            "stargazerCount": repo["stars"],
+            "createdAt": repo["createdAt"],
+            "pushedAt": repo["pushedAt"],
+            "diskUsage": repo["diskUsage"],
+            "primaryLanguage": {"name": repo["language"]} if repo["language"] else None,
+            "releases": {"totalCount": repo["releases"]},
+            "pullRequests": {"totalCount": repo["mergedPullRequests"]},
+            "issues": {"totalCount": repo["issues"]},
+            "closedIssues": {"totalCount": repo["closedIssues"]},
+            "defaultBranchRef": {"target": {"oid": repo["oid"]}},
+        }
+
+    def rest_repository(self, repo):
+        return {
+            "id": repo["index"],
+            "name": repo["name"],
+            "full_name": repo["nameWithOwner"],
+            "html_url": repo["url"],
+            "stargazers_count": repo["stars"],
+            "forks_count": repo["forks"],
+            "open_issues_count": repo["open_issues"],
+            "language": repo["language"],
+            "license": {"name": repo["license"]} if repo["license"] else None,
+            "created_at": repo["createdAt"],
+            "pushed_at": repo["pushedAt"],
+        }
+
+    def search(self, query):
+        """Posições (range) dos repositórios que atendem ao qualificador `stars:` de `query`."""
+        low, high = MIN_STARS, self.stars(0)
+        for qualifier in re.findall(r"stars:(\S+)", query or ""):
+            if ".." in qualifier:
+                a, b = qualifier.split("..")
+                low, high = max(low, int(a) if a != "*" else low), min(high, int(b) if b != "*" else high)
+            elif qualifier.startswith(">="):
+                low = max(low, int(qualifier[2:]))
+            elif qualifier.startswith(">"):
+                low = max(low, int(qualifier[1:]) + 1)
+            elif qualifier.startswith("<="):
+                high = min(high, int(qualifier[2:]))
+            elif qualifier.startswith("<"):
+                high = min(high, int(qualifier[1:]) - 1)
+            else:
+                low, high = max(low, int(qualifier)), min(high, int(qualifier))
+        # estrelas decrescem de STAR_STEP em STAR_STEP com a posição
+        first = max(0, -(-(self.stars(0) - high) // STAR_STEP))
+        last = min(self.repos - 1, (self.stars(0) - low) // STAR_STEP)
+        return range(first, last + 1) if first <= last else range(0)
+
+    def pull_request(self, full_name, number):
+        rng = self._rng("pr", full_name, number)
+        created = EPOCH + timedelta(days=3000) - timedelta(hours=number * 7 + rng.randint(0, 6))
+        # ~10% fecham em menos de 1 h e ~15% não têm review: os critérios do Lab03 descartam esses
+        open_hours = rng.uniform(0.1, 0.9) if rng.random() < 0.1 else rng.uniform(1.5, 24 * 30)
+        closed = created + timedelta(hours=open_hours)
+        reviewers = [f"reviewer{rng.randint(0, 50)}" for _ in range(0 if rng.random() < 0.15 else rng.randint(1, 4))]
+        commenters = [f"user{rng.randint(0, 200)}" for _ in range(rng.randint(0, 6))]
+        return {
+            "number": number,
+            "merged": rng.random() < 0.7,
+            "created": created,
+            "closed": closed,
+            "updated": closed + timedelta(minutes=rng.randint(0, 120)),
+            "additions": rng.randint(0, 2000),
+            "deletions": rng.randint(0, 1000),
+            "changed_files": rng.randint(1, 60),
+            "body": "x" * rng.randint(0, 800),
+            "author": f"author{rng.randint(0, 300)}",
+            "reviewers": reviewers,
+            "review_comments": [rng.randint(0, 5) for _ in reviewers],
+            "commenters": commenters,
+        }
+
+    def pr_numbers(self):
+        """Números dos PRs de qualquer repositório, do mais novo para o mais antigo."""
+        return range(self.prs_per_repo, 0, -1)
+
+    # --- limites ---
+
+    def check_limits(self, token, resource):
+        """Cobra uma requisição; devolve (status ou None, cabeçalhos de rate limit, Retry-After ou None)."""
+        now = time.time()
+        with self.lock:
+            if self.max_concurrent is not None and self.in_flight > self.max_concurrent:
+                return 403, {}, self.retry_after
+            if self.secondary_limit is not None:
+                recent = self.recent.setdefault(token, deque())
+                while recent and recent[0] <= now - self.secondary_window:
+                    recent.popleft()
+                if len(recent) >= self.secondary_limit:
+                    return 403, {}, self.retry_after
+                recent.append(now)
+
+            state = self.quota.setdefault((token, resource), {"used": 0, "reset": int(now) + self.window})
+            if now >= state["reset"]:
+                state["used"], state["reset"] = 0, int(now) + self.window
+            limit = self.rate_limits.get(resource, 5000)
+            exceeded = state["used"] >= limit
+            if not exceeded:
+                state["used"] += 1
+            headers = {
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Remaining": str(max(0, limit - state["used"])),
+                "X-RateLimit-Used": str(state["used"]),
+                "X-RateLimit-Reset": str(state["reset"]),
+                "X-RateLimit-Resource": resource,
+            }
+            return (403 if exceeded else None), headers, None
+
+    def refund(self, token, resource):
+        """Devolve a cobrança de uma requisição condicional respondida com 304 (não gasta cota no GitHub)."""
+        with self.lock:
+            state = self.quota.get((token, resource))
+            if state and state["used"] > 0:
+                state["used"] -= 1
+
+    def rate_limit_node(self, token):
+        with self.lock:
+            state = self.quota.get((token, "graphql"), {"used": 0, "reset": int(time.time()) + self.window})
+            return {
+                "cost": 1,
+                "remaining": max(0, self.rate_limits["graphql"] - state["used"]),
+                "resetAt": _iso(datetime.fromtimestamp(state["reset"], timezone.utc)),
+            }
+
+    def delay(self, nodes):
+        seconds = self.latency + self.latency_per_node * nodes
+        if self.jitter:
+            seconds += self.random.uniform(-self.jitter, self.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    # --- rotas REST ---
+
+    def rest(self, path, query):
+        """Devolve (rota, recurso, status, corpo, nº de itens) de um GET."""
+        base = self.url
+        params = {key: values[-1] for key, values in parse_qs(query).items()}
+        per_page = min(100, int(params.get("per_page", 30)))
+        page = max(1, int(params.get("page", 1)))
+        offset = (page - 1) * per_page
+
+        if path == "/rate_limit":
+            return "rest:rate_limit", None, 200, {"resources": {}}, 0
+
+        if path == "/search/repositories":
+            if self.search_cap is not None and offset >= self.search_cap:
+                return "rest:search", "search", 422, {"message": "Only the first 1000 search results are available"}, 0
+            matches = self.search(params.get("q", ""))
+            end = min(offset + per_page, len(matches), self.search_cap or len(matches))
+            items = [self.rest_repository(self.repository(i)) for i in matches[offset:end]]
+            return "rest:search", "search", 200, {"total_count": len(matches), "incomplete_results": False, "items": items}, len(items)
+
+        match = re.fullmatch(r"/repos/([^/]+)/([^/]+)/(pulls|issues)(?:/(\d+))?(?:/(reviews|comments))?", path)
+        if not match:
+            return "rest:outros", "core", 404, {"message": "Not Found"}, 0
+        owner, name, kind, number, sub = match.groups()
+        full_name = f"{owner}/{name}"
+        repo_url = f"{base}/repos/{full_name}"
+
+        if kind == "pulls" and number is None:
+            numbers = list(self.pr_numbers())[offset:offset + per_page]
+            items = []
+            for n in numbers:
+                pr = self.pull_request(full_name, n)
+                items.append({
+                    "number": n,
+                    "state": "closed",
+                    "url": f"{repo_url}/pulls/{n}",
+                    "created_at": _iso(pr["created"]),
+                    "closed_at": _iso(pr["closed"]),
+                    "updated_at": _iso(pr["updated"]),
+                    "merged_at": _iso(pr["closed"]) if pr["merged"] else None,
+                    "user": {"login": pr["author"]},
+                    "_links": {"self": {"href": f"{repo_url}/pulls/{n}"}},
+                })
+            return "rest:pulls", "core", 200, items, len(items)
+
+        number = int(number or 0)
+        if not 1 <= number <= self.prs_per_repo:
+            return "rest:outros", "core", 404, {"message": "Not Found"}, 0
+        pr = self.pull_request(full_name, number)
+
+        if kind == "pulls" and sub is None:
+            return "rest:pull", "core", 200, {
+                "number": number,
+                "state": "closed",
+                "merged": pr["merged"],
+                "additions": pr["additions"],
+                "deletions": pr["deletions"],
+                "changed_files": pr["changed_files"],
+                "body": pr["body"],
+                "user": {"login": pr["author"]},
+                "comments": len(pr["commenters"]),
+                "review_comments": sum(pr["review_comments"]),
+                "_links": {"comments": {"href": f"{repo_url}/issues/{number}/comments"}},
+            }, 1
+        if sub == "reviews":
+            items = [{"id": i, "user": {"login": login}, "state": "COMMENTED"} for i, login in enumerate(pr["reviewers"])]
+            return "rest:reviews", "core", 200, items, len(items)
+        if sub == "comments":
+            items = [{"id": i, "user": {"login": login}, "body": "ok"} for i, login in enumerate(pr["commenters"])]
+            return "rest:comments", "core", 200, items, len(items)
+        return "rest:outros", "core", 404, {"message": "Not Found"}, 0
+
+    # --- GraphQL ---
+
+    def graphql(self, body, token):
+        """Devolve (rota, corpo, nº de nós) de uma query GraphQL."""
+        query, variables = body.get("query", ""), body.get("variables") or {}
+
+        def argument(name, default=None):
+            match = re.search(rf"\b{name}:\s*(\$\w+|\"[^\"]*\"|\d+)", query)
+            if not match:
+                return default
+            raw = match.group(1)
+            if raw.startswith("$"):
+                return variables.get(raw[1:], default)
+            return raw.strip('"') if raw.startswith('"') else int(raw)
+
+        data = {}
+        if "rateLimit" in query:
+            data["rateLimit"] = self.rate_limit_node(token)
+
+        if re.search(r"\bnodes\s*\(\s*ids:", query):
+            nodes = []
+            for node_id in variables.get("ids", []):
+                index = int(node_id[2:]) if re.fullmatch(r"R_\d+", node_id or "") else -1
+                nodes.append(self.graphql_repository(self.repository(index)) if 0 <= index < self.repos else None)
+            data["nodes"] = nodes
+            return "graphql:nodes", {"data": data}, len(nodes)
+
+        if re.search(r"\brepository\s*\(", query):
+            first, cursor = argument("first", 10), argument("after")
+            owner, name = variables.get("owner"), variables.get("name")
+            offset = int(cursor) if cursor else 0
+            numbers = list(self.pr_numbers())
+            nodes = [self._graphql_pr(f"{owner}/{name}", n) for n in numbers[offset:offset + first]]
+            end = offset + len(nodes)
+            data["repository"] = {"pullRequests": {
+                "totalCount": len(numbers),
+                "pageInfo": {"hasNextPage": end < len(numbers), "endCursor": str(end) if nodes else cursor},
+                "nodes": nodes,
+            }}
+            return "graphql:repository", {"data": data}, len(nodes) * 10
+
+        if re.search(r"\bsearch\s*\(", query):
+            matches = self.search(argument("query", ""))
+            first, cursor = argument("first", 10), argument("after")
+            offset = int(cursor) if cursor else 0
+            available = min(len(matches), self.search_cap) if self.search_cap is not None else len(matches)
+            end = min(offset + first, available)
+            nodes = [self.graphql_repository(self.repository(i)) for i in matches[offset:end]] if offset < end else []
+            data["search"] = {
+                "repositoryCount": len(matches),
+                "pageInfo": {"hasNextPage": end < available, "endCursor": str(end) if nodes else cursor},
+                "nodes": nodes,
+            }
+            return "graphql:search", {"data": data}, len(nodes)
+
+        return "graphql:outros", {"errors": [{"message": "Operação não suportada pelo servidor de teste."}]}, 0
+
+    def _graphql_pr(self, full_name, number):
+        pr = self.pull_request(full_name, number)
+        return {
+            "number": number,
+            "merged": pr["merged"],
+            "createdAt": _iso(pr["created"]),
+            "closedAt": _iso(pr["closed"]),
+            "updatedAt": _iso(pr["updated"]),
+            "additions": pr["additions"],
+            "deletions": pr["deletions"],
+            "changedFiles": pr["changed_files"],
+            "body": pr["body"],
+            "author": {"login": pr["author"]},
+            "comments": {"totalCount": len(pr["commenters"]), "nodes": [{"author": {"login": login}} for login in pr["commenters"]]},
+            "reviews": {"totalCount": len(pr["reviewers"]), "nodes": [
+                {"author": {"login": login}, "comments": {"totalCount": count}}
+                for login, count in zip(pr["reviewers"], pr["review_comments"])]},
+        }
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como na API real
+    mock = None
+
+    def log_message(self, *args):
+        pass
+
+    def _token(self):
+        return self.headers.get("Authorization", "anonymous").split()[-1]
+
+    def _reply(self, route, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        etag = '"' + hashlib.md5(payload).hexdigest() + '"'
+        if status == 200 and self.command == "GET" and self.headers.get("If-None-Match") == etag:
+            status, payload = 304, b""
+            self.mock.refund(self._token(), "search" if route == "rest:search" else "core")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        if status in (200, 304):
+            self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        with self.mock.lock:
+            self.mock.stats[(route, status)] += 1
+
+    def _handle(self, resource, build):
+        mock = self.mock
+        with mock.lock:
+            mock.in_flight += 1
+        try:
+            status, headers, retry_after = mock.check_limits(self._token(), resource)
+            if retry_after is not None:
+                mock.delay(0)
+                return self._reply(self.route, 403, {"message": "You have exceeded a secondary rate limit."},
+                                   {"Retry-After": str(retry_after)})
+            if status == 403:
+                mock.delay(0)
+                return self._reply(self.route, 403, {"message": "API rate limit exceeded."}, headers)
+            if mock.error_rate and mock.random.random() < mock.error_rate:
+                mock.delay(0)
+                return self._reply(self.route, mock.error_status, {"message": "Server Error"}, headers)
+            status, body, nodes = build()
+            mock.delay(nodes)
+            return self._reply(self.route, status, body, headers)
+        finally:
+            with mock.lock:
+                mock.in_flight -= 1
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        route, resource, status, body, nodes = self.mock.rest(parsed.path.rstrip("/"), parsed.query)
+        self.route = route
+        if resource is None:
+            return self._reply(route, status, body)
+        self._handle(resource, lambda: (status, body, nodes))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b"{}"
+        if urlparse(self.path).path.rstrip("/") != "/graphql":
+            self.route = "rest:outros"
+            return self._reply(self.route, 404, {"message": "Not Found"})
+        try:
+            body = json.loads(raw)
+        except ValueError:
+            self.route = "graphql:outros"
+            return self._reply(self.route, 400, {"message": "Problems parsing JSON"})
+        route, response, nodes = self.mock.graphql(body, self._token())
+        self.route = route
+        self._handle("graphql", lambda: (200, response, nodes))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que imita a API do GitHub (REST + GraphQL) com dados sintéticos.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--repos", type=int, default=1000, help="nº de repositórios sintéticos no ranking de estrelas")
+    parser.add_argument("--prs-per-repo", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="latência base de cada resposta (s)")
+    parser.add_argument("--latency-per-node", type=float, default=0.0005, help="latência extra por item devolvido (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração das requisições que recebem --error-status")
+    parser.add_argument("--error-status", type=int, default=502)
+    parser.add_argument("--core-limit", type=int, default=5000)
+    parser.add_argument("--search-limit", type=int, default=30)
+    parser.add_argument("--graphql-limit", type=int, default=5000)
+    parser.add_argument("--window", type=int, default=3600, help="janela da cota (s)")
+    parser.add_argument("--secondary-limit", type=int, default=None, help="requisições por token em --secondary-window")
+    parser.add_argument("--secondary-window", type=int, default=60)
+    parser.add_argument("--max-concurrent", type=int, default=None)
+    parser.add_argument("--retry-after", type=int, default=60)
+    parser.add_argument("--search-cap", type=int, default=1000, help="resultados alcançáveis por busca (0 = sem limite)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockGitHub(
+        repos=args.repos, prs_per_repo=args.prs_per_repo, latency=args.latency, latency_per_node=args.latency_per_node,
+        jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+        rate_limits={"core": args.core_limit, "search": args.search_limit, "graphql": args.graphql_limit},
+        window=args.window, secondary_limit=args.secondary_limit, secondary_window=args.secondary_window,
+        max_concurrent=args.max_concurrent, retry_after=args.retry_after, search_cap=args.search_cap or None,
+        seed=args.seed, port=args.port).start()
+    print(f"API de teste em {mock.url} (export GITHUB_API_URL={mock.url}). Ctrl+C encerra.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,228 @@
+import bisect
+import csv
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# --- INSTRUMENTAÇÃO DAS REQUISIÇÕES DOS COLETORES ---
+#
+# Conta, por classe de endpoint (ex.: 'rest:pulls', 'rest:reviews', 'graphql:PullRequests'):
+# requisições por status, histograma de latência, bytes recebidos, novas tentativas,
+# respostas vindas do cache e o tempo bloqueado esperando cota/limiter. O relógio da
+# execução é dividido em três estados: alguma requisição em voo (rede), nenhuma em
+# voo mas alguém esperando cota/limiter/backoff (cota) e nenhum dos dois
+# (processamento local, CPU). O maior deles diz o que limitou a coleta.
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+REST_ENDPOINTS = [
+    (re.compile(r"/search/(\w+)"), "search"),
+    (re.compile(r"/pulls/\d+/reviews"), "reviews"),
+    (re.compile(r"/pulls/\d+/comments|/issues/\d+/comments"), "comments"),
+    (re.compile(r"/pulls/\d+$"), "pull"),
+    (re.compile(r"/pulls$"), "pulls"),
+    (re.compile(r"/releases$"), "releases"),
+]
+
+def endpoint_class(url, query=None):
+    """Classe do endpoint: 'graphql:<operação>' para GraphQL, 'rest:<recurso>' para REST."""
+    path = urlparse(url).path.rstrip("/")
+    if path.endswith("/graphql"):
+        match = re.search(r"(?:query|mutation)\s+(\w+)", query or "")
+        return f"graphql:{match.group(1) if match else 'anonima'}"
+    for pattern, name in REST_ENDPOINTS:
+        if pattern.search(path):
+            return f"rest:{name}"
+    return "rest:outros"
+
+class RequestMetrics:
+    """Métricas de uma execução de coleta; seguro para várias threads/corrotinas."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.endpoints = {}
+        self.blocked = {}
+        self.active = 0
+        self.waiting = 0
+        self.state_since = time.perf_counter()
+        self.state_seconds = {"network": 0.0, "quota": 0.0, "cpu": 0.0}
+
+    def _state(self):
+        return "network" if self.active else "quota" if self.waiting else "cpu"
+
+    def _transition(self, active=0, waiting=0):
+        """Fecha o intervalo do estado atual e aplica a mudança nos contadores (com o lock)."""
+        now = time.perf_counter()
+        self.state_seconds[self._state()] += now - self.state_since
+        self.state_since = now
+        self.active += active
+        self.waiting += waiting
+
+    def _endpoint(self, endpoint):
+        return self.endpoints.setdefault(endpoint, {
+            "requests": 0, "status": {}, "errors": 0, "retries": 0,
+            "cache_fresh": 0, "not_modified": 0, "bytes": 0,
+            "latency_sum": 0.0, "latency_max": 0.0,
+            "latency_buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+        })
+
+    @contextmanager
+    def track(self, endpoint):
+        """Mede uma requisição: `with metrics.track(ep) as call: call['response'] = ...`.
+
+        Respostas servidas do disco pelo HTTPCache (from_cache == 'fresh') contam só
+        como acerto de cache, não como requisição.
+        """
+        call = {"response": None}
+        with self.lock:
+            self._transition(active=1)
+        start = time.perf_counter()
+        try:
+            yield call
+        finally:
+            elapsed = time.perf_counter() - start
+            response = call["response"]
+            with self.lock:
+                self._transition(active=-1)
+                stats = self._endpoint(endpoint)
+                if response is not None and getattr(response, "from_cache", None) == "fresh":
+                    stats["cache_fresh"] += 1
+                else:
+                    stats["requests"] += 1
+                    stats["latency_sum"] += elapsed
+                    stats["latency_max"] = max(stats["latency_max"], elapsed)
+                    stats["latency_buckets"][bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+                    if response is None:
+                        stats["errors"] += 1
+                    else:
+                        status = str(response.status_code)
+                        stats["status"][status] = stats["status"].get(status, 0) + 1
+                        stats["bytes"] += len(response.content or b"")
+                        if getattr(response, "from_cache", None) == "revalidated":
+                            stats["not_modified"] += 1
+
+    def retry(self, endpoint):
+        with self.lock:
+            self._endpoint(endpoint)["retries"] += 1
+
+    @contextmanager
+    def blocking(self, reason):
+        """Mede uma espera por cota, limiter, Retry-After ou backoff (`reason` livre, ex.: 'quota:core').
+
+        Vale para `time.sleep` e para `await asyncio.sleep` dentro do bloco. Os tempos por
+        motivo são somados entre as threads/corrotinas e podem passar do tempo de parede.
+        """
+        with self.lock:
+            self._transition(waiting=1)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self._transition(waiting=-1)
+                self.blocked[reason] = self.blocked.get(reason, 0.0) + time.perf_counter() - start
+
+    def summary(self):
+        """Resumo da execução (dicionário serializável em JSON)."""
+        with self.lock:
+            self._transition()
+            wall = time.time() - self.started
+            breakdown = dict(self.state_seconds)
+            endpoints = {}
+            for name, stats in sorted(self.endpoints.items()):
+                count = stats["requests"]
+                endpoints[name] = {
+                    **{key: value for key, value in stats.items() if key != "latency_buckets"},
+                    "latency_mean": stats["latency_sum"] / count if count else None,
+                    "latency_p50": self._bucket_quantile(stats["latency_buckets"], 0.5),
+                    "latency_p95": self._bucket_quantile(stats["latency_buckets"], 0.95),
+                    "latency_histogram": dict(zip([*map(str, LATENCY_BUCKETS), "+Inf"], stats["latency_buckets"])),
+                }
+            blocked = dict(self.blocked)
+
+        return {
+            "started_at": self.started,
+            "wall_seconds": wall,
+            "time_breakdown_seconds": breakdown,
+            "blocked_seconds": blocked,
+            "bound_by": max(breakdown, key=breakdown.get),
+            "endpoints": endpoints,
+        }
+
+    @staticmethod
+    def _bucket_quantile(buckets, q):
+        """Quantil aproximado pelo limite superior do balde (como o histogram_quantile do Prometheus)."""
+        total = sum(buckets)
+        if not total:
+            return None
+        cumulative = 0
+        for bound, count in zip([*LATENCY_BUCKETS, float("inf")], buckets):
+            cumulative += count
+            if cumulative >= q * total:
+                return bound if bound != float("inf") else LATENCY_BUCKETS[-1]
+
+    def to_prometheus(self, prefix="github_collector"):
+        """Texto no formato de exposição do Prometheus."""
+        summary = self.summary()
+        with self.lock:
+            buckets = {name: list(stats["latency_buckets"]) for name, stats in self.endpoints.items()}
+        lines = [
+            f"# TYPE {prefix}_requests_total counter",
+            *(f'{prefix}_requests_total{{endpoint="{name}",status="{status}"}} {count}'
+              for name, stats in summary["endpoints"].items() for status, count in stats["status"].items()),
+            f"# TYPE {prefix}_errors_total counter",
+            *(f'{prefix}_errors_total{{endpoint="{name}"}} {stats["errors"]}' for name, stats in summary["endpoints"].items()),
+            f"# TYPE {prefix}_retries_total counter",
+            *(f'{prefix}_retries_total{{endpoint="{name}"}} {stats["retries"]}' for name, stats in summary["endpoints"].items()),
+            f"# TYPE {prefix}_cache_hits_total counter",
+            *(f'{prefix}_cache_hits_total{{endpoint="{name}",kind="{kind}"}} {stats[key]}'
+              for name, stats in summary["endpoints"].items() for kind, key in (("fresh", "cache_fresh"), ("not_modified", "not_modified"))),
+            f"# TYPE {prefix}_response_bytes_total counter",
+            *(f'{prefix}_response_bytes_total{{endpoint="{name}"}} {stats["bytes"]}' for name, stats in summary["endpoints"].items()),
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+        for name, stats in summary["endpoints"].items():
+            cumulative = 0
+            for bound, count in zip([*map(str, LATENCY_BUCKETS), "+Inf"], buckets[name]):
+                cumulative += count
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{endpoint="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_request_duration_seconds_sum{{endpoint="{name}"}} {stats["latency_sum"]}')
+            lines.append(f'{prefix}_request_duration_seconds_count{{endpoint="{name}"}} {stats["requests"]}')
+        lines += [
+            f"# TYPE {prefix}_blocked_seconds_total counter",
+            *(f'{prefix}_blocked_seconds_total{{reason="{reason}"}} {seconds}' for reason, seconds in summary["blocked_seconds"].items()),
+            f"# TYPE {prefix}_state_seconds_total counter",
+            *(f'{prefix}_state_seconds_total{{state="{state}"}} {seconds}' for state, seconds in summary["time_breakdown_seconds"].items()),
+            f"# TYPE {prefix}_wall_seconds gauge",
+            f"{prefix}_wall_seconds {summary['wall_seconds']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path_prefix, prometheus=False):
+        """Grava <prefixo>.json (resumo completo), <prefixo>.csv (uma linha por endpoint) e, opcionalmente, <prefixo>.prom."""
+        summary = self.summary()
+        with open(f"{path_prefix}.json", "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+
+        columns = ["endpoint", "requests", "errors", "retries", "cache_fresh", "not_modified", "bytes",
+                   "latency_mean", "latency_p50", "latency_p95", "latency_max", "status"]
+        with open(f"{path_prefix}.csv", "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for name, stats in summary["endpoints"].items():
+                writer.writerow({"endpoint": name, **{col: stats[col] for col in columns[1:-1]},
+                                 "status": json.dumps(stats["status"])})
+
+        if prometheus:
+            with open(f"{path_prefix}.prom", "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus())
+
+        breakdown = summary["time_breakdown_seconds"]
+        print(f"Métricas da coleta salvas em '{path_prefix}.json' e '{path_prefix}.csv': "
+              f"{summary['wall_seconds']:.0f}s no total ({breakdown['network']:.0f}s rede, {breakdown['quota']:.0f}s "
+              f"esperando cota, {breakdown['cpu']:.0f}s processamento) -> limitada por {summary['bound_by']}.")
+        return summary
@@ -0,0 +1,105 @@
+import json
+import numpy as np
+
+# --- SKETCH DE QUANTIS (KLL) ---
+
+class KLLSketch:
+    """Sketch KLL de quantis: memória O(k), erro de posto ~1/k e fusão (merge) sem perda extra.
+
+    Os itens de cada nível têm peso 2**nível. Quando o total retido passa da soma das
+    capacidades, o nível mais baixo que estourou a sua é ordenado e metade dos itens
+    (pares ou ímpares, ao acaso) sobe para o nível seguinte com o dobro do peso; o
+    total de pesos continua igual a `n`.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = float("inf")
+        self.max = float("-inf")
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        # só compacta quando o total retido passa da soma das capacidades
+        while sum(len(items) for items in self.levels) > sum(self._capacity(level) for level in range(len(self.levels))):
+            level = next(level for level, items in enumerate(self.levels) if len(items) >= self._capacity(level))
+            items = self.levels[level]
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            items = np.sort(items)
+            # com tamanho ímpar, o maior item fica no nível atual
+            even = len(items) - len(items) % 2
+            promoted = items[self._rng.integers(2):even:2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            self.levels[level] = items[even:]
+
+    def update(self, values):
+        """Adiciona um lote de valores (ignora NaN)."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.n += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """Funde outro sketch neste (ex.: repositório -> corpus)."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _sorted(self):
+        """Itens retidos em ordem crescente e o peso acumulado até cada um."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items_), 2.0 ** level) for level, items_ in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """Quantil aproximado q (0 a 1); None se o sketch estiver vazio."""
+        if self.n == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        items, cumulative = self._sorted()
+        index = np.searchsorted(cumulative, q * cumulative[-1], side="left")
+        return float(items[min(index, len(items) - 1)])
+
+    def rank(self, values):
+        """Nº aproximado de itens < v e <= v para cada v de `values` (vetorizado)."""
+        items, cumulative = self._sorted()
+        cumulative = np.concatenate([[0.0], cumulative])
+        values = np.asarray(values, dtype=float)
+        return (cumulative[np.searchsorted(items, values, side="left")],
+                cumulative[np.searchsorted(items, values, side="right")])
+
+    def to_json(self):
+        return json.dumps({
+            "k": self.k, "n": self.n, "min": self.min, "max": self.max,
+            "levels": [items.tolist() for items in self.levels],
+        })
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        sketch = cls(k=data["k"])
+        sketch.n, sketch.min, sketch.max = data["n"], data["min"], data["max"]
+        sketch.levels = [np.asarray(items, dtype=float) for items in data["levels"]]
+        return sketch
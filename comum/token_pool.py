@@ -0,0 +1,108 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+# --- POOL DE TOKENS DO GITHUB COM COTA POR RECURSO ---
+#
+# Cada token tem cotas independentes para REST ('core'), busca ('search') e GraphQL
+# ('graphql'). O pool acompanha, por token e por recurso, a cota restante e o horário
+# de reset (cabeçalhos X-RateLimit-*) e entrega cada requisição ao token com mais
+# folga. Só há espera quando todos os tokens estão esgotados naquele recurso.
+
+# Cota de uma janela cheia, usada enquanto o token ainda não respondeu nenhuma vez
+DEFAULT_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+
+def load_tokens(variable="GITHUB_TOKENS", fallback="GITHUB_TOKEN"):
+    """Lê os tokens do ambiente (.env): lista separada por vírgulas/espaços em
+    GITHUB_TOKENS ou, se ela não existir, o GITHUB_TOKEN único de sempre."""
+    raw = os.getenv(variable) or os.getenv(fallback) or ""
+    return [token for token in re.split(r"[\s,;]+", raw) if token]
+
+class TokenPool:
+    """Escolhe, a cada requisição, o token com mais cota restante no recurso pedido.
+
+    Uso: `token, wait = pool.choose(resource)` (não bloqueia; wait > 0 se todos
+    esgotados) ou `token = pool.acquire(resource)` (espera); depois da resposta,
+    `pool.release(token, resource, response.headers)`. Sem cabeçalhos (erro de
+    conexão, resposta servida do cache), a reserva feita na escolha é devolvida.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = list(dict.fromkeys(tokens))
+        if not self.tokens:
+            raise ValueError("O pool precisa de pelo menos um token.")
+        self.lock = threading.Lock()
+        self.state = {}
+
+    @property
+    def scope(self):
+        """Identifica o conjunto de tokens sem expô-los (ex.: escopo do cache HTTP)."""
+        return "pool:" + hashlib.sha256("\n".join(sorted(self.tokens)).encode()).hexdigest()[:16]
+
+    def headers(self, token):
+        return {"Authorization": f"token {token}"}
+
+    def _state(self, token, resource):
+        return self.state.setdefault((token, resource), {"remaining": None, "reset": 0.0, "in_flight": 0})
+
+    def _headroom(self, state, resource, now):
+        if state["remaining"] is not None and state["reset"] <= now:
+            state["remaining"] = None  # a janela virou: a cota voltou a ficar cheia
+        if state["remaining"] is None:
+            return DEFAULT_LIMITS.get(resource, 5000) - state["in_flight"]
+        return state["remaining"]
+
+    def choose(self, resource):
+        """Reserva o token com mais folga; devolve (token, 0) ou (None, segundos até o primeiro reset)."""
+        with self.lock:
+            now = time.time()
+            best, best_headroom = None, 0
+            for token in self.tokens:
+                headroom = self._headroom(self._state(token, resource), resource, now)
+                if headroom > best_headroom:
+                    best, best_headroom = token, headroom
+            if best is None:
+                first_reset = min(self._state(token, resource)["reset"] for token in self.tokens)
+                return None, max(first_reset - now, 0) + 1
+            state = self._state(best, resource)
+            state["in_flight"] += 1
+            if state["remaining"] is not None:
+                state["remaining"] -= 1
+            return best, 0
+
+    def acquire(self, resource):
+        """Versão bloqueante de `choose`, para coletores síncronos."""
+        while True:
+            token, wait = self.choose(resource)
+            if token is not None:
+                return token
+            print(f"Todos os {len(self.tokens)} tokens esgotaram a cota de '{resource}'. Aguardando {wait:.0f} segundos.")
+            time.sleep(wait)
+
+    def release(self, token, resource, headers=None):
+        """Encerra a requisição feita com `token` e sincroniza a cota com os cabeçalhos da resposta."""
+        headers = headers or {}
+        remaining, reset = headers.get("X-RateLimit-Remaining"), headers.get("X-RateLimit-Reset")
+        with self.lock:
+            state = self._state(token, resource)
+            state["in_flight"] -= 1
+            if remaining is None or reset is None:
+                if state["remaining"] is not None:
+                    state["remaining"] += 1
+                return
+            # o GitHub informa o recurso que de fato foi cobrado
+            charged = self._state(token, headers.get("X-RateLimit-Resource", resource))
+            # requisições ainda em voo podem já ter sido contadas pelo GitHub
+            remaining, reset = int(remaining) - charged["in_flight"], float(reset)
+            if charged["remaining"] is None or reset != charged["reset"]:
+                charged["remaining"], charged["reset"] = remaining, reset
+            else:
+                # respostas chegam fora de ordem: fica com a menor cota vista na janela
+                charged["remaining"] = min(charged["remaining"], remaining)
+
+    def summary(self):
+        """Cota conhecida por recurso e token (tokens identificados só pelos 4 últimos caracteres)."""
+        with self.lock:
+            return {f"...{token[-4:]}/{resource}": state["remaining"] for (token, resource), state in self.state.items()}